@@ -0,0 +1,110 @@
+import re
+from typing import Dict, Iterable, List, Optional
+from pydantic import BaseModel, Field
+
+SCORE_RE = re.compile(r'(\d{1,3})\s*/\s*100')
+
+
+class ATSEvaluation(BaseModel):
+    """Structured result of one ATS evaluation, validated from the evaluator's output."""
+
+    score: int = Field(ge=0, le=100, description="Estimated ATS score from 0 to 100")
+    matched_keywords: List[str] = Field(default_factory=list, description="Keywords from the context present in the resume")
+    missing_keywords: List[str] = Field(default_factory=list, description="Keywords from the context missing from the resume")
+    suggestions: List[str] = Field(default_factory=list, description="Specific improvements to skills, formatting or content alignment")
+    verdict: str = Field(default="", description="Overall verdict on the resume's readiness")
+
+
+def parse_ats_evaluation(crew_output) -> Optional[ATSEvaluation]:
+    """Returns the evaluation of a crew output.
+
+    Uses the schema-validated result when the model produced one, otherwise
+    falls back to the first 'NN/100' score in the raw text (without keyword
+    lists). Returns None if no score can be found.
+    """
+    if crew_output is None:
+        return None
+    evaluation = getattr(crew_output, 'pydantic', None)
+    if isinstance(evaluation, ATSEvaluation):
+        return evaluation
+    match = SCORE_RE.search(getattr(crew_output, 'raw', '') or '')
+    if match and int(match.group(1)) <= 100:
+        return ATSEvaluation(score=int(match.group(1)), verdict=crew_output.raw.strip())
+    return None
+
+
+def format_ats_report(evaluation: ATSEvaluation) -> str:
+    """Renders an evaluation as the plain-text feedback handed to the resume builder."""
+    lines = [f"ATS Score: {evaluation.score}/100"]
+    if evaluation.matched_keywords:
+        lines.append(f"Matched keywords: {', '.join(evaluation.matched_keywords)}")
+    if evaluation.missing_keywords:
+        lines.append(f"Missing keywords: {', '.join(evaluation.missing_keywords)}")
+    if evaluation.suggestions:
+        lines.append("Suggestions:")
+        lines.extend(f"- {suggestion}" for suggestion in evaluation.suggestions)
+    if evaluation.verdict:
+        lines.append(f"Verdict: {evaluation.verdict}")
+    return '\n'.join(lines)
+
+
+def local_ats_evaluation(result: dict) -> ATSEvaluation:
+    """Turns a local keyword score (utils.ats_scorer.ATSScorer.score) into an evaluation.
+
+    The score is the knowledgebase points scale (matched points as a
+    percentage of the category's maximum), so it is stricter than the LLM's
+    estimate. Missing top and medium priority keywords are reported; adding
+    the missing top priority ones is suggested first.
+    """
+    matched = [keyword for keywords in result['matched'].values() for keyword in keywords]
+    missing_top = result['missing'].get('top', [])
+    missing = missing_top + result['missing'].get('medium', [])
+    suggestions = []
+    if missing_top:
+        suggestions.append(f"Add the missing top priority keywords where they are truthful: {', '.join(missing_top)}")
+    if result['missing'].get('medium'):
+        suggestions.append(f"Work in medium priority keywords: {', '.join(result['missing']['medium'])}")
+    verdict = f"Local keyword score for {result['category']}: {result['points']}/{result['max_points']} points"
+    return ATSEvaluation(score=result['score'], matched_keywords=matched, missing_keywords=missing,
+                         suggestions=suggestions, verdict=verdict)
+
+
+# Weight of each resume section in a score merged from section evaluations
+SECTION_WEIGHTS = {'Summary': 1, 'Skills': 3, 'Projects': 2, 'Experience': 3, 'Education': 1}
+
+
+class SectionFindings(BaseModel):
+    """The evaluator's findings for one resume section."""
+
+    section: str = Field(description="Name of the evaluated section")
+    score: int = Field(ge=0, le=100, description="Estimated ATS score of the section from 0 to 100")
+    matched_keywords: List[str] = Field(default_factory=list, description="Keywords from the context present in the section")
+    missing_keywords: List[str] = Field(default_factory=list, description="Keywords from the context the section should contain")
+    suggestions: List[str] = Field(default_factory=list, description="Specific improvements to the section")
+
+
+class SectionedEvaluation(BaseModel):
+    """Per-section findings for the resume sections that were sent for evaluation."""
+
+    sections: List[SectionFindings] = Field(default_factory=list, description="One entry per evaluated section")
+
+
+def merge_section_findings(findings: Dict[str, SectionFindings], cached: Iterable[str] = ()) -> ATSEvaluation:
+    """Combines per-section findings into one evaluation of the whole resume.
+
+    The score is the average of the section scores weighted by
+    SECTION_WEIGHTS. A keyword only counts as missing if no section contains
+    it, and suggestions are prefixed with the section they concern.
+    """
+    weights = {name: SECTION_WEIGHTS.get(name, 1) for name in findings}
+    total_weight = sum(weights.values())
+    score = round(sum(findings[name].score * weight for name, weight in weights.items()) / total_weight) if total_weight else 0
+    matched = list(dict.fromkeys(keyword for section in findings.values() for keyword in section.matched_keywords))
+    matched_lower = {keyword.lower() for keyword in matched}
+    missing = [keyword for keyword in dict.fromkeys(keyword for section in findings.values() for keyword in section.missing_keywords)
+               if keyword.lower() not in matched_lower]
+    suggestions = [f"[{name}] {suggestion}" for name, section in findings.items() for suggestion in section.suggestions]
+    cached = set(cached)
+    verdict = (f"Merged from {len(findings)} section evaluations ({len(cached)} unchanged and reused): "
+               + ', '.join(f"{name} {section.score}/100{' (cached)' if name in cached else ''}" for name, section in findings.items()))
+    return ATSEvaluation(score=score, matched_keywords=matched, missing_keywords=missing, suggestions=suggestions, verdict=verdict)
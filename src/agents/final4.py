@@ -1,6 +1,14 @@
 import os
-from crewai import Agent, Task, Crew, Process, LLM
+import threading
+import time
+from crewai import Task, Crew, Process
+from crewai.tasks.task_output import TaskOutput
 from dotenv import load_dotenv
+from utils.stage_cache import StageCache
+from agents.registry import registry
+from utils.company_store import CompanyStore, normalize_company_name
+from utils.tracing import tracer, trace_crewai_llm_calls
+from utils.prompt_assembly import PromptAssembler, CONTEXT_MARKER, DEFAULT_TASK_TOKEN_BUDGET
 
 # Load environment variables from .env file
 load_dotenv()
@@ -9,64 +17,122 @@ load_dotenv()
 if not os.getenv("OPENAI_API_KEY"):
     raise EnvironmentError("OPENAI_API_KEY must be set in your environment or .env file.")
 
-# Initialize LLM
-openai_llm = LLM(model="openai/gpt-4.1")
+trace_crewai_llm_calls(tracer)
 
-def run_final4_processing(job_description_file, company_file, github_profile_file, candidate_cv_file):
-    """Runs the agent processing pipeline from final4.py.
+# Content-addressed cache of task outputs; set to None to always run every task
+stage_cache = StageCache()
 
-    Args:
-        job_description_file (str): Path to the job description text file.
-        company_file (str): Path to the company name text file.
-        github_profile_file (str): Path to the refined GitHub profile text file.
-        candidate_cv_file (str): Path to the candidate's CV text file (e.g., portfolio.txt).
+# Company intelligence shared across candidates applying to the same job; set to None to research every run
+company_store = CompanyStore()
+
+# Upstream tasks each stage-1 task reads, per execution mode.
+# 'sequential' chains every task on the previous ones; 'dag' only keeps the
+# inputs the tasks really need, so JD, company and GitHub analysis run concurrently.
+TASK_DEPENDENCIES = {
+    'sequential': {
+        'jd': [],
+        'company': ['jd'],
+        'github': ['jd', 'company'],
+        'cv': ['jd', 'company', 'github'],
+    },
+    'dag': {
+        'jd': [],
+        'company': [],
+        'github': [],
+        'cv': ['jd', 'company', 'github'],
+    },
+}
+
+# Stage-1 tasks that depend on the candidate; the others only depend on the job
+CANDIDATE_TASKS = ('github', 'cv')
+
+# Headings the outputs of upstream tasks are given in the prompts of downstream tasks
+CONTEXT_LABELS = {
+    'jd': "📝 Job Description Context (from previous analysis)",
+    'company': "🏢 Company Context (from previous analysis)",
+    'github': "🧑‍💻 GitHub Context (from previous analysis)",
+}
+
+def critical_path(dependencies, durations):
+    """Returns (latency, task keys) of the longest dependency chain given per-task durations in seconds."""
+    paths = {}
+    for key in dependencies:  # Dependencies are declared in topological order
+        upstream = max((paths[dep] for dep in dependencies[key]), key=lambda path: path[0], default=(0.0, []))
+        paths[key] = (upstream[0] + (durations.get(key) or 0.0), upstream[1] + [key])
+    return max(paths.values(), key=lambda path: path[0])
+
+def assemble_prompts(tasks, dependencies, pending, token_budget=DEFAULT_TASK_TOKEN_BUDGET):
+    """Hands upstream outputs to the pending tasks through the prompt assembly layer.
+
+    crewai would append every upstream output to the prompt as-is; instead each
+    task's context is cleared and its description is rebuilt by a PromptAssembler
+    (de-duplicated and fitted to token_budget) as soon as all of its upstream
+    tasks have an output, either from the stage cache or from their completion
+    callback. Must be called after the stage keys are computed, since those are
+    based on the description templates.
 
     Returns:
-        dict: A dictionary containing the paths to the generated output files.
-              Keys: 'jd_output', 'company_output', 'github_output', 'cv_output'
+        PromptAssembler: Holds the per-task token reports.
     """
-    try:
-        # Load Job Description
-        with open(job_description_file, 'r', encoding='utf-8') as file:
-            job_description = file.read()
+    assembler = PromptAssembler(token_budget)
+    templates = {key: task.description for key, task in tasks.items()}
+    assembled = set()
+    lock = threading.Lock()
 
-        # Load Company Name
-        with open(company_file, 'r', encoding='utf-8') as file:
-            company_name = file.read().strip()
+    def assemble_ready(_output=None):
+        # Async tasks complete on their own threads
+        with lock:
+            for key in pending:
+                if key in assembled or any(tasks[dep].output is None for dep in dependencies[key]):
+                    continue
+                blocks = [(CONTEXT_LABELS[dep], tasks[dep].output.raw) for dep in dependencies[key]]
+                tasks[key].description = assembler.assemble(key, templates[key], blocks)
+                assembled.add(key)
 
-        # Load GitHub Profile
-        with open(github_profile_file, 'r', encoding='utf-8') as file:
-            github_profile = file.read()
+    for task in pending.values():
+        task.context = []
+        task.callback = assemble_ready
+    assemble_ready()
+    return assembler
 
-        # Load Candidate CV
-        with open(candidate_cv_file, 'r', encoding='utf-8') as file:
-            candidate_cv = file.read()
-    except FileNotFoundError as e:
-        print(f"Error loading input file: {e}")
-        return None
-    except Exception as e:
-        print(f"An error occurred while loading input files: {e}")
-        return None
+def stage_key(key, task, upstream_keys, description=None):
+    """Returns the stage cache key of a stage-1 task given the keys of its upstream tasks.
 
-    # Define output file paths (using absolute paths for clarity)
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Define output file paths relative to the project root
-    output_dir = 'output'
-    os.makedirs(output_dir, exist_ok=True)
-    jd_output_file = os.path.join(output_dir, 'agent_output__jd.txt')
-    company_output_file = os.path.join(output_dir, 'agent_output_company.txt')
-    github_output_file = os.path.join(output_dir, 'agent_output_github.txt')
-    cv_output_file = os.path.join(output_dir, 'agent_output_profile.txt')
-
-    # JD Analyzer Agent & Task
-    jd_analyzer_agent = Agent(
-        role="Senior Technical Job Description Analyst",
-        goal="Extract structured requirements and relevant insights from job descriptions for tailored resume creation",
-        backstory="Specialist in breaking down job descriptions to find required skills, cultural fit hints, and tech keywords",
-        llm=openai_llm,
-        verbose=True
+    description defaults to the task's description; pass the template once
+    the prompt has been assembled.
+    """
+    return StageCache.key_for(
+        f"final4:{key}",
+        model=registry.llm().model,
+        description=task.description if description is None else description,
+        expected_output=task.expected_output,
+        agent=[task.agent.role, task.agent.goal, task.agent.backstory],
+        upstream=upstream_keys,
     )
-    analyze_jd_task = Task(
+
+def company_stage_key(prompt_key, profile):
+    """Returns the stage key of the company task once its profile is known.
+
+    Company profiles expire, so they are served by the company store rather
+    than the stage cache; keying the company task on the profile itself makes
+    a refreshed profile invalidate every task that read the old one.
+    """
+    return StageCache.key_for('final4:company', prompt=prompt_key, profile=profile)
+
+def company_prompt_fingerprint():
+    """Returns the fingerprint the company store records a profile's prompt under.
+
+    It covers the company task's prompt template, expected output, agent and
+    model. The company name and job description are left as placeholders,
+    since the store keys profiles on them already (the name normalised), and
+    upstream tasks are left out, so a profile serves every execution mode.
+    """
+    return stage_key('company', build_company_task('{company_name}', '{job_description}', None), [])
+
+def build_jd_task(job_description, output_file):
+    """Creates the JD Analyzer agent and its analysis task for one job description."""
+    jd_analyzer_agent = registry.agent('jd_analyzer')
+    return Task(
         description=f"""
         You are a **Senior Technical Job Description Analyst**.
         Please analyze the following job description thoroughly:
@@ -92,18 +158,13 @@ def run_final4_processing(job_description_file, company_file, github_profile_fil
         """,
         expected_output="A structured multi-paragraph natural language analysis that reads like a consultant's breakdown of the JD.",
         agent=jd_analyzer_agent,
-        output_file=jd_output_file
+        output_file=output_file
     )
 
-    # Company Intelligence Agent & Task
-    employer_data_extraction_agent = Agent(
-        role="Company Intelligence Agent",
-        goal=f"Research {company_name}'s tech stack and culture using verified sources",
-        verbose=True,
-        llm=openai_llm,
-        backstory="Specializes in extracting accurate company data from public sources to help candidates tailor their applications effectively."
-    )
-    extract_employer_data_task = Task(
+def build_company_task(company_name, job_description, output_file):
+    """Creates the Company Intelligence agent and its research task for one company and job description."""
+    employer_data_extraction_agent = registry.agent('company_intelligence')
+    return Task(
         description=f"""
         🔍 You are a **Company Intelligence Analyst**.
         Your goal is to extract real, verifiable insights about **{company_name}** to help a candidate tailor their resume for a specific job.
@@ -147,25 +208,82 @@ def run_final4_processing(job_description_file, company_file, github_profile_fil
         """,
         expected_output="Detailed paragraph-based breakdown of company data and how it ties to the job description. Include sources used and resume tailoring tips.",
         agent=employer_data_extraction_agent,
-        output_file=company_output_file,
-        context=[analyze_jd_task]
+        output_file=output_file
     )
 
+@tracer.traced('final4')
+def run_final4_processing(job_description_file, company_file, github_profile_file, candidate_cv_file, execution_mode='sequential', force=False, output_dir='output'):
+    """Runs the agent processing pipeline from final4.py.
+
+    Args:
+        job_description_file (str): Path to the job description text file.
+        company_file (str): Path to the company name text file.
+        github_profile_file (str): Path to the refined GitHub profile text file.
+        candidate_cv_file (str): Path to the candidate's CV text file (e.g., portfolio.txt).
+        execution_mode (str): 'sequential' runs the four tasks one after another;
+            'dag' runs the tasks without upstream inputs concurrently (see TASK_DEPENDENCIES).
+        force (bool or collection): Ignore the stage cache and rerun every task, or only
+            the tasks whose keys are given (e.g. CANDIDATE_TASKS once the job is prepared).
+        output_dir (str): Directory the task outputs are written to.
+
+    Returns:
+        dict: A dictionary containing the paths to the generated output files.
+              Keys: 'jd_output', 'company_output', 'github_output', 'cv_output'
+    """
+    try:
+        # Load Job Description
+        with open(job_description_file, 'r', encoding='utf-8') as file:
+            job_description = file.read()
+
+        # Load Company Name
+        with open(company_file, 'r', encoding='utf-8') as file:
+            company_name = file.read().strip()
+
+        # Load GitHub Profile
+        with open(github_profile_file, 'r', encoding='utf-8') as file:
+            github_profile = file.read()
+
+        # Load Candidate CV
+        with open(candidate_cv_file, 'r', encoding='utf-8') as file:
+            candidate_cv = file.read()
+    except FileNotFoundError as e:
+        print(f"Error loading input file: {e}")
+        return None
+    except Exception as e:
+        print(f"An error occurred while loading input files: {e}")
+        return None
+
+    # Define output file paths (using absolute paths for clarity)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    # Define output file paths relative to the project root
+    os.makedirs(output_dir, exist_ok=True)
+    jd_output_file = os.path.join(output_dir, 'agent_output__jd.txt')
+    company_output_file = os.path.join(output_dir, 'agent_output_company.txt')
+    github_output_file = os.path.join(output_dir, 'agent_output_github.txt')
+    cv_output_file = os.path.join(output_dir, 'agent_output_profile.txt')
+
+    # JD Analyzer Agent & Task
+    analyze_jd_task = build_jd_task(job_description, jd_output_file)
+
+    # Company Intelligence Agent & Task
+    extract_employer_data_task = build_company_task(company_name, job_description, company_output_file)
+    extract_employer_data_task.context = [analyze_jd_task]
+
     # GitHub Analyzer Agent & Task
-    github_analyzer_agent = Agent(
-        role="Targeted GitHub Profile Analyst",
-        goal=f"Analyze {github_profile}'s GitHub profile and extract insights relevant to the job at {company_name}",
-        verbose=True,
-        llm=openai_llm,
-        backstory=(
-            f"You're a senior technical recruiter and GitHub analyst with expertise in translating GitHub activity into career-relevant achievements. "
-            f"You understand what companies like {company_name} care about and can match a developer's GitHub activity to role-specific requirements."
-        )
-    )
+    if execution_mode == 'dag':
+        # Runs alongside the JD and company tasks, so it reads the raw job description
+        github_context_intro = f"The job description is:\n        ---\n        {job_description}\n        ---\n        Use it to:"
+    else:
+        github_context_intro = "You’ve already reviewed the job description and company profile. Use that context to:"
+    github_analyzer_agent = registry.agent('github_analyzer')
     analyze_github_task = Task(
         description=f"""
-        You are analyzing the GitHub profile provided in the input file to determine how well it aligns with a specific job at **{company_name}**.
-        You’ve already reviewed the job description and company profile. Use that context to:
+        You are analyzing the GitHub profile below to determine how well it aligns with a specific job at **{company_name}**.
+        ---
+        🧑‍💻 GitHub profile:
+        {github_profile}
+        ---
+        {github_context_intro}
         ---
         ### 🔍 Phase 1: Repo Selection
         - Prioritize original repos (exclude forks and tutorials).
@@ -209,30 +327,12 @@ def run_final4_processing(job_description_file, company_file, github_profile_fil
     )
 
     # CV Analyzer Agent & Task
-    cv_analyzer_agent = Agent(
-        role="Resume Intelligence Analyst",
-        goal=f"Analyze the candidate's CV and extract the most relevant projects, skills, and achievements tailored for a role at {company_name}",
-        verbose=True,
-        llm=openai_llm,
-        backstory=(
-            f"You're a senior talent intelligence analyst with deep expertise in matching resumes to job descriptions. "
-            f"You're skilled at parsing resumes to identify impactful achievements and aligning them with specific role requirements. "
-            f"You act like a hiring manager's secret weapon for filtering out top-tier, job-ready candidates."
-        )
-    )
+    cv_analyzer_agent = registry.agent('cv_analyzer')
     cv_analysis_task = Task(
         description=f"""
         You are reviewing a candidate's resume ({candidate_cv_file}) to assess **fit for a job at {company_name}**.
         --- 
-        📝 Job Description Context (from previous analysis):
-        {analyze_jd_task.output}
-        --- 
-        🏢 Company Context (from previous analysis):
-        {extract_employer_data_task.output}
-        --- 
-        🧑‍💻 GitHub Context (from previous analysis):
-        {analyze_github_task.output}
-        --- 
+        {CONTEXT_MARKER}
         📄 Candidate's CV:
         {candidate_cv}
         --- 
@@ -259,19 +359,122 @@ def run_final4_processing(job_description_file, company_file, github_profile_fil
         output_file=cv_output_file
     )
 
-    # Define the Crew
-    job_application_crew = Crew(
-        agents=[jd_analyzer_agent, employer_data_extraction_agent, github_analyzer_agent, cv_analyzer_agent],
-        tasks=[analyze_jd_task, extract_employer_data_task, analyze_github_task, cv_analysis_task],
-        process=Process.sequential,
-        llm=openai_llm
-    )
+    # Wire each task to its declared upstream tasks; tasks without any run
+    # asynchronously so that independent branches execute concurrently
+    if execution_mode not in TASK_DEPENDENCIES:
+        print(f"Error: Unknown execution mode '{execution_mode}'. Use one of {list(TASK_DEPENDENCIES)}.")
+        return None
+    dependencies = TASK_DEPENDENCIES[execution_mode]
+    tasks = {
+        'jd': analyze_jd_task,
+        'company': extract_employer_data_task,
+        'github': analyze_github_task,
+        'cv': cv_analysis_task,
+    }
+    final_key = list(tasks)[-1]
+    for key, task in tasks.items():
+        task.context = [tasks[dep] for dep in dependencies[key]]
+        task.async_execution = execution_mode == 'dag' and not dependencies[key] and key != final_key
+
+    # Look up every task in the stage cache. A task's key covers its prompt,
+    # its agent, the model and the keys of its upstream tasks, so a changed
+    # input invalidates that task and everything downstream of it. The company
+    # profile only comes from the company store (see company_stage_key); when
+    # it has to be researched, the keys of the tasks downstream of it are only
+    # known once it has finished, so those tasks run as well.
+    templates = {key: task.description for key, task in tasks.items()}
+    company_fingerprint = company_prompt_fingerprint()
+    forced = set(tasks) if force is True else set(force or ())
+    stage_keys = {}
+    cached_keys = []
+    unresolved = set()
+    for key, task in tasks.items():
+        stage_keys[key] = stage_key(key, task, [stage_keys[dep] for dep in dependencies[key]])
+        if unresolved.intersection(dependencies[key]):
+            unresolved.add(key)
+            cached = None
+        elif key == 'company':
+            cached = None if key in forced or company_store is None else company_store.get(company_name, job_description, company_fingerprint)
+            if cached is None:
+                unresolved.add(key)
+            else:
+                stage_keys[key] = company_stage_key(stage_keys[key], cached)
+        else:
+            cached = None if key in forced or stage_cache is None else stage_cache.get(stage_keys[key])
+        if cached is not None:
+            # Downstream tasks read their context from task.output, so a cached
+            # task can be dropped from the crew entirely
+            task.output = TaskOutput(description=task.description, raw=cached, agent=task.agent.role)
+            with open(task.output_file, 'w', encoding='utf-8') as file:
+                file.write(cached)
+            cached_keys.append(key)
+    pending = {key: task for key, task in tasks.items() if key not in cached_keys}
+    if cached_keys:
+        print(f"♻️ Reusing cached stage-1 outputs for: {', '.join(cached_keys)}")
+    prompt_assembler = assemble_prompts(tasks, dependencies, pending)
 
-    # Execute the Crew
-    print("\n🚀 Starting Agent Processing Pipeline...")
     try:
-        result = job_application_crew.kickoff()
-        print("\n✅ Agent Processing Pipeline Completed.")
+        start_time = time.perf_counter()
+        if pending:
+            # A crew may not end with more than one async task
+            list(pending.values())[-1].async_execution = False
+
+            # Define the Crew
+            job_application_crew = Crew(
+                agents=[task.agent for task in pending.values()],
+                tasks=list(pending.values()),
+                process=Process.sequential,
+                llm=registry.llm()
+            )
+
+            # Execute the Crew
+            print(f"\n🚀 Starting Agent Processing Pipeline ({execution_mode})...")
+            with tracer.span('final4.kickoff', 'crew', mode=execution_mode) as kickoff_span:
+                result = job_application_crew.kickoff()
+                kickoff_span.add_token_usage(getattr(result, 'token_usage', None))
+            print("\n✅ Agent Processing Pipeline Completed.")
+
+            company_output = extract_employer_data_task.output
+            if company_store is not None and 'company' in pending and company_output is not None:
+                company_store.put(company_name, job_description, company_output.raw, company_fingerprint)
+            if stage_cache is not None:
+                if 'company' in unresolved and company_output is not None and company_output.raw:
+                    for key, task in tasks.items():
+                        if key == 'company':
+                            stage_keys[key] = company_stage_key(stage_keys[key], company_output.raw)
+                        elif key in unresolved:
+                            stage_keys[key] = stage_key(key, task, [stage_keys[dep] for dep in dependencies[key]],
+                                                        description=templates[key])
+                    unresolved.clear()
+                for key, task in pending.items():
+                    if key != 'company' and key not in unresolved and task.output is not None and task.output.raw:
+                        stage_cache.put(stage_keys[key], f"final4:{key}", task.output.raw, model=registry.llm().model)
+        else:
+            result = cv_analysis_task.output.raw
+            print("\n✅ All stage-1 outputs served from the stage cache.")
+        wall_time = time.perf_counter() - start_time
+
+        for key, task in tasks.items():
+            if key in cached_keys:
+                tracer.record(f"final4.{key}", 'task', time.time(), time.time(), cache_hits=1)
+            else:
+                report = prompt_assembler.reports.get(key) or {}
+                tracer.record_task(f"final4.{key}", task, description_tokens=report.get('tokens'))
+
+        durations = {key: task.execution_duration if key in pending else 0.0 for key, task in tasks.items()}
+        path_latency, path = critical_path(dependencies, durations)
+        print("\n⏱️ Stage 1 latency:")
+        for key, duration in durations.items():
+            if key in cached_keys:
+                print(f"- {key}: cached")
+                continue
+            report = prompt_assembler.reports.get(key)
+            tokens = f", {report['tokens']:,} prompt tokens ({report['saved']:,} saved)" if report else ""
+            print(f"- {key}: {duration:.1f}s{tokens}" if duration is not None else f"- {key}: n/a{tokens}")
+        print(f"- critical path ({' -> '.join(path)}): {path_latency:.1f}s, wall time: {wall_time:.1f}s")
+        tokens = prompt_assembler.summary()
+        print(f"- prompt tokens: {tokens['tokens']:,} sent, {tokens['saved']:,} saved "
+              f"({tokens['deduplicated']:,} deduplicated, {tokens['trimmed']:,} trimmed)")
         print("\n📊 Final Result:")
         print(result)
 
@@ -298,6 +501,127 @@ def run_final4_processing(job_description_file, company_file, github_profile_fil
         # print(traceback.format_exc())
         return None
 
+@tracer.traced('final4.prepare_job')
+def prepare_job_artifacts(job_description_file, company_file, execution_mode='sequential', force=False, output_dir='output'):
+    """Runs the job-side stage-1 tasks (JD analysis and company intelligence) on their own.
+
+    The JD analysis is stored under the same stage cache key
+    run_final4_processing computes and the company profile in the company
+    store, so every later run against this job only runs the candidate-side
+    tasks. Used by the batch runner to analyze each job once for all candidates.
+
+    Args:
+        job_description_file (str): Path to the job description text file.
+        company_file (str): Path to the company name text file.
+        execution_mode (str): Execution mode the pairwise runs will use (see TASK_DEPENDENCIES).
+        force (bool): Ignore the stage cache and the company store.
+        output_dir (str): Directory the task outputs are written to.
+
+    Returns:
+        bool: True if both outputs are available afterwards.
+    """
+    if stage_cache is None or company_store is None:
+        print("Error: Job artifacts can only be shared through the stage cache and the company store, one of which is disabled.")
+        return False
+    try:
+        with open(job_description_file, 'r', encoding='utf-8') as file:
+            job_description = file.read()
+        with open(company_file, 'r', encoding='utf-8') as file:
+            company_name = file.read().strip()
+    except FileNotFoundError as e:
+        print(f"Error loading input file: {e}")
+        return False
+    return analyze_job(job_description, company_name, execution_mode, force, output_dir)
+
+def analyze_job(job_description, company_name, execution_mode='sequential', force=False, output_dir='output'):
+    """Runs the JD analysis and the company research for one job, reusing stored outputs.
+
+    The company task gets the same upstream context as in run_final4_processing
+    for the given execution mode, so the stored profile matches the one an
+    inline run would produce.
+
+    Returns:
+        bool: True if both outputs are available afterwards.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    dependencies = TASK_DEPENDENCIES[execution_mode]
+    tasks = {
+        'jd': build_jd_task(job_description, os.path.join(output_dir, 'agent_output__jd.txt')),
+        'company': build_company_task(company_name, job_description, os.path.join(output_dir, 'agent_output_company.txt')),
+    }
+    company_fingerprint = company_prompt_fingerprint()
+    stage_keys = {}
+    pending = {}
+    for key, task in tasks.items():
+        task.context = [tasks[dep] for dep in dependencies[key]]
+        stage_keys[key] = stage_key(key, task, [stage_keys[dep] for dep in dependencies[key]])
+        if force:
+            cached = None
+        elif key == 'company':
+            cached = company_store.get(company_name, job_description, company_fingerprint) if company_store is not None else None
+        else:
+            cached = stage_cache.get(stage_keys[key]) if stage_cache is not None else None
+        if cached is None:
+            pending[key] = task
+        else:
+            task.output = TaskOutput(description=task.description, raw=cached, agent=task.agent.role)
+
+    assemble_prompts(tasks, dependencies, pending)
+    if pending:
+        try:
+            with tracer.span('final4.prepare_job.kickoff', 'crew') as kickoff_span:
+                result = Crew(agents=[task.agent for task in pending.values()], tasks=list(pending.values()),
+                              process=Process.sequential, llm=registry.llm()).kickoff()
+                kickoff_span.add_token_usage(getattr(result, 'token_usage', None))
+        except Exception as e:
+            print(f"❌ An error occurred while analyzing the job at {company_name}: {e}")
+            return False
+    for task in tasks.values():
+        if task.output is None or not task.output.raw:
+            return False
+    if stage_cache is not None and 'jd' in pending:
+        stage_cache.put(stage_keys['jd'], "final4:jd", tasks['jd'].output.raw, model=registry.llm().model)
+    if company_store is not None and 'company' in pending:
+        company_store.put(company_name, job_description, tasks['company'].output.raw, company_fingerprint)
+    return True
+
+def warm_company_store(companies, force=False, execution_mode='sequential'):
+    """Researches companies ahead of time so that later runs read their profile from the company store.
+
+    Each company is researched together with its JD analysis (see analyze_job),
+    which is stage-cached for the later runs as well.
+
+    Args:
+        companies (list): (company_name, job_description_file) pairs.
+        force (bool): Research every company again even if a fresh profile is stored.
+        execution_mode (str): Execution mode the later runs will use (see TASK_DEPENDENCIES).
+
+    Returns:
+        int: Number of companies that were researched (stored profiles are skipped).
+    """
+    if company_store is None:
+        print("Error: The company store is disabled.")
+        return 0
+    researched = 0
+    for company_name, job_description_file in companies:
+        try:
+            with open(job_description_file, 'r', encoding='utf-8') as file:
+                job_description = file.read()
+        except FileNotFoundError as e:
+            print(f"Error loading input file: {e}")
+            continue
+        if not force and company_store.get(company_name, job_description, company_prompt_fingerprint()) is not None:
+            print(f"♻️ Company profile for {company_name} is already stored.")
+            continue
+
+        output_dir = os.path.join('output', 'companies', normalize_company_name(company_name).replace(' ', '_') or 'company')
+        if not analyze_job(job_description, company_name, execution_mode, force, output_dir):
+            print(f"❌ Could not research {company_name}")
+            continue
+        researched += 1
+        print(f"✅ Stored company profile for {company_name}")
+    return researched
+
 # Example usage (optional, for testing the function directly)
 if __name__ == '__main__':
     # Define dummy input file paths for testing
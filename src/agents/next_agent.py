@@ -1,19 +1,64 @@
 import os
+import shutil
+import threading
+import time
 import warnings
-from crewai import Agent, Task, Crew, LLM, Process
-from crewai.knowledge.source.text_file_knowledge_source import TextFileKnowledgeSource
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from crewai import Task, Crew, Process
 from IPython.display import Markdown, display
 import requests
 import re
 from dotenv import load_dotenv
+from utils.stage_cache import StageCache
+from utils.knowledge_index import IndexedTextFileKnowledgeSource, knowledge_index, discard_knowledge_file
+from agents.registry import registry
+from agents.resume_sections import SectionedResume, ResumeRevision, SECTION_NAMES, canonical_section, section_fingerprint
+from agents.ats_evaluation import (ATSEvaluation, SectionFindings, SectionedEvaluation, parse_ats_evaluation, format_ats_report,
+                                   local_ats_evaluation, merge_section_findings)
+from utils.ats_scorer import load_scorer, DEFAULT_KNOWLEDGEBASE_FILE
+from utils.context_retrieval import ContextRetriever, knowledgebase_context, render_context, DEFAULT_TOP_K
+from utils.prompt_assembly import count_tokens
+from utils.tracing import tracer, trace_crewai_llm_calls
 
 load_dotenv()
 
 warnings.filterwarnings("ignore", category=UserWarning)
 from bs4 import BeautifulSoup
 
-# Initialize LLM (can be done inside the function if preferred)
-openai_llm = LLM(model="openai/gpt-4.1")
+trace_crewai_llm_calls(tracer)
+
+# ATS score at which the refinement loop stops early
+DEFAULT_TARGET_SCORE = 90
+
+# Local keyword score below which 'precheck' mode skips the LLM evaluation
+DEFAULT_PRECHECK_FLOOR = 40
+EVALUATORS = ('llm', 'local', 'precheck')
+REVISION_MODES = ('full', 'sections')
+VARIANT_MODES = ('emphasis', 'temperature')
+KNOWLEDGE_MODES = ('files', 'retrieval')
+
+# Stage-1 reports and how retrieved excerpts of them are labelled
+REPORT_LABELS = {
+    'jd_output': 'Job description analysis',
+    'company_output': 'Company intelligence',
+    'github_output': 'GitHub analysis',
+    'cv_output': 'CV analysis',
+}
+
+# What each speculative resume variant after the first one emphasises
+VARIANT_EMPHASES = (
+    "covering the missing keywords from the job description and knowledgebase",
+    "quantified impact and achievements",
+    "the projects and GitHub work most relevant to the role",
+    "concise wording and ATS-friendly formatting",
+)
+
+# Sampling temperature of the resume builder for each variant after the first one in 'temperature' mode
+VARIANT_TEMPERATURES = (0.2, 0.7, 1.2)
+
+# Content-addressed cache of merged knowledge files; set to None to always re-merge
+stage_cache = StageCache()
 
 # Merge text files utility
 def merge_text_files(file_list, output_file):
@@ -41,7 +86,13 @@ def merge_text_files(file_list, output_file):
         print(f"Error merging files: {e}")
         return False
 
-def run_next_agent_processing(final4_output_paths, knowledgebase_file="knowledgebase.txt", max_iterations=3):
+@tracer.traced('next_agent')
+def run_next_agent_processing(final4_output_paths, knowledgebase_file="knowledgebase.txt", max_iterations=3, force=False, output_dir='output',
+                              target_score=DEFAULT_TARGET_SCORE, min_improvement=1, time_budget=None, token_budget=None,
+                              evaluator='llm', precheck_floor=DEFAULT_PRECHECK_FLOOR, revision_mode='full',
+                              variants=1, variant_concurrency=None, variant_token_cap=None, variant_mode='emphasis',
+                              section_evaluation=False,
+                              knowledge_mode='files', top_k=DEFAULT_TOP_K):
     """Runs the resume building and evaluation agent loop.
 
     Args:
@@ -49,15 +100,59 @@ def run_next_agent_processing(final4_output_paths, knowledgebase_file="knowledge
                                     Expected keys: 'jd_output', 'company_output', 'github_output', 'cv_output'.
         knowledgebase_file (str): Path to the general knowledgebase file.
         max_iterations (int): Maximum number of refinement iterations.
+        force (bool): Ignore the stage cache and rebuild the merged knowledge file.
+        output_dir (str): Directory the resume drafts and the final ATS report are written to.
+        target_score (int): Stop as soon as a draft scores at least this much.
+        min_improvement (int): Stop when a round improves the best score by less than this.
+        time_budget (float, optional): Stop once the loop has run this many seconds.
+        token_budget (int, optional): Stop once the crews have used this many tokens.
+        evaluator (str): 'llm' evaluates every draft with the ATS agent, 'local'
+            scores drafts against the knowledgebase keyword tables without an LLM
+            call, and 'precheck' scores locally first and only asks the ATS agent
+            once a draft reaches precheck_floor.
+        precheck_floor (int): Local score a draft needs before the ATS agent sees it in 'precheck' mode.
+        revision_mode (str): 'full' regenerates the whole resume every iteration;
+            'sections' has the builder return edits for only the sections the
+            ATS feedback concerns after the first draft, and carries the other
+            sections over verbatim.
+        variants (int): Resume variants drafted and scored concurrently per
+            round, each with a different emphasis; only the best-scoring one
+            and its feedback are carried forward.
+        variant_concurrency (int, optional): Variants running at the same time (default: all of them).
+        variant_token_cap (int, optional): Once the run has used this many tokens,
+            variants not yet started are skipped and later rounds draft a
+            single resume.
+        variant_mode (str): How variants after the first one differ: 'emphasis'
+            asks the builder to emphasise a different aspect (VARIANT_EMPHASES),
+            'temperature' samples the builder at a different temperature
+            (VARIANT_TEMPERATURES) with the same prompt.
+        section_evaluation (bool): Have the ATS agent judge the resume section by
+            section, cache its findings by section fingerprint and send only the
+            sections that changed since they were last judged; the report is
+            merged locally.
+        knowledge_mode (str): 'files' attaches the merged reports and the whole
+            knowledgebase to both agents as knowledge sources; 'retrieval'
+            classifies the job into a knowledgebase category and puts only
+            that category's keyword tables and the top_k report chunks most
+            relevant to each task into the task description.
+        top_k (int): Report chunks retrieved per task in 'retrieval' mode.
+
+    The loop stops after max_iterations rounds or on the first of the
+    conditions above; the reason is recorded in the final ATS report.
 
     Returns:
-        str: Path to the final generated resume text file, or None if an error occurs.
+        str: Path to the best-scoring resume text file, or None if an error occurs.
     """
     current_dir = os.path.dirname(os.path.abspath(__file__))
     knowledge_dir = os.path.join(current_dir, '..', 'knowledge')
     os.makedirs(knowledge_dir, exist_ok=True)
 
-    merged_output_file = os.path.join(knowledge_dir, 'merged_output.txt')
+    # Runs writing elsewhere than the default output directory (e.g. batch runs)
+    # get their own merged file so that concurrent runs do not overwrite each other
+    merged_output_name = 'merged_output.txt'
+    if os.path.normpath(output_dir) != 'output':
+        merged_output_name = f"merged_output_{os.path.basename(os.path.normpath(output_dir))}.txt"
+    merged_output_file = os.path.join(knowledge_dir, merged_output_name)
     knowledgebase_path = os.path.join(knowledge_dir, knowledgebase_file)
     final_resume_file = None # Initialize
 
@@ -75,71 +170,141 @@ def run_next_agent_processing(final4_output_paths, knowledgebase_file="knowledge
         print("Error: No valid input files provided from final4 processing.")
         return None
 
-    if not merge_text_files(input_files_to_merge, merged_output_file):
-        print("Error: Failed to merge input files.")
+    # The merged file only depends on the exact bytes of its inputs
+    merge_key = StageCache.key_for('merged_knowledge', inputs=[StageCache.file_digest(f) for f in input_files_to_merge])
+    merged_content = None if force or stage_cache is None else stage_cache.get(merge_key)
+    if merged_content is not None:
+        with open(merged_output_file, 'w', encoding='utf-8') as outfile:
+            outfile.write(merged_content)
+        print(f"♻️ Reusing cached merged knowledge file '{merged_output_file}'")
+    else:
+        if not merge_text_files(input_files_to_merge, merged_output_file):
+            print("Error: Failed to merge input files.")
+            return None
+        if stage_cache is not None:
+            with open(merged_output_file, 'r', encoding='utf-8') as infile:
+                stage_cache.put(merge_key, 'merged_knowledge', infile.read())
+
+    if evaluator not in EVALUATORS:
+        print(f"Error: Unknown evaluator '{evaluator}', use one of {', '.join(EVALUATORS)}")
         return None
+    if revision_mode not in REVISION_MODES:
+        print(f"Error: Unknown revision mode '{revision_mode}', use one of {', '.join(REVISION_MODES)}")
+        return None
+    if knowledge_mode not in KNOWLEDGE_MODES:
+        print(f"Error: Unknown knowledge mode '{knowledge_mode}', use one of {', '.join(KNOWLEDGE_MODES)}")
+        return None
+    if variant_mode not in VARIANT_MODES:
+        print(f"Error: Unknown variant mode '{variant_mode}', use one of {', '.join(VARIANT_MODES)}")
+        return None
+
+    # The job's knowledgebase category drives local scoring and context retrieval
+    scorer = category = job_scorer = None
+    scorer_file = knowledgebase_path if os.path.exists(knowledgebase_path) else DEFAULT_KNOWLEDGEBASE_FILE
+    if evaluator != 'llm' or knowledge_mode == 'retrieval':
+        try:
+            job_scorer = load_scorer(scorer_file)
+            with open(input_files_to_merge[0], 'r', encoding='utf-8') as f:
+                category = job_scorer.classify(f.read())
+        except Exception as e:
+            print(f"Warning: Knowledgebase categories unavailable ({e}), using the LLM evaluator and whole-file knowledge")
+            evaluator, knowledge_mode = 'llm', 'files'
+    if evaluator != 'llm':
+        # Local scorer, scoring drafts against the knowledgebase category of the job
+        scorer = job_scorer
+        print(f"🧮 Local ATS scoring against '{category}' ({evaluator} mode)")
 
     # --- 2. Setup Knowledge Sources ---
-    # Use relative paths as crewai's TextFileKnowledgeSource defaults to the 'knowledge' directory
-    knowledge_files_relative = ['merged_output.txt']
-    if os.path.exists(knowledgebase_path):
-        knowledge_files_relative.append(knowledgebase_file)
+    retriever = None
+    category_terms = ''
+    if knowledge_mode == 'retrieval':
+        # The agents get no knowledge sources; every task description carries the
+        # job category's keyword tables and the report chunks relevant to that task
+        reports = []
+        for key, label in REPORT_LABELS.items():
+            report_file = final4_output_paths.get(key)
+            if report_file and os.path.exists(report_file):
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    reports.append((label, f.read()))
+        with open(scorer_file, 'r', encoding='utf-8') as f:
+            knowledgebase_text = f.read()
+        knowledge_context = knowledgebase_context(knowledgebase_text, category)
+        retriever = ContextRetriever(reports)
+        category_terms = ' '.join(keyword for tier in ('top', 'medium') for keyword in job_scorer.categories[category].get(tier, []))
+        full_knowledge_tokens = retriever.total_tokens + count_tokens(knowledgebase_text)
+        print(f"🔎 Retrieval context for '{category}': {len(retriever.chunks)} report chunks, top {top_k} per task")
+        knowledge_files = []
     else:
-        print(f"Warning: Knowledgebase file not found at {knowledgebase_path}")
+        # Absolute Paths: crewai resolves plain file names against <cwd>/knowledge,
+        # which is not this directory unless the app is started from src/.
+        # The indexed source embeds the static knowledgebase once and re-embeds only
+        # the chunks of the merged file that changed since it was last indexed
+        knowledge_files = [Path(merged_output_file).resolve()]
+        if os.path.exists(knowledgebase_path):
+            knowledge_files.append(Path(knowledgebase_path).resolve())
+        else:
+            print(f"Warning: Knowledgebase file not found at {knowledgebase_path}")
+
+    used_sources = []
+
+    def make_knowledge_sources():
+        # A source remembers the storage of the agent that last added it, so
+        # concurrent variant threads each need their own instances
+        sources = [IndexedTextFileKnowledgeSource(file_paths=knowledge_files)] if knowledge_files else []
+        used_sources.extend(sources)
+        return sources
 
     try:
-        text_knowledge = TextFileKnowledgeSource(file_paths=knowledge_files_relative)
+        knowledge_sources = make_knowledge_sources()
     except Exception as e:
         print(f"Error initializing knowledge source: {e}")
         return None
 
-    # --- 3. Define Agents --- 
-    resume_builder_agent = Agent(
-        role="Senior Resume Builder and Career Strategist",
-        goal="Create and refine a resume that is ATS-optimized and aligned with job, company, and technical profile based on provided context.",
-        backstory="You're a resume writing expert who knows exactly how to tailor resumes for ATS systems, tech recruiters, and modern roles using the merged context and knowledgebase.",
-        llm=openai_llm,
-        verbose=True,
-        knowledge_sources=[text_knowledge]
-    )
-
-    ats_agent = Agent(
-        role="ATS Resume Evaluator",
-        goal="Evaluate the resume for keyword relevance, technical alignment, formatting, and ATS compatibility based on the provided context. Give feedback to improve it.",
-        backstory="You're a top-tier ATS and HR screening specialist who helps candidates refine resumes to perfection based on real hiring systems and the provided context.",
-        llm=openai_llm,
-        verbose=True,
-        knowledge_sources=[text_knowledge]
-    )
-
-    # --- 4. Define Tasks (dynamically inside the loop) --- 
-    def build_resume_task(resume_draft="", iteration=1, ats_feedback=""):
-        output_filename = os.path.join('output', f'agent_resume_iter_{iteration}.txt')
-        return Task(
-            description=f"""
+    def with_context(description, task_name, query):
+        """Appends the context retrieved for a task to its description in retrieval mode."""
+        if retriever is None:
+            return description
+        chunks = retriever.select(f"{category_terms} {query}", top_k)
+        context = render_context(knowledge_context, category, chunks)
+        print(f"🔎 {task_name}: {len(chunks)} of {len(retriever.chunks)} report chunks, "
+              f"{count_tokens(context):,} context tokens instead of {full_knowledge_tokens:,}")
+        return f"{description}\n--- Retrieved Context ---\n{context}\n--- End Retrieved Context ---\n"
+
+    # --- 3. Warm Agents and Crews --- 
+    # Agents are built once per process (per worker thread); only their knowledge
+    # changes per request. One build, one revision and one evaluation task are
+    # updated in place every iteration, so each crew is constructed once per run
+    # (and once per variant worker thread) instead of once per iteration
+    def build_resume_description(iteration=1, ats_feedback="", emphasis=None):
+        return f"""
             Using the merged context (job description, company info, GitHub analysis, CV analysis) and the knowledgebase, generate a tailored resume draft.
             If previous ATS feedback is provided below, incorporate it to improve the resume:
             --- ATS Feedback ---
             {ats_feedback if ats_feedback else 'No feedback yet.'}
             --- End Feedback ---
+            {f'Give this draft particular emphasis on {emphasis}.' if emphasis else ''}
             Generate iteration {iteration} of the resume.
-            """,
-            expected_output="A full resume in plain text following modern formatting. Include Summary, Skills, Projects, Work Experience, Education. Ensure it's well-structured and uses keywords from the context.",
-            agent=resume_builder_agent,
-            output_file=output_filename
-        )
+            """
 
-    def evaluate_resume_task(resume_file_path):
-        if not os.path.exists(resume_file_path):
-             return Task(description="Resume file not found, cannot evaluate.", expected_output="Error message.", agent=ats_agent) # Dummy task
-        try:
-            with open(resume_file_path, 'r', encoding='utf-8') as f:
-                resume_text = f.read()
-        except Exception as e:
-             return Task(description=f"Error reading resume file {resume_file_path}: {e}", expected_output="Error message.", agent=ats_agent) # Dummy task
+    def revise_resume_description(resume, ats_feedback, emphasis=None):
+        sections = '\n\n'.join(f"--- {name} ---\n{resume.get(name).strip()}" for name in resume.names)
+        return f"""
+            Revise the resume below using the ATS feedback and the merged context and knowledgebase.
+            Only change the sections the feedback requires changing ({', '.join(SECTION_NAMES)}).
+            For every section you change, return an edit with the complete new text of that section, without its heading.
+            Do not return edits for sections that need no change; they are kept exactly as they are.
+            {f'Give this revision particular emphasis on {emphasis}.' if emphasis else ''}
+            --- ATS Feedback ---
+            {ats_feedback}
+            --- End Feedback ---
 
-        return Task(
-            description=f"""
+            --- Current Resume Sections ---
+            {sections}
+            --- End Resume Sections ---
+            """
+
+    def evaluate_resume_description(resume_file_path, resume_text):
+        return f"""
             Evaluate the following resume text (from {os.path.basename(resume_file_path)}) against ATS standards and the job/company requirements found in the merged context and knowledgebase:
             --- Resume Text ---
             {resume_text}
@@ -147,95 +312,399 @@ def run_next_agent_processing(final4_output_paths, knowledgebase_file="knowledge
 
             Provide:
             1. An estimated ATS Score (0-100).
-            2. Key missing keywords compared to the context.
+            2. The keywords from the context the resume already contains, and the key missing ones.
             3. Specific suggestions for improving skills, formatting, or content alignment.
             4. An overall verdict on its readiness.
-            """,
+            """
+
+    def evaluate_sections_description(resume, names):
+        sections = '\n\n'.join(f"--- {name} ---\n{resume.get(name).strip()}" for name in names)
+        others = [name for name in resume.names if name not in names]
+        return f"""
+            Evaluate the following resume sections against ATS standards and the job/company requirements found in the merged context and knowledgebase.
+            The resume also has these sections, which are evaluated separately: {', '.join(others) or 'none'}.
+            For every section below, provide its own findings:
+            1. An estimated ATS score (0-100) for how well the section serves the target role.
+            2. The keywords from the context the section contains, and the key ones it misses.
+            3. Specific suggestions for improving the section.
+            --- Resume Sections ---
+            {sections}
+            --- End Resume Sections ---
+            """
+
+    def make_crews(sources):
+        """Builds the build, revision and evaluation tasks and crews around the calling thread's agents."""
+        resume_builder_agent = registry.agent('resume_builder', knowledge_sources=sources)
+        ats_agent = registry.agent('ats_evaluator', knowledge_sources=sources)
+        resume_task = Task(
+            description=build_resume_description(),
+            expected_output="A full resume in plain text following modern formatting. Include Summary, Skills, Projects, Work Experience, Education. Ensure it's well-structured and uses keywords from the context.",
+            agent=resume_builder_agent,
+            output_file=os.path.join(output_dir, 'agent_resume_iter_1.txt')
+        )
+        eval_task = Task(
+            description=evaluate_resume_description('resume.txt', ''),
             expected_output="""
-            ATS Score Report including:
-            - Score (e.g., 75/100)
-            - Keyword analysis (matched vs. missing)
-            - Actionable suggestions for improvement
-            - Final summary verdict (e.g., 'Needs significant revision', 'Good start, minor tweaks needed', 'Excellent fit')
-            """,
-            agent=ats_agent
+                ATS Score Report including:
+                - Score (e.g., 75/100)
+                - Keyword analysis (matched vs. missing)
+                - Actionable suggestions for improvement
+                - Final summary verdict (e.g., 'Needs significant revision', 'Good start, minor tweaks needed', 'Excellent fit')
+                """,
+            agent=ats_agent,
+            output_pydantic=ATSEvaluation
             # No output file for evaluation, result is captured in kickoff() output
         )
+        section_eval_task = Task(
+            description=evaluate_sections_description(SectionedResume('', []), []),
+            expected_output="ATS findings for each listed section: score, matched and missing keywords, and suggestions.",
+            agent=ats_agent,
+            output_pydantic=SectionedEvaluation
+        )
+        revise_task = Task(
+            description=revise_resume_description(SectionedResume('', []), ''),
+            expected_output="Edits for only the resume sections the feedback requires changing, each with the section name and its complete new text.",
+            agent=resume_builder_agent,
+            output_pydantic=ResumeRevision
+        )
+        return {
+            'resume_task': resume_task,
+            'eval_task': eval_task,
+            'revise_task': revise_task,
+            'section_eval_task': section_eval_task,
+            'build_crew': Crew(agents=[resume_builder_agent], tasks=[resume_task], process=Process.sequential,
+                               llm=registry.llm()), # Can use a different LLM if needed
+            'evaluate_crew': Crew(agents=[ats_agent], tasks=[eval_task], process=Process.sequential,
+                                  llm=registry.llm()),
+            'revise_crew': Crew(agents=[resume_builder_agent], tasks=[revise_task], process=Process.sequential,
+                                llm=registry.llm()),
+            'section_evaluate_crew': Crew(agents=[ats_agent], tasks=[section_eval_task], process=Process.sequential,
+                                          llm=registry.llm()),
+        }
+
+    # Findings are only valid for the job and context they were produced for
+    section_cache_stats = {'hits': 0, 'misses': 0}
+    section_cache_lock = threading.Lock()
+
+    def section_key(name, body):
+        return StageCache.key_for('section_evaluation', section=section_fingerprint(name, body), context=merge_key,
+                                  model=registry.llm().model)
+
+    def evaluate_sections(i, label, crews, resume_text):
+        """Evaluates a draft section by section, reusing the cached findings of unchanged sections.
+
+        Returns the merged evaluation (None if the draft has to be evaluated
+        as a whole instead) and the tokens used.
+        """
+        resume = SectionedResume.parse(resume_text)
+        if len(resume.names) < 2:
+            return None, 0
+        findings, cached = {}, []
+        for name in resume.names:
+            stored = stage_cache.get(section_key(name, resume.get(name))) if stage_cache is not None and not force else None
+            if stored is not None:
+                findings[name] = SectionFindings.model_validate_json(stored)
+                cached.append(name)
+        changed = [name for name in resume.names if name not in findings]
+        with section_cache_lock:
+            section_cache_stats['hits'] += len(cached)
+            section_cache_stats['misses'] += len(changed)
+        print(f"🧩 Section evaluation ({label}): {len(cached)} unchanged section(s) reused, evaluating {', '.join(changed) or 'none'}")
+
+        tokens = 0
+        if changed:
+            crews['section_eval_task'].description = with_context(evaluate_sections_description(resume, changed),
+                                                                  f"Section evaluation ({label})",
+                                                                  ' '.join(resume.get(name) for name in changed))
+            with tracer.span('next_agent.evaluate_sections', 'crew', iteration=i, sections=len(changed)) as eval_span:
+                eval_result = crews['section_evaluate_crew'].kickoff()
+                eval_span.add_token_usage(getattr(eval_result, 'token_usage', None))
+            tracer.record_task('next_agent.evaluate_sections', crews['section_eval_task'], iteration=i)
+            tokens = getattr(getattr(eval_result, 'token_usage', None), 'total_tokens', 0) or 0
+            sectioned = getattr(eval_result, 'pydantic', None)
+            if not isinstance(sectioned, SectionedEvaluation):
+                print("Section evaluation returned no structured findings, evaluating the resume as a whole")
+                return None, tokens
+            for section in sectioned.sections:
+                name = canonical_section(section.section)
+                if name in changed and name not in findings:
+                    findings[name] = section
+                    if stage_cache is not None:
+                        stage_cache.put(section_key(name, resume.get(name)), 'section_evaluation', section.model_dump_json(),
+                                        section=name)
+            if any(name not in findings for name in changed):
+                print("Section evaluation skipped some sections, evaluating the resume as a whole")
+                return None, tokens
+        ordered = {name: findings[name] for name in resume.names}
+        return merge_section_findings(ordered, cached), tokens
+
+    def revise_resume(crews, previous_file, ats_feedback, output_file, emphasis=None):
+        """Applies the builder's section edits to the previous draft and writes the result to output_file.
+
+        Returns the names of the changed sections (None if the draft has to be
+        regenerated in full instead) and the crew output.
+        """
+        with open(previous_file, 'r', encoding='utf-8') as f:
+            resume = SectionedResume.parse(f.read())
+        if len(resume.names) < 2:
+            print("Previous draft has no recognisable sections, regenerating the resume in full")
+            return None, None
+        crews['revise_task'].description = with_context(revise_resume_description(resume, ats_feedback, emphasis),
+                                                        "Resume revision", ats_feedback)
+        revise_result = crews['revise_crew'].kickoff()
+        revision = getattr(revise_result, 'pydantic', None)
+        if not isinstance(revision, ResumeRevision):
+            print("Revision returned no section edits, regenerating the resume in full")
+            return None, revise_result
+        changed = resume.apply(revision)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(resume.render())
+        return changed, revise_result
+
+    def draft_resume(i, label, crews, output_file, ats_feedback, previous_file=None, emphasis=None):
+        """Writes a resume draft to output_file, revising previous_file section by section if given.
+
+        Returns the tokens used; raises if no draft was written.
+        """
+        tokens = 0
+        changed_sections = None
+        if previous_file:
+            with tracer.span('next_agent.revise', 'crew', iteration=i) as revise_span:
+                changed_sections, revise_result = revise_resume(crews, previous_file, ats_feedback, output_file, emphasis)
+                revise_span.add_token_usage(getattr(revise_result, 'token_usage', None))
+            tracer.record_task('next_agent.revise_resume', crews['revise_task'], iteration=i)
+            tokens += getattr(getattr(revise_result, 'token_usage', None), 'total_tokens', 0) or 0
+        if changed_sections is not None:
+            print(f"✂️ Revised sections ({label}): {', '.join(changed_sections) or 'none'}; the others were carried over verbatim")
+        else:
+            crews['resume_task'].description = with_context(build_resume_description(iteration=i, ats_feedback=ats_feedback, emphasis=emphasis),
+                                                            f"Resume build ({label})", ats_feedback)
+            crews['resume_task'].output_file = output_file
+            with tracer.span('next_agent.build', 'crew', iteration=i) as build_span:
+                build_result = crews['build_crew'].kickoff()
+                build_span.add_token_usage(getattr(build_result, 'token_usage', None))
+            tracer.record_task('next_agent.build_resume', crews['resume_task'], iteration=i)
+            tokens += getattr(getattr(build_result, 'token_usage', None), 'total_tokens', 0) or 0
+            print(f"Resume Build ({label}) Result: {build_result}")
+        if not os.path.exists(output_file):
+            raise RuntimeError(f"Resume file {output_file} was not generated")
+        return tokens
+
+    def evaluate_draft(i, label, crews, resume_file):
+        """Scores a draft.
+
+        Returns the evaluation (None if the draft could not be scored), the
+        feedback for the next round and the tokens used.
+        """
+        # The evaluation task reads the resume the build task just wrote
+        try:
+            with open(resume_file, 'r', encoding='utf-8') as f:
+                resume_text = f.read()
+        except Exception as e:
+            print(f"Skipping evaluation for {label} due to resume file issue: {e}")
+            return None, "Error: Could not read or find resume file for evaluation.", 0
+
+        local_result = None
+        if scorer is not None:
+            with tracer.span('next_agent.local_score', iteration=i):
+                local_result = scorer.score(resume_text, category)
+            print(f"🧮 Local ATS score ({label}): {local_result['score']}/100")
+        if local_result is not None and (evaluator == 'local' or local_result['score'] < precheck_floor):
+            evaluation = local_ats_evaluation(local_result)
+            feedback = format_ats_report(evaluation)
+            print(f"\n📊 Local ATS Evaluation ({label}):\n{feedback}")
+            return evaluation, feedback, 0
+
+        section_tokens = 0
+        if section_evaluation:
+            try:
+                evaluation, section_tokens = evaluate_sections(i, label, crews, resume_text)
+            except Exception as e:
+                print(f"Error during section evaluation ({label}): {e}")
+                evaluation = None
+            if evaluation is not None:
+                feedback = format_ats_report(evaluation)
+                print(f"\n📊 ATS Evaluation ({label}):\n{feedback}")
+                return evaluation, feedback, section_tokens
+
+        crews['eval_task'].description = with_context(evaluate_resume_description(resume_file, resume_text),
+                                                      f"Evaluation ({label})", resume_text)
+        try:
+            with tracer.span('next_agent.evaluate', 'crew', iteration=i) as eval_span:
+                eval_result = crews['evaluate_crew'].kickoff()
+                eval_span.add_token_usage(getattr(eval_result, 'token_usage', None))
+            tracer.record_task('next_agent.evaluate_resume', crews['eval_task'], iteration=i)
+            tokens = section_tokens + (getattr(getattr(eval_result, 'token_usage', None), 'total_tokens', 0) or 0)
+            evaluation = parse_ats_evaluation(eval_result)
+            if evaluation is not None:
+                feedback = format_ats_report(evaluation)
+            else:
+                feedback = eval_result.raw if eval_result else "Evaluation failed to produce output."
+            print(f"\n📊 ATS Evaluation ({label}):\n{feedback}")
+            return evaluation, feedback, tokens
+        except Exception as e:
+            print(f"Error during resume evaluation ({label}): {e}")
+            return None, f"Error during evaluation: {e}", section_tokens # Pass error info potentially
+
+    def section_cache_summary():
+        lookups = section_cache_stats['hits'] + section_cache_stats['misses']
+        rate = 100 * section_cache_stats['hits'] / lookups if lookups else 0
+        return f"{section_cache_stats['hits']} of {lookups} sections reused ({rate:.0f}% hit rate)"
+
+    crews = make_crews(knowledge_sources)
+
+    # --- 4. Speculative Variants ---
+    # With variants > 1 every round drafts and scores that many resumes at the
+    # same time, each with a different emphasis, and carries only the best one
+    # forward. Every worker thread has its own agents and crews.
+    variant_pool = None
+    variant_local = threading.local()
+    variant_spend = {'tokens': 0}
+    variant_lock = threading.Lock()
+    if variants > 1:
+        variant_pool = ThreadPoolExecutor(max_workers=min(variant_concurrency or variants, variants),
+                                          thread_name_prefix='resume-variant')
+
+    def variant_budget_left():
+        return variant_token_cap is None or variant_spend['tokens'] < variant_token_cap
+
+    def run_variant(i, k, ats_feedback, previous_file):
+        """Drafts and scores variant k of round i; returns None if the cost cap was reached before it started."""
+        if not variant_budget_left():
+            print(f"💸 Skipping variant {k} of iteration {i}: variant token cap of {variant_token_cap} reached")
+            return None
+        if not hasattr(variant_local, 'crews'):
+            variant_local.crews = make_crews(make_knowledge_sources())
+        label = f"Iteration {i}, variant {k}"
+        emphasis = temperature = None
+        if k > 1 and variant_mode == 'emphasis':
+            emphasis = VARIANT_EMPHASES[(k - 2) % len(VARIANT_EMPHASES)]
+        elif k > 1:
+            temperature = VARIANT_TEMPERATURES[(k - 2) % len(VARIANT_TEMPERATURES)]
+        # Only the builder samples differently; every variant is scored the same way
+        registry.agent('resume_builder').llm = registry.llm(temperature=temperature)
+        output_file = os.path.join(output_dir, f'agent_resume_iter_{i}_v{k}.txt')
+        result = {'variant': k, 'file': output_file, 'evaluation': None, 'feedback': '', 'tokens': 0}
+        with tracer.span('next_agent.variant', iteration=i, variant=k):
+            try:
+                result['tokens'] += draft_resume(i, label, variant_local.crews, output_file, ats_feedback, previous_file, emphasis)
+            except Exception as e:
+                print(f"Error during resume building ({label}): {e}")
+                result['error'] = str(e)
+            else:
+                result['evaluation'], result['feedback'], eval_tokens = evaluate_draft(i, label, variant_local.crews, output_file)
+                result['tokens'] += eval_tokens
+        with variant_lock:
+            variant_spend['tokens'] += result['tokens']
+        return result
 
     # --- 5. Run Iterative Refinement Crew --- 
     ats_feedback = "" # Start with no feedback
     current_resume_file = "" 
+    best_resume_file = None
+    best_score = None
+    best_feedback = ""
+    score_history = []
+    stop_reason = "max_iterations"
+    tokens_used = 0
+    evaluation = None
+    loop_start = time.perf_counter()
 
     for i in range(1, max_iterations + 1):
         print(f"\n🔁 Iteration {i} of {max_iterations} - Refining Resume...")
-        
-        # Create tasks for this iteration
-        resume_task = build_resume_task(resume_draft=ats_feedback, iteration=i, ats_feedback=ats_feedback)
-        # Evaluation task needs the *output* of the resume task
-        # We'll run resume task first, then create and run eval task
-
-        # Crew for building the resume
-        build_crew = Crew(
-            agents=[resume_builder_agent],
-            tasks=[resume_task],
-            process=Process.sequential,
-            llm=openai_llm, # Can use a different LLM if needed
-            # planning=False # Keep it simple for sequential
-        )
-        
-        try:
-            build_result = build_crew.kickoff()
-            print(f"Resume Build (Iteration {i}) Result: {build_result}")
-            current_resume_file = resume_task.output_file # Get the actual output file path
-            if not os.path.exists(current_resume_file):
-                 print(f"Error: Resume file {current_resume_file} was not generated in iteration {i}.")
-                 break # Exit loop if resume generation failed
-            print(f"✅ Resume v{i} saved to: {current_resume_file}")
-            final_resume_file = current_resume_file # Update final resume path each iteration
+        iteration_file = os.path.join(output_dir, f'agent_resume_iter_{i}.txt')
+        # In section mode, drafts after the first one revise the previous draft
+        previous_file = current_resume_file if revision_mode == 'sections' and evaluation is not None else None
 
-        except Exception as e:
-            print(f"Error during resume building (Iteration {i}): {e}")
-            break # Exit loop on error
-
-        # Crew for evaluating the generated resume
-        eval_task = evaluate_resume_task(resume_file_path=current_resume_file)
-        
-        # Check if eval_task is valid (not a dummy error task)
-        if "Resume file not found" in eval_task.description or "Error reading resume file" in eval_task.description:
-            print(f"Skipping evaluation for iteration {i} due to resume file issue.")
-            ats_feedback = "Error: Could not read or find resume file for evaluation."
-            continue # Proceed to next iteration or finish
-            
-        evaluate_crew = Crew(
-            agents=[ats_agent],
-            tasks=[eval_task],
-            process=Process.sequential,
-            llm=openai_llm, # Can use a different LLM if needed
-            # planning=False
-        )
+        variant_spend['tokens'] = tokens_used
+        if variant_pool is not None and variant_budget_left():
+            futures = [variant_pool.submit(run_variant, i, k, ats_feedback, previous_file) for k in range(1, variants + 1)]
+            results = [future.result() for future in futures]
+            results = [result for result in results if result is not None]
+            tokens_used += sum(result['tokens'] for result in results)
+            drafted = [result for result in results if 'error' not in result]
+            if not drafted:
+                print(f"Error: No resume variant was generated in iteration {i}.")
+                stop_reason = "build_failed"
+                break
+            best = max(drafted, key=lambda result: result['evaluation'].score if result['evaluation'] else -1)
+            scores = ', '.join(f"v{result['variant']}: {result['evaluation'].score if result['evaluation'] else 'n/a'}" for result in results)
+            print(f"🏁 Variant scores (Iteration {i}): {scores}; carrying v{best['variant']} forward")
+            shutil.copyfile(best['file'], iteration_file)
+            current_resume_file = iteration_file
+            evaluation, ats_feedback = best['evaluation'], best['feedback']
+        else:
+            label = f"Iteration {i}"
+            try:
+                tokens_used += draft_resume(i, label, crews, iteration_file, ats_feedback, previous_file)
+            except Exception as e:
+                print(f"Error during resume building ({label}): {e}")
+                stop_reason = "build_failed"
+                break # Exit loop on error
+            current_resume_file = iteration_file
+            evaluation, ats_feedback, eval_tokens = evaluate_draft(i, label, crews, current_resume_file)
+            tokens_used += eval_tokens
+        print(f"✅ Resume v{i} saved to: {current_resume_file}")
+        final_resume_file = current_resume_file # Update final resume path each iteration
 
+        # --- 6. Early Stopping --- 
+        # The best-scoring draft is kept, so a round that scores lower than an
+        # earlier one ends the loop without replacing the earlier draft
+        improved = False
+        if evaluation is not None:
+            score_history.append((i, evaluation.score))
+            improved = best_score is None or evaluation.score >= best_score + min_improvement
+            if best_score is None or evaluation.score > best_score:
+                best_score, best_resume_file, best_feedback = evaluation.score, current_resume_file, ats_feedback
+        if best_score is not None and best_score >= target_score:
+            stop_reason = "target_score"
+        elif evaluation is not None and i > 1 and not improved:
+            stop_reason = "no_improvement"
+        elif time_budget is not None and time.perf_counter() - loop_start >= time_budget:
+            stop_reason = "time_budget"
+        elif token_budget is not None and tokens_used >= token_budget:
+            stop_reason = "token_budget"
+        else:
+            continue
+        if i < max_iterations:
+            print(f"⏹️ Stopping early after iteration {i}: {stop_reason}")
+        break
+
+    if variant_pool is not None:
+        variant_pool.shutdown()
+    if merged_output_name != 'merged_output.txt':
+        # Nothing reads a per-run merged file again: drop its chunks so the knowledge
+        # collections do not grow with every batch pair or serve them to later runs
         try:
-            eval_result = evaluate_crew.kickoff()
-            ats_feedback = eval_result.raw if eval_result else "Evaluation failed to produce output."
-            print(f"\n📊 ATS Evaluation (Iteration {i}):\n{ats_feedback}")
-            
-            # Save final ATS report only after the last iteration
-            if i == max_iterations:
-                ats_report_path = os.path.join('output', "ats_final_report.txt")
-                try:
-                    with open(ats_report_path, "w", encoding="utf-8") as report:
-                        report.write(ats_feedback)
-                    print(f"📄 Final ATS report saved to: {ats_report_path}")
-                except Exception as e:
-                    print(f"Error saving final ATS report: {e}")
+            discard_knowledge_file(merged_output_file, used_sources)
+            os.remove(merged_output_file)
+        except Exception as e:
+            print(f"Warning: Could not discard the knowledge of '{merged_output_file}': {e}")
+    if best_resume_file:
+        final_resume_file = best_resume_file
 
+    # Save the final ATS report, recording why the loop stopped
+    if best_feedback or ats_feedback:
+        ats_report_path = os.path.join(output_dir, "ats_final_report.txt")
+        history = ', '.join(f"iteration {iteration}: {score}/100" for iteration, score in score_history) or 'n/a'
+        try:
+            with open(ats_report_path, "w", encoding="utf-8") as report:
+                report.write(best_feedback or ats_feedback)
+                report.write(f"\n\n---\nStop reason: {stop_reason}\n")
+                report.write(f"Score history: {history}\n")
+                report.write(f"Final resume: {final_resume_file}\n")
+                report.write(f"Tokens used: {tokens_used}, elapsed: {time.perf_counter() - loop_start:.1f}s\n")
+                if section_evaluation:
+                    report.write(f"Section evaluation cache: {section_cache_summary()}\n")
+            print(f"📄 Final ATS report saved to: {ats_report_path}")
         except Exception as e:
-            print(f"Error during resume evaluation (Iteration {i}): {e}")
-            ats_feedback = f"Error during evaluation: {e}" # Pass error info potentially
-            # Decide if you want to break or continue on evaluation error
-            # break 
+            print(f"Error saving final ATS report: {e}")
 
     print("\n🎯 Resume refinement loop completed.")
+    index_stats = knowledge_index.stats()
+    print(f"📚 Knowledge chunks embedded: {index_stats['embedded']}, reused from the index: {index_stats['reused']}")
+    if section_evaluation:
+        print(f"🧩 Section evaluation cache: {section_cache_summary()}")
     
     if final_resume_file and os.path.exists(final_resume_file):
         print(f"Returning final resume file: {final_resume_file}")
@@ -0,0 +1,95 @@
+import threading
+from crewai import Agent, LLM
+
+DEFAULT_MODEL = "openai/gpt-4.1"
+
+# Agent definitions. They describe the agent only; everything specific to one
+# request (company, job description, GitHub profile, CV) travels in the task
+# descriptions, so the same agent serves every request.
+AGENT_SPECS = {
+    'jd_analyzer': dict(
+        role="Senior Technical Job Description Analyst",
+        goal="Extract structured requirements and relevant insights from job descriptions for tailored resume creation",
+        backstory="Specialist in breaking down job descriptions to find required skills, cultural fit hints, and tech keywords",
+    ),
+    'company_intelligence': dict(
+        role="Company Intelligence Agent",
+        goal="Research the hiring company's tech stack and culture using verified sources",
+        backstory="Specializes in extracting accurate company data from public sources to help candidates tailor their applications effectively.",
+    ),
+    'github_analyzer': dict(
+        role="Targeted GitHub Profile Analyst",
+        goal="Analyze the candidate's GitHub profile and extract insights relevant to the target job",
+        backstory=(
+            "You're a senior technical recruiter and GitHub analyst with expertise in translating GitHub activity into career-relevant achievements. "
+            "You understand what hiring companies care about and can match a developer's GitHub activity to role-specific requirements."
+        ),
+    ),
+    'cv_analyzer': dict(
+        role="Resume Intelligence Analyst",
+        goal="Analyze the candidate's CV and extract the most relevant projects, skills, and achievements tailored for the target role",
+        backstory=(
+            "You're a senior talent intelligence analyst with deep expertise in matching resumes to job descriptions. "
+            "You're skilled at parsing resumes to identify impactful achievements and aligning them with specific role requirements. "
+            "You act like a hiring manager's secret weapon for filtering out top-tier, job-ready candidates."
+        ),
+    ),
+    'resume_builder': dict(
+        role="Senior Resume Builder and Career Strategist",
+        goal="Create and refine a resume that is ATS-optimized and aligned with job, company, and technical profile based on provided context.",
+        backstory="You're a resume writing expert who knows exactly how to tailor resumes for ATS systems, tech recruiters, and modern roles using the merged context and knowledgebase.",
+    ),
+    'ats_evaluator': dict(
+        role="ATS Resume Evaluator",
+        goal="Evaluate the resume for keyword relevance, technical alignment, formatting, and ATS compatibility based on the provided context. Give feedback to improve it.",
+        backstory="You're a top-tier ATS and HR screening specialist who helps candidates refine resumes to perfection based on real hiring systems and the provided context.",
+    ),
+}
+
+
+class ComponentRegistry:
+    """Builds LLM clients and agents once and hands out the warm instances.
+
+    LLM clients (and the HTTP connection pools inside them) are shared by the
+    whole process. Agents keep per-run executor state while a crew runs, so
+    every thread gets its own instance of each agent; a batch worker reuses
+    its agents for every request it processes.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self._llms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def llm(self, model: str = None, temperature: float = None) -> LLM:
+        """Returns the shared LLM client for model (the registry's default model if omitted).
+
+        A temperature gets a client of its own; without one the provider default applies.
+        """
+        model = model or self.model
+        with self._lock:
+            if (model, temperature) not in self._llms:
+                self._llms[model, temperature] = LLM(model=model) if temperature is None else LLM(model=model, temperature=temperature)
+            return self._llms[model, temperature]
+
+    def agent(self, name: str, knowledge_sources=None) -> Agent:
+        """Returns the calling thread's instance of the agent defined in AGENT_SPECS.
+
+        Args:
+            name (str): Key in AGENT_SPECS.
+            knowledge_sources (list, optional): Knowledge sources for this request;
+                replaces the ones of the previous request the agent served.
+        """
+        agents = self._local.__dict__.setdefault('agents', {})
+        if name not in agents:
+            agents[name] = Agent(**AGENT_SPECS[name], llm=self.llm(), verbose=True)
+        agent = agents[name]
+        if knowledge_sources is not None:
+            agent.knowledge_sources = knowledge_sources
+            agent.knowledge = None
+        return agent
+
+
+# Process-wide registry used by both pipeline stages
+registry = ComponentRegistry()
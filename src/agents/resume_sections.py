@@ -0,0 +1,138 @@
+import hashlib
+import re
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, Field
+
+# Canonical resume sections and the headings that introduce them
+SECTION_HEADINGS = {
+    'Summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective', 'career objective'),
+    'Skills': ('skills', 'technical skills', 'core skills', 'key skills', 'core competencies', 'skills and tools'),
+    'Projects': ('projects', 'key projects', 'selected projects', 'personal projects', 'github projects'),
+    'Experience': ('experience', 'work experience', 'professional experience', 'employment history', 'work history'),
+    'Education': ('education', 'education and certifications', 'education & certifications', 'certifications'),
+}
+SECTION_NAMES = tuple(SECTION_HEADINGS)
+
+HEADING_MARKUP_RE = re.compile(r'^[#*_=\-\s]+|[*_:=\-\s]+$')
+SEPARATOR_RE = re.compile(r'^\s*([-*_=])\1{2,}\s*$')  # '---', '***', '===' rules between sections
+HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+
+class SectionEdit(BaseModel):
+    """Replacement text for one resume section."""
+
+    section: str = Field(description=f"Section to replace, one of: {', '.join(SECTION_NAMES)}")
+    content: str = Field(description="The complete new text of the section, without its heading")
+
+
+class ResumeRevision(BaseModel):
+    """Targeted edits to a sectioned resume; sections without an edit are kept verbatim."""
+
+    edits: List[SectionEdit] = Field(default_factory=list, description="One edit per section the feedback requires changing")
+
+
+class SectionedResume:
+    """A resume split into its preamble (name, contact line) and canonical sections.
+
+    Every section keeps its original heading line and body text, so
+    rendering an unedited resume reproduces the input exactly. Headings the
+    parser does not know (e.g. 'Languages') stay part of the section above
+    them.
+    """
+
+    def __init__(self, preamble: str, sections: List[Tuple[str, str, str]]):
+        self.preamble = preamble
+        self.sections = sections  # (name, heading line, body) in document order
+
+    @classmethod
+    def parse(cls, text: str) -> 'SectionedResume':
+        preamble, sections = [], []
+        for line in text.splitlines(keepends=True):
+            name = section_of_heading(line)
+            if name and name not in [section[0] for section in sections]:
+                sections.append([name, line, ''])
+            elif sections:
+                sections[-1][2] += line
+            else:
+                preamble.append(line)
+        return cls(''.join(preamble), [tuple(section) for section in sections])
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _, _ in self.sections]
+
+    def get(self, name: str) -> Optional[str]:
+        """Returns the body of a section, or None if the resume has no such section."""
+        for section_name, _, body in self.sections:
+            if section_name == name:
+                return body
+        return None
+
+    def render(self) -> str:
+        return self.preamble + ''.join(heading + body for _, heading, body in self.sections)
+
+    def apply(self, revision: ResumeRevision) -> List[str]:
+        """Replaces the text of the revised sections and returns the names of the sections that changed.
+
+        The blank lines and separators around a replaced text are kept, so
+        the rest of the rendered document stays as it was.
+
+        Edits of sections the resume does not have are added as new sections
+        in canonical order; edits naming no known section are ignored.
+        """
+        changed = []
+        for edit in revision.edits:
+            name = canonical_section(edit.section)
+            if name is None:
+                continue
+            content = edit.content.strip('\n')
+            for index, (section_name, heading, old_body) in enumerate(self.sections):
+                if section_name == name:
+                    # The blank lines and separator around the text belong to the layout, not the section
+                    lead, text, trail = split_layout(old_body)
+                    if text.strip() != content.strip():
+                        # Only a text ending the document without a newline is replaced without one
+                        newline = '' if text and not text.endswith('\n') else '\n'
+                        self.sections[index] = (name, heading, lead + content + newline + trail)
+                        changed.append(name)
+                    break
+            else:
+                body = content + '\n\n'
+                position = sum(1 for section_name in self.names if SECTION_NAMES.index(section_name) < SECTION_NAMES.index(name))
+                self.sections.insert(position, (name, self._heading_like_others(name), body))
+                changed.append(name)
+        return changed
+
+    def _heading_like_others(self, name: str) -> str:
+        """Returns a heading line for a new section in the markup of the existing headings."""
+        markdown = re.match(r'\s*#+\s*', self.sections[0][1]) if self.sections else None
+        return f"{markdown.group(0)}{name}\n" if markdown else f"{name.upper()}\n"
+
+
+def canonical_section(name: str) -> Optional[str]:
+    """Maps a section name or heading ('Work Experience') to its canonical name ('Experience')."""
+    return HEADING_LOOKUP.get(' '.join(HEADING_MARKUP_RE.sub('', name).lower().split()))
+
+
+def section_of_heading(line: str) -> Optional[str]:
+    """Returns the canonical section a line is the heading of, or None for ordinary lines."""
+    if len(line) > 60 or not line.strip():
+        return None
+    return canonical_section(line)
+
+
+def split_layout(body: str) -> Tuple[str, str, str]:
+    """Splits a section body into its leading blank lines, its text and its trailing blank lines and separators."""
+    lines = body.splitlines(keepends=True)
+    start = 0
+    while start < len(lines) and not lines[start].strip():
+        start += 1
+    end = len(lines)
+    while end > start and (not lines[end - 1].strip() or SEPARATOR_RE.match(lines[end - 1])):
+        end -= 1
+    return ''.join(lines[:start]), ''.join(lines[start:end]), ''.join(lines[end:])
+
+
+def section_fingerprint(name: str, body: str) -> str:
+    """Hash of a section that ignores whitespace differences, identifying unchanged sections across drafts."""
+    return hashlib.sha256(f"{name}\n{' '.join(body.split())}".encode('utf-8')).hexdigest()
@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from agents.final4 import run_final4_processing, prepare_job_artifacts, CANDIDATE_TASKS
+from agents.next_agent import run_next_agent_processing
+from utils.github_pipeline import run_github_pipeline
+from utils.pdf_to_text import convert_pdf_to_text
+from utils.tracing import tracer
+
+# Candidate x job pairs (and per-job / per-candidate preparations) processed at the same time
+DEFAULT_BATCH_WORKERS = 4
+BATCH_OUTPUT_DIR = os.path.join('output', 'batch')
+
+
+def _slug(value):
+    """Turns an identifier into a safe directory name."""
+    return re.sub(r'[^\w.-]+', '_', str(value)).strip('_') or 'item'
+
+
+def load_manifest(manifest_file):
+    """Reads a batch manifest: one JSON object per line, one line per candidate x job pair.
+
+    Every entry needs a unique 'request_id', a 'job_description_file', a
+    'company' name and a 'cv_file' (.txt or .pdf). The GitHub profile is given
+    either as a 'github_username' (scraped and refined once per candidate) or
+    as an already refined 'github_profile_file'. Entries sharing a 'job_id' /
+    'candidate_id' (defaulting to the JD file / the CV file) share the
+    job-side / candidate-side artifacts.
+
+    Returns:
+        list: The manifest entries with 'job_id' and 'candidate_id' filled in.
+
+    Raises:
+        ValueError: If an entry is missing a field or a request_id is repeated.
+    """
+    entries = []
+    seen = set()
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            missing = [field for field in ('request_id', 'job_description_file', 'company', 'cv_file') if not entry.get(field)]
+            if not entry.get('github_username') and not entry.get('github_profile_file'):
+                missing.append('github_username or github_profile_file')
+            if missing:
+                raise ValueError(f"Manifest line {line_number} is missing: {', '.join(missing)}")
+            if entry['request_id'] in seen:
+                raise ValueError(f"Manifest line {line_number} repeats request_id {entry['request_id']!r}")
+            seen.add(entry['request_id'])
+            entry.setdefault('job_id', entry['job_description_file'])
+            entry.setdefault('candidate_id', entry['cv_file'])
+            entries.append(entry)
+    return entries
+
+
+@tracer.traced('batch.prepare_job')
+def _prepare_job(job_id, entry, execution_mode, force):
+    """Writes the company file and runs the JD and company analyses for one job."""
+    job_dir = os.path.join(BATCH_OUTPUT_DIR, 'jobs', _slug(job_id))
+    os.makedirs(job_dir, exist_ok=True)
+    company_file = os.path.join(job_dir, 'company.txt')
+    with open(company_file, 'w', encoding='utf-8') as f:
+        f.write(entry['company'])
+    if not prepare_job_artifacts(entry['job_description_file'], company_file, execution_mode, force, output_dir=job_dir):
+        raise RuntimeError(f"Job analysis failed for {job_id}")
+    return {'job_description_file': entry['job_description_file'], 'company_file': company_file}
+
+
+@tracer.traced('batch.prepare_candidate')
+def _prepare_candidate(candidate_id, entry, pack_token_budget=None):
+    """Produces the refined GitHub profile and the CV text for one candidate."""
+    candidate_dir = os.path.join(BATCH_OUTPUT_DIR, 'candidates', _slug(candidate_id))
+    os.makedirs(candidate_dir, exist_ok=True)
+
+    github_profile_file = entry.get('github_profile_file')
+    if not github_profile_file:
+        github_profile_file = os.path.join(candidate_dir, 'refined_output_github_llm.txt')
+        summary = run_github_pipeline(entry['github_username'], github_profile_file,
+                                      pack_token_budget=pack_token_budget)
+        if not summary['repositories']:
+            raise RuntimeError(f"No repositories found for GitHub user {entry['github_username']}")
+
+    cv_file = entry['cv_file']
+    if cv_file.lower().endswith('.pdf'):
+        cv_file = convert_pdf_to_text(cv_file, os.path.join(candidate_dir, 'cv.txt'))
+        if not cv_file:
+            raise RuntimeError(f"Could not extract text from {entry['cv_file']}")
+    return {'github_profile_file': github_profile_file, 'candidate_cv_file': cv_file}
+
+
+def run_batch(manifest_file, results_file, max_workers=DEFAULT_BATCH_WORKERS, execution_mode='sequential',
+              force=False, max_iterations=3, pack_token_budget=None):
+    """Scores and tailors every candidate x job pair listed in a manifest.
+
+    Each job's JD and company analyses run once for all of its candidates and
+    each candidate's GitHub refinement and CV extraction run once for all of
+    their jobs; only the CV-vs-JD analysis and the resume refinement run per
+    pair. Preparations and pairs share one worker pool of max_workers, and a
+    pair starts as soon as its job and candidate are ready.
+
+    Progress is appended to results_file as JSON lines: one 'pair' record per
+    finished pair (status, final resume, seconds, error) and a closing
+    'summary' record.
+
+    Args:
+        manifest_file (str): Path to the manifest (see load_manifest).
+        results_file (str): Path of the JSONL results file.
+        max_workers (int): Global limit on preparations and pairs running at the same time.
+        execution_mode (str): Stage-1 execution mode, 'sequential' or 'dag'.
+        force (bool): Ignore cached stage outputs.
+        max_iterations (int): Resume refinement iterations per pair.
+        pack_token_budget (int, optional): Pack repository analyses into shared
+            requests of this many README tokens (see run_github_pipeline).
+
+    Returns:
+        dict: 'pairs', 'succeeded', 'failed' and 'seconds'.
+    """
+    entries = load_manifest(manifest_file)
+    start = time.perf_counter()
+    jobs = {}
+    candidates = {}
+    for entry in entries:
+        jobs.setdefault(entry['job_id'], entry)
+        candidates.setdefault(entry['candidate_id'], entry)
+    print(f"📋 Batch: {len(entries)} pairs, {len(jobs)} jobs, {len(candidates)} candidates, {max_workers} workers")
+
+    results_dir = os.path.dirname(results_file)
+    if results_dir:
+        os.makedirs(results_dir, exist_ok=True)
+    results_lock = threading.Lock()
+    done = []
+
+    def record(result):
+        with results_lock:
+            results.write(json.dumps(result, ensure_ascii=False) + '\n')
+            results.flush()
+            if result['type'] == 'pair':
+                done.append(result)
+                print(f"[{len(done)}/{len(entries)}] {result['request_id']}: {result['status']}")
+
+    @tracer.traced('batch.pair')
+    def run_pair(entry, job_future, candidate_future):
+        pair_start = time.perf_counter()
+        result = {'type': 'pair', 'request_id': entry['request_id'], 'job_id': entry['job_id'],
+                  'candidate_id': entry['candidate_id']}
+        try:
+            # The preparations were queued before any pair, so they are running
+            # or finished by now and waiting on them cannot starve the pool
+            job = job_future.result()
+            candidate = candidate_future.result()
+            pair_dir = os.path.join(BATCH_OUTPUT_DIR, 'pairs', _slug(entry['request_id']))
+            # The job-side tasks were already rerun by _prepare_job when forced
+            final4_outputs = run_final4_processing(execution_mode=execution_mode,
+                                                   force=CANDIDATE_TASKS if force else False,
+                                                   output_dir=pair_dir, **job, **candidate)
+            if not final4_outputs:
+                raise RuntimeError("Initial analysis failed")
+            resume_file = run_next_agent_processing(final4_outputs, max_iterations=max_iterations, force=force,
+                                                    output_dir=pair_dir)
+            if not resume_file:
+                raise RuntimeError("Resume refinement failed")
+            result.update(status='ok', resume_file=resume_file,
+                          ats_report_file=os.path.join(pair_dir, 'ats_final_report.txt'))
+        except Exception as e:
+            result.update(status='failed', error=str(e))
+        result['seconds'] = round(time.perf_counter() - pair_start, 2)
+        record(result)
+
+    with open(results_file, 'w', encoding='utf-8') as results:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            job_futures = {job_id: executor.submit(_prepare_job, job_id, entry, execution_mode, force)
+                           for job_id, entry in jobs.items()}
+            candidate_futures = {candidate_id: executor.submit(_prepare_candidate, candidate_id, entry, pack_token_budget)
+                                 for candidate_id, entry in candidates.items()}
+            for entry in entries:
+                executor.submit(run_pair, entry, job_futures[entry['job_id']], candidate_futures[entry['candidate_id']])
+
+        summary = {
+            'type': 'summary',
+            'pairs': len(entries),
+            'succeeded': sum(1 for result in done if result['status'] == 'ok'),
+            'failed': sum(1 for result in done if result['status'] != 'ok'),
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+        record(summary)
+    print(f"✅ Batch finished: {summary['succeeded']} of {summary['pairs']} pairs succeeded in {summary['seconds']:.1f}s "
+          f"(results in {results_file})")
+    return summary
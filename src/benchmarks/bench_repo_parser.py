@@ -0,0 +1,97 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+
+# Add the src directory to Python path to make utils accessible
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from utils.repo_page_parser import parse_repo_page, PARSER
+
+DEFAULT_FIXTURES_DIR = os.path.join(current_dir, 'fixtures')
+
+
+def legacy_parse_repo_page(html, repo_url):
+    """The full-tree extraction get_repo_data used before repo_page_parser, kept as the baseline."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    repo_name = soup.find('a', {'data-pjax': '#repo-content-pjax-container'}).text.strip()
+
+    commits_element = soup.find('li', string=lambda text: text and "commits" in text)
+    num_commits = 0
+    if commits_element:
+        commits_text = commits_element.text.strip()
+        commits_match = re.search(r'([\d,]+)\s+commits?', commits_text)
+        if commits_match:
+            num_commits = int(commits_match.group(1).replace(',', ''))
+
+    counts = {}
+    for key in ['branches', 'releases', 'contributors']:
+        element = soup.find('a', href=re.compile(rf'/{key}$'))
+        if element:
+            text = element.text.strip()
+            counts[key] = int(re.search(r'([\d,]+)', text).group(1).replace(',', '')) if re.search(r'([\d,]+)', text) else 0
+        else:
+            counts[key] = 0
+
+    readme_div = soup.find('article', class_='markdown-body entry-content container-lg')
+    readme_content = readme_div.text.strip() if readme_div else "No Readme"
+
+    return {
+        'name': repo_name,
+        'url': repo_url,
+        'commits': num_commits,
+        'branches': counts['branches'],
+        'releases': counts['releases'],
+        'contributors': counts['contributors'],
+        'readme_content': readme_content,
+    }
+
+
+def measure(parse, html, repeats):
+    """Returns (CPU milliseconds per page, peak traced memory in KiB) for one parser."""
+    start = time.process_time()
+    for _ in range(repeats):
+        parse(html, 'fixture')
+    cpu_ms = (time.process_time() - start) * 1000 / repeats
+
+    tracemalloc.start()
+    parse(html, 'fixture')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare repository page extraction against the legacy full-tree parser.")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Directory of saved GitHub repository pages (*.html)")
+    parser.add_argument('--repeats', type=int, default=20, help="Parses per fixture for the CPU timing")
+    args = parser.parse_args()
+
+    fixture_files = sorted(glob.glob(os.path.join(args.fixtures, '*.html')))
+    if not fixture_files:
+        print(f"Error: No *.html fixtures found in '{args.fixtures}'.")
+        sys.exit(1)
+
+    print(f"Parser backend: {PARSER}")
+    print(f"{'fixture':<22}{'size KiB':>10}{'legacy ms':>12}{'new ms':>10}{'legacy KiB':>12}{'new KiB':>10}")
+    for path in fixture_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        if parse_repo_page(html, 'fixture') != legacy_parse_repo_page(html, 'fixture'):
+            print(f"❌ {os.path.basename(path)}: extracted data differs from the legacy parser.")
+            sys.exit(1)
+
+        legacy_ms, legacy_kib = measure(legacy_parse_repo_page, html, args.repeats)
+        new_ms, new_kib = measure(parse_repo_page, html, args.repeats)
+        print(f"{os.path.basename(path):<22}{len(html) / 1024:>10.0f}{legacy_ms:>12.1f}{new_ms:>10.1f}{legacy_kib:>12.0f}{new_kib:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
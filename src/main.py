@@ -1,8 +1,16 @@
+import argparse
+import json
 import os
 import sys
-from agents.final4 import run_final4_processing
-from agents.next_agent import run_next_agent_processing
+import time
+from agents.final4 import run_final4_processing, warm_company_store
+from agents.next_agent import (run_next_agent_processing, DEFAULT_TARGET_SCORE, DEFAULT_PRECHECK_FLOOR, EVALUATORS,
+                               REVISION_MODES, VARIANT_MODES, KNOWLEDGE_MODES)
+from utils.context_retrieval import DEFAULT_TOP_K
+from utils.github_refiner_llm import DEFAULT_PACK_TOKEN_BUDGET
+from batch_runner import run_batch, DEFAULT_BATCH_WORKERS
 from utils.text_to_pdf_converter import convert_text_to_pdf
+from utils.tracing import tracer
 
 def main():
     """
@@ -10,6 +18,84 @@ def main():
     This script assumes that the necessary input files have been generated,
     for instance, by running the streamlit_app.py interface.
     """
+    parser = argparse.ArgumentParser(description="Run the resume generation pipeline.")
+    parser.add_argument('--dag', action='store_true',
+                        help="Run independent stage-1 analyses concurrently instead of sequentially")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore cached stage outputs and rerun every stage")
+    parser.add_argument('--warm-companies', metavar='FILE',
+                        help="Research the companies listed in FILE (JSONL with 'company' and "
+                             "'job_description_file' fields) into the company store, then exit")
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help="Process every candidate x job pair listed in MANIFEST (JSONL, see batch_runner.load_manifest)")
+    parser.add_argument('--results', default=os.path.join('output', 'batch_results.jsonl'),
+                        help="Results file written in batch mode")
+    parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                        help="Pairs processed at the same time in batch mode")
+    parser.add_argument('--pack-token-budget', type=int, metavar='TOKENS',
+                        help="In batch mode, analyze candidates' repositories in packed requests of up to TOKENS "
+                             f"README tokens (e.g. {DEFAULT_PACK_TOKEN_BUDGET}) instead of one request each")
+    parser.add_argument('--target-score', type=int, default=DEFAULT_TARGET_SCORE,
+                        help="Stop refining the resume once its ATS score reaches this value")
+    parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                        help="Stop refining the resume after this many seconds")
+    parser.add_argument('--token-budget', type=int, metavar='TOKENS',
+                        help="Stop refining the resume once this many LLM tokens were used")
+    parser.add_argument('--evaluator', choices=EVALUATORS, default='llm',
+                        help="Score resume drafts with the ATS agent, with the local knowledgebase scorer, "
+                             "or locally first and with the agent once a draft passes --precheck-floor")
+    parser.add_argument('--precheck-floor', type=int, default=DEFAULT_PRECHECK_FLOOR,
+                        help="Local ATS score a draft needs before the ATS agent evaluates it in precheck mode")
+    parser.add_argument('--revision-mode', choices=REVISION_MODES, default='full',
+                        help="Regenerate the whole resume every iteration, or only the sections the ATS feedback concerns")
+    parser.add_argument('--variants', type=int, default=1,
+                        help="Resume variants drafted and scored concurrently per refinement round; the best one is kept")
+    parser.add_argument('--variant-concurrency', type=int,
+                        help="Variants running at the same time (default: all of them)")
+    parser.add_argument('--variant-token-cap', type=int, metavar='TOKENS',
+                        help="Stop drafting extra variants once the refinement loop has used this many tokens")
+    parser.add_argument('--variant-mode', choices=VARIANT_MODES, default='emphasis',
+                        help="Make variants differ by prompt emphasis or by the resume builder's sampling temperature")
+    parser.add_argument('--section-evaluation', action='store_true',
+                        help="Evaluate resume drafts section by section and re-evaluate only the sections that changed")
+    parser.add_argument('--knowledge-mode', choices=KNOWLEDGE_MODES, default='files',
+                        help="Attach the whole reports and knowledgebase to the resume agents, or retrieve the job "
+                             "category's keywords and the most relevant report chunks per task")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help="Report chunks retrieved per task in retrieval mode")
+    parser.add_argument('--pdf-output', metavar='FILE',
+                        help="Write the resume PDF to FILE (default: a file per run in output/)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Write the run's trace spans to FILE")
+    parser.add_argument('--trace-format', choices=['chrome', 'json'], default='chrome',
+                        help="Trace file format: Chrome trace events (chrome://tracing, Perfetto) or plain JSON spans")
+    args = parser.parse_args()
+
+    try:
+        run_pipeline(args)
+    finally:
+        # Also reached through sys.exit, so failed runs are reported as well
+        tracer.print_summary()
+        if args.trace:
+            print(f"🧭 Trace written to {tracer.export(args.trace, args.trace_format)}")
+
+def run_pipeline(args):
+    """Runs the mode selected by the parsed command line arguments."""
+    if args.warm_companies:
+        with open(args.warm_companies, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        companies = [(entry['company'], entry['job_description_file']) for entry in entries]
+        researched = warm_company_store(companies, force=args.force,
+                                        execution_mode='dag' if args.dag else 'sequential')
+        print(f"✅ Company store warmed: {researched} of {len(companies)} companies researched.")
+        return
+
+    if args.batch:
+        summary = run_batch(args.batch, args.results, max_workers=args.workers,
+                            execution_mode='dag' if args.dag else 'sequential', force=args.force,
+                            pack_token_budget=args.pack_token_budget)
+        sys.exit(1 if summary['failed'] else 0)
+
     print("🚀 Starting the resume generation pipeline...")
 
     # Define the paths to the input files generated by the Streamlit app
@@ -36,7 +122,9 @@ def main():
         job_description_file=job_description_file,
         company_file=company_file,
         github_profile_file=github_profile_file,
-        candidate_cv_file=candidate_cv_file
+        candidate_cv_file=candidate_cv_file,
+        execution_mode='dag' if args.dag else 'sequential',
+        force=args.force
     )
 
     if not final4_outputs:
@@ -47,7 +135,15 @@ def main():
 
     # Step 2: Run the resume refinement loop using next_agent.py
     print("\nStep 2: Running Resume Refinement Loop...")
-    final_resume_file = run_next_agent_processing(final4_outputs)
+    final_resume_file = run_next_agent_processing(final4_outputs, force=args.force, target_score=args.target_score,
+                                                  time_budget=args.time_budget, token_budget=args.token_budget,
+                                                  evaluator=args.evaluator, precheck_floor=args.precheck_floor,
+                                                  revision_mode=args.revision_mode, variants=args.variants,
+                                                  variant_concurrency=args.variant_concurrency,
+                                                  variant_token_cap=args.variant_token_cap,
+                                                  variant_mode=args.variant_mode,
+                                                  section_evaluation=args.section_evaluation,
+                                                  knowledge_mode=args.knowledge_mode, top_k=args.top_k)
 
     if not final_resume_file:
         print("\n❌ Error: Resume refinement (next_agent.py) failed. Exiting.")
@@ -57,7 +153,10 @@ def main():
 
     # Step 3: Convert the final resume to PDF
     print("\nStep 3: Converting Final Resume to PDF...")
-    pdf_path = convert_text_to_pdf(input_text_file=final_resume_file)
+    with tracer.span('pdf'):
+        # One file per run, so that concurrent runs do not overwrite each other's PDF
+        output_pdf_file = args.pdf_output or os.path.join('output', f"resume_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.pdf")
+        pdf_path = convert_text_to_pdf(input_text_file=final_resume_file, output_pdf_file=output_pdf_file)
 
     if not pdf_path:
         print("\n❌ Error: PDF conversion failed. Exiting.")
@@ -11,10 +11,12 @@ sys.path.append(parent_dir)
 
 from utils.input_validator import InputValidator
 from utils.pdf_to_text import convert_pdf_to_text
-from utils.github_scraper_new import get_user_repositories, get_repo_data, save_to_text
-from utils.github_refiner_llm import read_github_data, parse_repositories, analyze_repository_with_llm, format_output
+from utils.github_scraper_new import save_to_text
+from utils.github_pipeline import run_github_pipeline
+from utils.repo_records import read_repo_records
 from agents.final4 import run_final4_processing
 from agents.next_agent import run_next_agent_processing
+from utils.tracing import tracer
 
 # Initialize session state variables if they don't exist
 if 'validator' not in st.session_state:
@@ -70,6 +72,8 @@ with st.form('input_form'):
 
 # Handle form submission
 if submitted:
+    # Nothing in the app reads the spans of earlier requests; drop them
+    tracer.clear()
     # Validate and process inputs
     validator = st.session_state.validator
     
@@ -112,36 +116,18 @@ if submitted:
                         else:
                             username = github_profile
 
-                        # Fetch repositories
-                        repositories = get_user_repositories(username)
-                        if repositories:
-                            # Get repository data
-                            all_repo_data = []
-                            for repo_url in repositories:
-                                repo_data = get_repo_data(repo_url)
-                                if repo_data:
-                                    all_repo_data.append(repo_data)
-
-                            if all_repo_data:
-                                # Save GitHub data
-                                github_output_file = os.path.join('data', 'output_github.txt')
-                                save_to_text(all_repo_data, github_output_file)
-                                st.session_state.github_output_file = github_output_file
-
-                                # Refine GitHub data
-                                content = read_github_data(github_output_file)
-                                parsed_repos = parse_repositories(content)
-                                enhanced_repositories = []
-                                for repo in parsed_repos:
-                                    enhanced_repo = analyze_repository_with_llm(repo)
-                                    enhanced_repositories.append(enhanced_repo)
-
-                                refined_output_file = os.path.join('data', 'refined_output_github_llm.txt')
-                                formatted_output = format_output(enhanced_repositories)
-                                with open(refined_output_file, 'w', encoding='utf-8') as file:
-                                    file.write(formatted_output)
-                                st.session_state.refined_output_file = refined_output_file
-                                st.success('GitHub profile processed successfully!')
+                        # Fetch and analyze repositories as one streaming pipeline
+                        github_records_file = os.path.join('data', 'output_github.jsonl')
+                        refined_output_file = os.path.join('data', 'refined_output_github_llm.txt')
+                        summary = run_github_pipeline(username, refined_output_file, github_records_file)
+
+                        if summary['repositories']:
+                            # Text export of the scraped data shown below
+                            github_output_file = os.path.join('data', 'output_github.txt')
+                            save_to_text(read_repo_records(github_records_file), github_output_file)
+                            st.session_state.github_output_file = github_output_file
+                            st.session_state.refined_output_file = refined_output_file
+                            st.success('GitHub profile processed successfully!')
                     except Exception as e:
                         st.error(f'Error processing GitHub profile: {str(e)}')
         else:
@@ -208,6 +194,7 @@ if st.session_state.processing_complete:
     st.json(st.session_state.validator.inputs)
 
     if st.button('Generate Resume'):
+        tracer.clear()
         with st.spinner('Running the resume generation pipeline...'):
             final4_outputs = run_final4_processing(
                 job_description_file=st.session_state.job_description_file,
@@ -0,0 +1,77 @@
+import os
+import pytest
+from utils.ats_scorer import AhoCorasick, ATSScorer, parse_knowledgebase, load_scorer
+
+KNOWLEDGEBASE = """Knowledge Base for ATS Agent
+Top Priority Keywords: 3 points each
+
+1. Software Development
+    Top Priority Keywords (3)
+        Python
+        JavaScript
+        C#
+    Medium Priority Keywords (2)
+        REST APIs
+        Go
+    Low Priority Keywords (1)
+        Problem-solving
+2. Data Science and Analytics
+    Top Priority Keywords (3)
+        Python
+        R
+        Machine Learning
+    Medium Priority Keywords (1)
+        Natural Language Processing (NLP)
+    Low Priority Keywords (1)
+        Communication
+"""
+
+
+@pytest.fixture
+def scorer():
+    return ATSScorer(parse_knowledgebase(KNOWLEDGEBASE))
+
+
+def test_parse_knowledgebase():
+    categories = parse_knowledgebase(KNOWLEDGEBASE)
+    assert list(categories) == ['Software Development', 'Data Science and Analytics']
+    assert categories['Software Development']['top'] == ['Python', 'JavaScript', 'C#']
+    assert categories['Data Science and Analytics']['medium'] == ['Natural Language Processing (NLP)']
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    matches = sorted(AhoCorasick(['he', 'she', 'hers']).find('ushers'))
+    assert matches == [(4, 'he'), (4, 'she'), (6, 'hers')]
+
+
+def test_keywords_match_on_word_boundaries_and_through_aliases(scorer):
+    found = scorer.find_keywords("Built RESTful services in Python and js; strong problem solving, NLP experience.")
+    assert found == {'Python', 'JavaScript', 'REST APIs', 'Problem-solving', 'Natural Language Processing (NLP)'}
+    assert 'JavaScript' not in scorer.find_keywords("Pythonic Java code")
+    assert 'Python' not in scorer.find_keywords("Pythonic Java code")
+
+
+def test_only_ambiguous_keywords_are_case_sensitive(scorer):
+    assert {'C#', 'JavaScript'} <= scorer.find_keywords("c# and Js")
+    assert scorer.find_keywords("Statistics in R, services in Go") >= {'R', 'Go'}
+    assert not {'R', 'Go'} & scorer.find_keywords("let's go for r&d")
+
+
+def test_classify_and_score(scorer):
+    job = "Data scientist: Python, R, machine learning and NLP."
+    assert scorer.classify(job) == 'Data Science and Analytics'
+    result = scorer.score("Python and machine learning, good communication.", 'Data Science and Analytics')
+    assert (result['points'], result['max_points'], result['score']) == (7, 12, 58)
+    assert result['matched']['top'] == ['Python', 'Machine Learning']
+    assert result['missing']['top'] == ['R']
+
+
+def test_load_scorer_recompiles_when_the_file_changes(tmp_path):
+    path = tmp_path / 'knowledgebase.txt'
+    path.write_text(KNOWLEDGEBASE, encoding='utf-8')
+    first = load_scorer(str(path))
+    assert load_scorer(str(path)) is first
+    path.write_text(KNOWLEDGEBASE.replace('        Go\n', '        Rust\n'), encoding='utf-8')
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    assert 'Rust' in load_scorer(str(path)).categories['Software Development']['medium']
@@ -0,0 +1,86 @@
+import json
+import os
+from types import SimpleNamespace
+import pytest
+from crewai import Crew
+
+# agents.final4 refuses to import without a key; no test here reaches the API
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+
+import batch_runner
+from agents import next_agent
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # The directory above src/
+REPORT_KEYS = ('jd_output', 'company_output', 'github_output', 'cv_output')
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+def write_manifest(tmp_path, *entries):
+    manifest = tmp_path / 'manifest.jsonl'
+    manifest.write_text(''.join(json.dumps(entry) + '\n' for entry in entries), encoding='utf-8')
+    return str(manifest)
+
+
+def fake_final4(output_dir, **kwargs):
+    """Stands in for the stage-1 crews: writes one small report per analysis."""
+    os.makedirs(output_dir, exist_ok=True)
+    return {key: write(os.path.join(output_dir, f'{key}.txt'), f"{key} of the pair") for key in REPORT_KEYS}
+
+
+def fake_kickoff(self, *args, **kwargs):
+    """Stands in for the LLM: writes a resume for the build task and scores it above the target."""
+    for task in self.tasks:
+        if task.output_file:
+            write(task.output_file, "Summary\nEngineer\n\nSkills\nPython")
+    return SimpleNamespace(raw="ATS Score: 95/100", pydantic=None, token_usage=None)
+
+
+def test_load_manifest_fills_in_ids(tmp_path):
+    manifest = write_manifest(tmp_path,
+                              {'request_id': 'p1', 'job_description_file': 'jd.txt', 'company': 'Acme',
+                               'cv_file': 'cv.pdf', 'github_username': 'octocat'},
+                              {'request_id': 'p2', 'job_description_file': 'jd.txt', 'company': 'Acme',
+                               'cv_file': 'other.txt', 'github_profile_file': 'profile.txt', 'candidate_id': 'c2'})
+    entries = batch_runner.load_manifest(manifest)
+    assert [(entry['job_id'], entry['candidate_id']) for entry in entries] == [('jd.txt', 'cv.pdf'), ('jd.txt', 'c2')]
+
+
+@pytest.mark.parametrize('entries, message', [
+    ([{'request_id': 'p1', 'job_description_file': 'jd.txt', 'company': 'Acme', 'cv_file': 'cv.txt'}],
+     'github_username or github_profile_file'),
+    ([{'request_id': 'p1', 'job_description_file': 'jd.txt', 'company': 'Acme', 'cv_file': 'cv.txt', 'github_username': 'a'},
+      {'request_id': 'p1', 'job_description_file': 'jd.txt', 'company': 'Acme', 'cv_file': 'cv.txt', 'github_username': 'b'}],
+     "repeats request_id 'p1'"),
+])
+def test_load_manifest_rejects_bad_entries(tmp_path, entries, message):
+    with pytest.raises(ValueError, match=message):
+        batch_runner.load_manifest(write_manifest(tmp_path, *entries))
+
+
+def test_pair_runs_from_the_repository_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    monkeypatch.setattr(batch_runner, 'BATCH_OUTPUT_DIR', str(tmp_path / 'batch'))
+    monkeypatch.setattr(batch_runner, 'prepare_job_artifacts', lambda *args, **kwargs: True)
+    monkeypatch.setattr(batch_runner, 'run_final4_processing', fake_final4)
+    monkeypatch.setattr(next_agent, 'stage_cache', None)
+    monkeypatch.setattr(Crew, 'kickoff', fake_kickoff)
+    manifest = write_manifest(tmp_path, {
+        'request_id': 'test-root-pair',
+        'job_description_file': write(tmp_path / 'jd.txt', "Python engineer"),
+        'company': 'Acme',
+        'cv_file': write(tmp_path / 'cv.txt', "Python developer"),
+        'github_profile_file': write(tmp_path / 'github.txt', "Python projects"),
+    })
+    results_file = tmp_path / 'results.jsonl'
+
+    summary = batch_runner.run_batch(manifest, str(results_file), max_workers=2, max_iterations=1)
+
+    pair = json.loads(results_file.read_text(encoding='utf-8').splitlines()[0])
+    assert pair['status'] == 'ok', pair.get('error')
+    assert summary['succeeded'] == 1
+    assert not os.path.exists(os.path.join(PROJECT_ROOT, 'src', 'knowledge', 'merged_output_test-root-pair.txt'))
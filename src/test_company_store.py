@@ -0,0 +1,50 @@
+import sqlite3
+import pytest
+from utils.company_store import CompanyStore, normalize_company_name
+
+JOB_DESCRIPTION = "Backend engineer, Python and AWS."
+
+
+@pytest.mark.parametrize('name, normalized', [
+    ('Acme, Inc.', 'acme'),
+    ('ACME Corp', 'acme'),
+    ('Acme Technologies Pvt. Ltd.', 'acme'),
+    ('Acme Data Co', 'acme data'),
+    ('Co', 'co'),
+])
+def test_normalize_company_name(name, normalized):
+    assert normalize_company_name(name) == normalized
+
+
+def test_profiles_are_shared_across_spellings_and_whitespace(tmp_path):
+    store = CompanyStore(store_dir=str(tmp_path))
+    store.put('Acme, Inc.', JOB_DESCRIPTION, 'profile', 'prompt-v1')
+    assert store.get('ACME', '  backend engineer,\nPython and AWS. ', 'prompt-v1') == 'profile'
+    assert store.get('Acme', 'Frontend engineer.', 'prompt-v1') is None
+
+
+def test_profiles_of_another_prompt_or_model_are_misses(tmp_path):
+    store = CompanyStore(store_dir=str(tmp_path))
+    store.put('Acme', JOB_DESCRIPTION, 'profile', 'prompt-v1')
+    assert store.get('Acme', JOB_DESCRIPTION, 'prompt-v2') is None
+    store.put('Acme', JOB_DESCRIPTION, 'new profile', 'prompt-v2')
+    assert store.get('Acme', JOB_DESCRIPTION, 'prompt-v2') == 'new profile'
+    assert store.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_expired_profiles_are_misses(tmp_path):
+    store = CompanyStore(store_dir=str(tmp_path), ttl=0)
+    store.put('Acme', JOB_DESCRIPTION, 'profile', 'prompt-v1')
+    assert store.get('Acme', JOB_DESCRIPTION, 'prompt-v1') is None
+    assert store.purge_expired() == 1
+
+
+def test_profiles_stored_without_a_prompt_fingerprint_are_misses(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'profiles.sqlite'))
+    conn.execute("CREATE TABLE profiles (company TEXT, jd_fingerprint TEXT, display_name TEXT, profile TEXT, stored_at REAL, "
+                 "PRIMARY KEY (company, jd_fingerprint))")
+    conn.commit()
+    conn.close()
+    store = CompanyStore(store_dir=str(tmp_path))
+    store.put('Acme', JOB_DESCRIPTION, 'profile')
+    assert store.get('Acme', JOB_DESCRIPTION, 'prompt-v1') is None
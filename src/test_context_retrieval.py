@@ -0,0 +1,55 @@
+from utils.context_retrieval import ContextRetriever, chunk_report, knowledgebase_context, render_context
+
+KNOWLEDGEBASE = """Scoring rules: top keywords are worth 3 points.
+
+1. Software Development
+    Top Priority Keywords (2)
+        Python
+        React
+2. Cloud Computing
+    Top Priority Keywords (2)
+        AWS
+        Terraform
+"""
+
+REPORTS = [
+    ('JD analysis', "The role needs Kubernetes and Terraform on AWS.\n\nThe team works in two-week sprints."),
+    ('GitHub analysis', "A React dashboard for sales data.\n\nA Terraform module that provisions AWS networking."
+                        "\n\nA chess engine written in C."),
+    ('CV analysis', "Five years of backend work at a bank."),
+]
+
+
+def test_knowledgebase_context_keeps_the_rules_and_one_category():
+    context = knowledgebase_context(KNOWLEDGEBASE, 'Cloud Computing')
+    assert context.startswith('Scoring rules')
+    assert 'Terraform' in context
+    assert 'React' not in context
+
+
+def test_chunk_report_packs_paragraphs_up_to_the_token_budget():
+    text = '\n\n'.join(f"Paragraph {index} " + 'word ' * 40 for index in range(6))
+    chunks = chunk_report(text, chunk_tokens=120)
+    assert len(chunks) > 1
+    assert '\n\n'.join(chunks).split() == text.split()
+
+
+def test_select_ranks_chunks_by_relevance_and_keeps_document_order():
+    retriever = ContextRetriever(REPORTS, chunk_tokens=15)
+    selected = retriever.select('terraform aws', k=2)
+    assert selected == [
+        ('JD analysis', "The role needs Kubernetes and Terraform on AWS."),
+        ('GitHub analysis', "A Terraform module that provisions AWS networking."),
+    ]
+
+
+def test_select_covers_every_matching_report_before_filling_up():
+    retriever = ContextRetriever(REPORTS, chunk_tokens=15)
+    labels = [label for label, _ in retriever.select('react terraform sprints', k=3)]
+    assert sorted(set(labels)) == ['GitHub analysis', 'JD analysis']
+    assert retriever.select('haskell', k=3) == []
+
+
+def test_render_context():
+    rendered = render_context('rules', 'Cloud Computing', [('JD analysis', 'Terraform')])
+    assert rendered == "--- Knowledgebase: Cloud Computing ---\nrules\n\n--- JD analysis (excerpt) ---\nTerraform"
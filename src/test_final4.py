@@ -0,0 +1,28 @@
+import os
+
+# agents.final4 refuses to import without a key; no test here reaches the API
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+
+from agents.final4 import TASK_DEPENDENCIES, critical_path
+
+DURATIONS = {'jd': 10.0, 'company': 30.0, 'github': 20.0, 'cv': 5.0}
+
+
+def test_dependencies_are_declared_in_topological_order():
+    for dependencies in TASK_DEPENDENCIES.values():
+        seen = set()
+        for key, upstream in dependencies.items():
+            assert set(upstream) <= seen
+            seen.add(key)
+
+
+def test_critical_path_of_the_sequential_chain_is_every_task():
+    assert critical_path(TASK_DEPENDENCIES['sequential'], DURATIONS) == (65.0, ['jd', 'company', 'github', 'cv'])
+
+
+def test_critical_path_of_the_dag_runs_through_the_slowest_branch():
+    assert critical_path(TASK_DEPENDENCIES['dag'], DURATIONS) == (35.0, ['company', 'cv'])
+
+
+def test_cached_tasks_take_no_time():
+    assert critical_path(TASK_DEPENDENCIES['dag'], {'github': 20.0, 'cv': 5.0}) == (25.0, ['github', 'cv'])
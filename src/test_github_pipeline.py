@@ -0,0 +1,73 @@
+import io
+import os
+import random
+import threading
+import time
+
+# utils.github_refiner_llm refuses to import without a key; no test here reaches the API
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+
+from utils import github_pipeline
+from utils.github_pipeline import _OrderedWriter, run_github_pipeline
+
+
+def repo(name):
+    return {'name': name, 'url': f'https://github.com/octocat/{name}', 'readme': f'{name} readme'}
+
+
+def test_writer_writes_in_listing_order_and_releases_the_window():
+    output = io.StringIO()
+    window = threading.BoundedSemaphore(4)
+    for _ in range(4):
+        window.acquire()
+    writer = _OrderedWriter(output, window=window)
+
+    writer.deliver(2, repo('c'))
+    writer.deliver(1, None)  # Could not be fetched
+    assert output.getvalue() == ''
+    writer.deliver(0, repo('a'))
+    writer.deliver(3, repo('d'))
+
+    text = output.getvalue()
+    assert text.index('## a') < text.index('## c') < text.index('## d')
+    assert writer.written == 3
+    assert all(window.acquire(blocking=False) for _ in range(4))
+
+
+def test_writer_counts_write_errors_and_keeps_going():
+    writer = _OrderedWriter(io.StringIO())
+    writer.deliver(1, repo('b'))
+    writer.deliver(0, {'name': 'broken', 'readme': 'text'})  # No url: formatting fails
+    assert writer.failed_writes == 1
+    assert writer.written == 1
+
+
+def test_pipeline_writes_out_of_order_results_in_listing_order(tmp_path, monkeypatch):
+    names = [f'repo{index}' for index in range(12)]
+    analyzed = []
+
+    def get_repo_data(url):
+        time.sleep(random.random() / 100)  # Finish out of order
+        if url.endswith('repo5'):
+            raise ValueError('parse error')
+        return {'name': url.rsplit('/', 1)[1], 'url': url, 'readme_content': 'readme'}
+
+    def analyze(repo_data):
+        analyzed.append(repo_data['name'])
+        repo_data['llm_analysis'] = f"analysis of {repo_data['name']}"
+        return repo_data
+
+    monkeypatch.setattr(github_pipeline, 'get_user_repositories',
+                        lambda username: (f'https://github.com/{username}/{name}' for name in names))
+    monkeypatch.setattr(github_pipeline, 'get_repo_data', get_repo_data)
+    monkeypatch.setattr(github_pipeline, 'analyze_repository_with_llm', analyze)
+    refined_file = tmp_path / 'refined.txt'
+
+    summary = run_github_pipeline('octocat', str(refined_file), fetch_workers=4, analysis_workers=3, reorder_window=3)
+
+    text = refined_file.read_text(encoding='utf-8')
+    written = [name for name in names if f'## {name}\n' in text]
+    assert written == [name for name in names if name != 'repo5']
+    assert [text.index(f'## {name}\n') for name in written] == sorted(text.index(f'## {name}\n') for name in written)
+    assert summary['repositories'] == 11
+    assert sorted(analyzed) == sorted(written)
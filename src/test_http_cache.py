@@ -0,0 +1,72 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import requests
+from utils.http_cache import HTTPCache
+
+ETAG = '"v1"'
+LAST_MODIFIED = 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /etag and /last-modified with validators and answers matching conditional requests with 304."""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, dict(self.headers)))
+        if self.path == '/etag':
+            validator, condition = ('ETag', ETAG), self.headers.get('If-None-Match') == ETAG
+        else:
+            validator, condition = ('Last-Modified', LAST_MODIFIED), self.headers.get('If-Modified-Since') == LAST_MODIFIED
+        if condition:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"body of {self.path}".encode('utf-8')
+        self.send_response(200)
+        self.send_header(*validator)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_fresh_entries_are_served_from_disk(tmp_path):
+    server, base_url = start_server()
+    StandInHandler.requests_seen = []
+    try:
+        cache = HTTPCache(cache_dir=str(tmp_path), ttl=3600)
+        first = cache.get(f"{base_url}/etag", requests.get)
+        second = cache.get(f"{base_url}/etag", requests.get)
+    finally:
+        server.shutdown()
+    assert first.text == second.text == 'body of /etag'
+    assert len(StandInHandler.requests_seen) == 1
+    assert cache.stats() == {'hits': 1, 'revalidated': 0, 'misses': 1}
+
+
+def test_expired_entries_are_revalidated(tmp_path):
+    server, base_url = start_server()
+    StandInHandler.requests_seen = []
+    try:
+        cache = HTTPCache(cache_dir=str(tmp_path), ttl=0)
+        for path in ('/etag', '/last-modified'):
+            cache.get(base_url + path, requests.get)
+            response = cache.get(base_url + path, requests.get)
+            assert response.status_code == 200
+            assert response.text == f"body of {path}"
+    finally:
+        server.shutdown()
+    conditional = [headers for _, headers in StandInHandler.requests_seen[1::2]]
+    assert conditional[0].get('If-None-Match') == ETAG
+    assert conditional[1].get('If-Modified-Since') == LAST_MODIFIED
+    assert cache.stats() == {'hits': 0, 'revalidated': 2, 'misses': 2}
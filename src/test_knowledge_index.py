@@ -0,0 +1,34 @@
+from utils import knowledge_index as knowledge_index_module
+from utils.knowledge_index import KnowledgeIndex, IndexedTextFileKnowledgeSource, discard_knowledge_file
+
+
+def test_index_records_and_forgets_sources(tmp_path):
+    index = KnowledgeIndex(index_dir=str(tmp_path))
+    index.put('builder', '/k/a.txt', 'digest-a', ['c1', 'c2'])
+    index.put('builder', '/k/b.txt', 'digest-b', ['c2', 'c3'])
+    index.put('evaluator', '/k/a.txt', 'digest-a', ['c1', 'c2'])
+
+    assert index.get('builder', '/k/a.txt') == ('digest-a', ['c1', 'c2'])
+    assert index.shared('builder', '/k/a.txt', {'c1', 'c2'}) == {'c2'}
+    assert sorted(index.collections('/k/a.txt')) == [('builder', ['c1', 'c2']), ('evaluator', ['c1', 'c2'])]
+
+    index.remove('builder', '/k/a.txt')
+    assert index.get('builder', '/k/a.txt') is None
+    assert index.collections('/k/a.txt') == [('evaluator', ['c1', 'c2'])]
+    assert index.get('builder', '/k/b.txt') == ('digest-b', ['c2', 'c3'])
+
+
+def test_discard_without_collection_keeps_rows_of_unshared_chunks(tmp_path, monkeypatch):
+    index = KnowledgeIndex(index_dir=str(tmp_path / 'index'))
+    monkeypatch.setattr(knowledge_index_module, 'knowledge_index', index)
+    merged = tmp_path / 'merged_output_p1.txt'
+    merged.write_text('analysis', encoding='utf-8')
+    index.put('builder', str(merged), 'digest', ['only-here'])
+    index.put('evaluator', str(merged), 'digest', ['shared'])
+    index.put('evaluator', '/k/knowledgebase.txt', 'digest', ['shared'])
+
+    # Never added to an agent, so there is no collection to delete 'only-here' from
+    discard_knowledge_file(str(merged), [IndexedTextFileKnowledgeSource(file_paths=[merged])])
+
+    assert index.collections(str(merged)) == [('builder', ['only-here'])]
+    assert index.get('evaluator', '/k/knowledgebase.txt') == ('digest', ['shared'])
@@ -0,0 +1,48 @@
+from utils.prompt_assembly import PromptAssembler, CONTEXT_MARKER, MIN_DEDUPLICATED_CHARS, count_tokens
+
+LONG = "The candidate built a distributed job scheduler in Python that processes millions of events per day."
+OTHER = "The company runs its platform on AWS with Kubernetes and values ownership and written communication."
+
+
+def test_repeated_long_paragraphs_are_dropped_and_short_ones_kept():
+    assert len(LONG) >= MIN_DEDUPLICATED_CHARS
+    assembler = PromptAssembler()
+    description = assembler.assemble('cv', f"Analyze the CV.\n\n{CONTEXT_MARKER}\n\nAnswer in English.", [
+        ('JD', f"## Requirements\n\n{LONG}\n\n---"),
+        ('Company', f"## Requirements\n\n{LONG}\n\n{OTHER}\n\n---"),
+    ])
+
+    assert description.count(LONG) == 1
+    assert description.count('## Requirements') == 2
+    assert OTHER in description
+    assert description.startswith('Analyze the CV.') and description.endswith('Answer in English.')
+    report = assembler.reports['cv']
+    assert report['deduplicated'] == count_tokens(LONG)
+    assert report['trimmed'] == 0 and not report['over_budget']
+
+
+def test_paragraphs_of_the_template_are_not_repeated():
+    description = PromptAssembler().assemble('company', f"Research the company.\n\n{LONG}", [('JD', f"{LONG}\n\n{OTHER}")])
+    assert description.count(LONG) == 1
+    assert description.endswith(f"JD:\n{OTHER}\n---")
+
+
+def test_lowest_priority_blocks_are_trimmed_from_their_end_to_fit_the_budget():
+    important = '\n\n'.join(f"Requirement {index}: {LONG}" for index in range(5))
+    extra = '\n\n'.join(f"Detail {index}: {OTHER}" for index in range(20))
+    budget = count_tokens(important) + 150
+    assembler = PromptAssembler(token_budget=budget)
+
+    description = assembler.assemble('cv', "Analyze the CV.", [('JD', important), ('GitHub', extra)])
+
+    assert count_tokens(description) <= budget
+    assert important in description  # The highest-priority block is untouched
+    assert 'Detail 0:' in description and 'Detail 19:' not in description
+    assert 'tokens trimmed to fit the prompt budget]' in description
+    assert assembler.reports['cv']['trimmed'] > 0
+    assert assembler.summary()['trimmed'] == assembler.reports['cv']['trimmed']
+
+
+def test_assembly_is_deterministic():
+    blocks = [('JD', f"{LONG}\n\n{OTHER}"), ('Company', OTHER)]
+    assert PromptAssembler(200).assemble('a', "Task", blocks) == PromptAssembler(200).assemble('b', "Task", blocks)
@@ -0,0 +1,71 @@
+from agents.resume_sections import SectionedResume, ResumeRevision, SectionEdit, canonical_section, section_fingerprint
+
+RESUME = """JANE DOE
+jane@example.com
+
+
+---
+
+
+**SUMMARY**  
+
+Backend engineer with five years of Python.
+
+
+---
+
+
+**TECHNICAL SKILLS**
+
+- Python, SQL
+- AWS
+
+---
+
+## Work Experience
+Engineer at Acme (2020-2024)
+Languages
+English, German
+"""
+
+
+def test_parse_and_render_round_trip():
+    resume = SectionedResume.parse(RESUME)
+    assert resume.names == ['Summary', 'Skills', 'Experience']
+    assert resume.preamble.startswith('JANE DOE\n')
+    assert 'Languages' in resume.get('Experience')  # Unknown headings stay in the section above
+    assert resume.render() == RESUME
+
+
+def test_apply_keeps_the_layout_around_edited_sections():
+    resume = SectionedResume.parse(RESUME)
+    revision = ResumeRevision(edits=[
+        SectionEdit(section='Summary', content='\nBackend engineer with five years of Python and AWS.\n'),
+        SectionEdit(section='Work Experience', content='Senior engineer at Acme (2020-2024)'),
+    ])
+
+    assert resume.apply(revision) == ['Summary', 'Experience']
+    assert resume.render() == (RESUME
+                               .replace('five years of Python.', 'five years of Python and AWS.')
+                               .replace('Engineer at Acme (2020-2024)\nLanguages\nEnglish, German\n',
+                                        'Senior engineer at Acme (2020-2024)\n'))
+
+
+def test_apply_skips_unchanged_and_unknown_sections_and_adds_missing_ones():
+    resume = SectionedResume.parse(RESUME)
+    revision = ResumeRevision(edits=[
+        SectionEdit(section='Skills', content='- Python, SQL\n- AWS'),
+        SectionEdit(section='Hobbies', content='Chess'),
+        SectionEdit(section='Education', content='BSc Computer Science'),
+    ])
+
+    assert resume.apply(revision) == ['Education']
+    assert resume.names == ['Summary', 'Skills', 'Experience', 'Education']
+    assert resume.render().startswith(RESUME)
+
+
+def test_section_names_and_fingerprints():
+    assert canonical_section('## Professional Experience:') == 'Experience'
+    assert canonical_section('Hobbies') is None
+    assert section_fingerprint('Skills', '- Python\n- SQL\n') == section_fingerprint('Skills', '- Python  - SQL')
+    assert section_fingerprint('Skills', '- Python') != section_fingerprint('Summary', '- Python')
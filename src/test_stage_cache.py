@@ -0,0 +1,51 @@
+import time
+from utils.stage_cache import StageCache
+
+
+def test_keys_change_with_any_input():
+    key = StageCache.key_for('final4:jd', model='gpt-4.1', description='Analyze the JD', upstream=[])
+    assert key == StageCache.key_for('final4:jd', upstream=[], description='Analyze the JD', model='gpt-4.1')
+    assert key != StageCache.key_for('final4:jd', model='gpt-4.1', description='Analyze the JD!', upstream=[])
+    assert key != StageCache.key_for('final4:jd', model='gpt-4o', description='Analyze the JD', upstream=[])
+    assert key != StageCache.key_for('final4:jd', model='gpt-4.1', description='Analyze the JD', upstream=['abc'])
+    assert key != StageCache.key_for('final4:cv', model='gpt-4.1', description='Analyze the JD', upstream=[])
+
+
+def test_file_digest_follows_the_file_contents(tmp_path):
+    path = tmp_path / 'report.txt'
+    path.write_text('v1', encoding='utf-8')
+    first = StageCache.file_digest(str(path))
+    path.write_text('v2', encoding='utf-8')
+    assert StageCache.file_digest(str(path)) != first
+
+
+def test_put_get_and_manifest(tmp_path):
+    cache = StageCache(cache_dir=str(tmp_path))
+    key = StageCache.key_for('final4:jd', description='Analyze the JD')
+    assert cache.get(key) is None
+    cache.put(key, 'final4:jd', 'analysis', model='gpt-4.1')
+    assert cache.get(key) == 'analysis'
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+    [entry] = cache.manifest()
+    assert (entry['key'], entry['stage'], entry['size'], entry['model']) == (key, 'final4:jd', 8, 'gpt-4.1')
+
+
+def test_expired_artifacts_are_misses_and_purged(tmp_path):
+    cache = StageCache(cache_dir=str(tmp_path), max_age=0)
+    cache.put('old', 'stage', 'content')
+    assert cache.get('old') is None
+    time.sleep(0.01)
+    cache.put('new', 'stage', 'content')
+    assert [entry['key'] for entry in cache.manifest()] == ['new']
+
+
+def test_least_recently_used_artifacts_are_evicted_over_the_size_limit(tmp_path):
+    cache = StageCache(cache_dir=str(tmp_path), max_bytes=10)
+    cache.put('a', 'stage', 'aaaa')
+    time.sleep(0.01)
+    cache.put('b', 'stage', 'bbbb')
+    time.sleep(0.01)
+    assert cache.get('a') == 'aaaa'  # 'b' is now the least recently used
+    time.sleep(0.01)
+    cache.put('c', 'stage', 'cccc')
+    assert sorted(entry['key'] for entry in cache.manifest()) == ['a', 'c']
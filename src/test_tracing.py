@@ -0,0 +1,23 @@
+from utils.tracing import Tracer
+
+
+def test_spans_nest_per_thread_and_sum_up():
+    tracer = Tracer()
+    with tracer.span('pipeline') as outer:
+        with tracer.span('fetch', 'http') as inner:
+            tracer.annotate(retries=2)
+        tracer.annotate(cache_hits=1)
+    assert inner.parent == outer.id
+    rows = {row['name']: row for row in tracer.summary()}
+    assert rows['fetch']['retries'] == 2
+    assert rows['pipeline']['cache_hits'] == 1
+
+
+def test_only_the_latest_spans_are_kept():
+    tracer = Tracer(max_spans=3)
+    for index in range(5):
+        with tracer.span(f'request {index}'):
+            pass
+    assert [span.name for span in tracer.spans] == ['request 2', 'request 3', 'request 4']
+    tracer.clear()
+    assert len(tracer.spans) == 0 and tracer.spans.maxlen == 3
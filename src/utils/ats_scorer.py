@@ -0,0 +1,239 @@
+import functools
+import os
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_KNOWLEDGEBASE_FILE = os.path.join(PROJECT_ROOT, 'knowledge', 'knowledgebase.txt')
+TIER_POINTS = {'top': 3, 'medium': 2, 'low': 1}  # Scoring rule of the knowledgebase
+# Keywords that are ordinary words or letters unless written in their own case ('Go' vs 'go'); single letters always are
+CASE_SENSITIVE_KEYWORDS = {'Go', 'C'}
+
+CATEGORY_RE = re.compile(r'^\s*\d+\.\s+(.+?)\s*$')
+TIER_RE = re.compile(r'^\s*(Top|Medium|Low) Priority Keywords\b', re.IGNORECASE)
+EXAMPLES_RE = re.compile(r'\(e\.g\.,?\s*([^)]*)\)')
+PARENTHESIS_RE = re.compile(r'\s*\(([^)]*)\)')
+
+# Common spellings of knowledgebase keywords that are not derivable from the keyword itself
+SYNONYMS = {
+    'JavaScript': ['JS', 'ECMAScript', 'ES6'],
+    'TypeScript': ['TS'],
+    'Node.js': ['NodeJS', 'Node'],
+    'Vue.js': ['Vue', 'VueJS'],
+    'React': ['React.js', 'ReactJS'],
+    'C#': ['CSharp', 'C Sharp'],
+    '.NET': ['dotnet', '.NET Core', 'ASP.NET'],
+    'REST APIs': ['REST API', 'RESTful', 'RESTful APIs', 'REST'],
+    'SQL': ['PostgreSQL', 'MySQL', 'SQLite', 'T-SQL'],
+    'Git': ['GitHub', 'GitLab'],
+    'CI/CD': ['CI CD', 'continuous integration', 'continuous delivery', 'continuous deployment', 'GitHub Actions'],
+    'Kubernetes': ['k8s'],
+    'Agile Methodology': ['Agile', 'Scrum'],
+    'Microservices': ['microservice', 'micro services'],
+    'NoSQL': ['MongoDB', 'Cassandra', 'DynamoDB'],
+    'Scikit-learn': ['sklearn', 'scikit learn'],
+    'Machine Learning': ['ML'],
+    'Microsoft Azure': ['Azure'],
+    'Google Cloud Platform (GCP)': ['Google Cloud'],
+    'Google Cloud': ['GCP', 'Google Cloud Platform'],
+    'AWS': ['Amazon Web Services'],
+    'Lambda Functions': ['AWS Lambda', 'Lambda'],
+    'Large Language Models': ['LLM', 'LLMs'],
+    'Problem-solving': ['problem solver'],
+    'Teamwork': ['team player'],
+    'Leadership': ['led a team', 'team lead'],
+}
+
+
+class AhoCorasick:
+    """Multi-pattern matcher finding every occurrence of a set of strings in one pass over the text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str):
+        """Yields (end index, pattern) for every pattern occurrence in text."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                yield index + 1, pattern
+
+
+def _normalize(text: str) -> str:
+    """Lowercases, treats hyphens as spaces and collapses whitespace, so 'Problem-solving' matches 'problem solving'."""
+    return ' '.join(text.lower().replace('-', ' ').split())
+
+
+def _aliases(keyword: str) -> Set[str]:
+    """Returns the spellings that count as a match for a knowledgebase keyword."""
+    aliases = {keyword}
+    examples = EXAMPLES_RE.search(keyword)
+    if examples:  # 'Monitoring (e.g., Prometheus, Grafana)' -> Monitoring, Prometheus, Grafana
+        aliases.update(example.strip() for example in examples.group(1).split(','))
+        aliases.add(EXAMPLES_RE.sub('', keyword))
+    else:
+        inner = PARENTHESIS_RE.search(keyword)
+        if inner:  # 'Natural Language Processing (NLP)' -> both the long and the short form
+            aliases.add(inner.group(1))
+            aliases.add(PARENTHESIS_RE.sub('', keyword))
+    for alias in list(aliases):
+        if alias.endswith('s') and len(alias) > 4 and not alias.endswith('ss'):
+            aliases.add(alias[:-1])  # 'REST APIs' -> 'REST API'
+    aliases.update(SYNONYMS.get(keyword, []))
+    return {_normalize(alias) for alias in aliases if alias.strip()}
+
+
+def parse_knowledgebase(text: str) -> Dict[str, Dict[str, List[str]]]:
+    """Parses knowledgebase.txt into {category: {'top'|'medium'|'low': [keywords]}}."""
+    categories = {}
+    category = tier = None
+    for line in text.splitlines():
+        tier_match = TIER_RE.match(line)
+        if tier_match and category:
+            tier = tier_match.group(1).lower()
+            categories[category][tier] = []
+            continue
+        category_match = CATEGORY_RE.match(line)
+        if category_match:
+            category = category_match.group(1)
+            categories[category] = {}
+            tier = None
+            continue
+        if category and tier and line.strip():
+            categories[category][tier].append(line.strip())
+    return categories
+
+
+class ATSScorer:
+    """Deterministic ATS scorer compiled from the knowledgebase keyword tables.
+
+    All keyword spellings of all categories are compiled into one Aho-Corasick
+    automaton, so scoring a resume is a single pass over its text. Matches
+    must start and end on word boundaries ('Java' does not match 'JavaScript')
+    and ambiguous keywords (single letters such as 'R' and CASE_SENSITIVE_KEYWORDS)
+    must match case-sensitively; 'js' or 'c#' still count.
+    """
+
+    def __init__(self, categories: Dict[str, Dict[str, List[str]]]):
+        self.categories = categories
+        self._keywords_by_alias = {}
+        for tiers in categories.values():
+            for keywords in tiers.values():
+                for keyword in keywords:
+                    for alias in _aliases(keyword):
+                        self._keywords_by_alias.setdefault(alias, set()).add(keyword)
+        self._matcher = AhoCorasick(self._keywords_by_alias)
+        self._case_sensitive = {alias for alias, keywords in self._keywords_by_alias.items()
+                                if len(alias) == 1 or any(_normalize(keyword) == alias for keyword in CASE_SENSITIVE_KEYWORDS)}
+        self._categories_per_keyword = {}
+        for tiers in categories.values():
+            for keyword in {keyword for keywords in tiers.values() for keyword in keywords}:
+                self._categories_per_keyword[keyword] = self._categories_per_keyword.get(keyword, 0) + 1
+
+    @classmethod
+    def from_file(cls, knowledgebase_file: str = DEFAULT_KNOWLEDGEBASE_FILE) -> 'ATSScorer':
+        with open(knowledgebase_file, 'r', encoding='utf-8') as f:
+            return cls(parse_knowledgebase(f.read()))
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """Returns the knowledgebase keywords (in their canonical spelling) present in text."""
+        normalized = _normalize(text)
+        cased = ' '.join(text.replace('-', ' ').split())  # Same character positions as normalized
+        if len(cased) != len(normalized):  # Lowercasing changed the length of some character
+            cased = normalized
+        found = set()
+        for end, alias in self._matcher.find(normalized):
+            start = end - len(alias)
+            if (start > 0 and normalized[start - 1].isalnum()) or (end < len(normalized) and normalized[end].isalnum()):
+                continue
+            if alias in self._case_sensitive and cased[start:end] not in self._keywords_by_alias[alias]:
+                continue
+            found.update(self._keywords_by_alias[alias])
+        return found
+
+    def _points(self, category: str, found: Set[str]) -> int:
+        return sum(TIER_POINTS[tier] for tier, keywords in self.categories[category].items() for keyword in keywords if keyword in found)
+
+    def classify(self, text: str) -> str:
+        """Returns the category whose keywords score highest in text (e.g. a job description).
+
+        Keywords listed in several categories (Python, AWS, Communication)
+        count for each of them in proportion, so the keywords specific to a
+        category decide between categories that share many.
+        """
+        found = self.find_keywords(text)
+        return max(self.categories, key=lambda category: sum(
+            TIER_POINTS[tier] / self._categories_per_keyword[keyword]
+            for tier, keywords in self.categories[category].items() for keyword in keywords if keyword in found))
+
+    def score(self, resume_text: str, category: str = None) -> Dict:
+        """Scores a resume against one category's keyword tables.
+
+        Args:
+            resume_text (str): The resume.
+            category (str, optional): Knowledgebase category; the best-matching
+                one for the resume itself if omitted (use classify on the job
+                description to score against the target job's category).
+
+        Returns:
+            dict: 'category', 'points', 'max_points', 'score' (points as a
+                  percentage of max_points) and 'matched' / 'missing' keyword
+                  lists per tier.
+        """
+        found = self.find_keywords(resume_text)
+        category = category or max(self.categories, key=lambda name: self._points(name, found))
+        tiers = self.categories[category]
+        max_points = sum(TIER_POINTS[tier] * len(keywords) for tier, keywords in tiers.items())
+        points = self._points(category, found)
+        return {
+            'category': category,
+            'points': points,
+            'max_points': max_points,
+            'score': round(100 * points / max_points) if max_points else 0,
+            'matched': {tier: [keyword for keyword in keywords if keyword in found] for tier, keywords in tiers.items()},
+            'missing': {tier: [keyword for keyword in keywords if keyword not in found] for tier, keywords in tiers.items()},
+        }
+
+
+@functools.lru_cache(maxsize=4)
+def _load_scorer(knowledgebase_file: str, mtime: float) -> ATSScorer:
+    return ATSScorer.from_file(knowledgebase_file)
+
+
+def load_scorer(knowledgebase_file: str = DEFAULT_KNOWLEDGEBASE_FILE) -> ATSScorer:
+    """Returns the compiled scorer for a knowledgebase file, recompiling only when the file changes."""
+    path = os.path.abspath(knowledgebase_file)
+    return _load_scorer(path, os.path.getmtime(path))
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from .tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'companies')
+DEFAULT_TTL = 7 * 24 * 60 * 60  # Seconds a company profile is reused before it is researched again
+
+# Legal-form suffixes dropped when normalising company names
+COMPANY_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+    'plc', 'gmbh', 'ag', 'sa', 'bv', 'pvt', 'private', 'technologies', 'technology',
+}
+
+
+def normalize_company_name(company_name: str) -> str:
+    """Lowercase a company name and strip punctuation and legal-form suffixes ('Acme, Inc.' -> 'acme')."""
+    words = re.sub(r'[^\w\s]', ' ', company_name.lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def jd_fingerprint(job_description: str) -> str:
+    """Hash of a job description that ignores case and whitespace differences."""
+    normalized = ' '.join(job_description.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class CompanyStore:
+    """Persistent store of company intelligence reports shared across candidates.
+
+    Reports are keyed on the normalised company name and the fingerprint of
+    the job description they were researched for, and expire after ``ttl``
+    seconds. Each report also records the fingerprint of the prompt (task
+    description, expected output, agent and model) it was researched with;
+    a lookup with a different prompt fingerprint is a miss.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, ttl: float = DEFAULT_TTL):
+        self.store_dir = store_dir
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Opened lazily so that importing a module that owns a store does not touch the disk
+        if self._conn is None:
+            os.makedirs(self.store_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.store_dir, 'profiles.sqlite'), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "company TEXT, jd_fingerprint TEXT, display_name TEXT, profile TEXT, stored_at REAL, "
+                "prompt_fingerprint TEXT, PRIMARY KEY (company, jd_fingerprint))"
+            )
+            columns = [column[1] for column in self._conn.execute("PRAGMA table_info(profiles)")]
+            if 'prompt_fingerprint' not in columns:  # Store created before prompts were fingerprinted
+                self._conn.execute("ALTER TABLE profiles ADD COLUMN prompt_fingerprint TEXT")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, company_name: str, job_description: str, prompt_fingerprint: Optional[str] = None) -> Optional[str]:
+        """Returns the stored report for this company and job description, or None if missing or expired.
+
+        With prompt_fingerprint, a report researched with another prompt counts as missing.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT profile, stored_at, prompt_fingerprint FROM profiles WHERE company = ? AND jd_fingerprint = ?",
+                (normalize_company_name(company_name), jd_fingerprint(job_description))
+            ).fetchone()
+            if row and time.time() - row[1] < self.ttl and (prompt_fingerprint is None or row[2] == prompt_fingerprint):
+                self.hits += 1
+                tracer.annotate(cache_hits=1)
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, company_name: str, job_description: str, profile: str, prompt_fingerprint: Optional[str] = None) -> None:
+        """Stores a company intelligence report and the fingerprint of the prompt it was researched with."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (company, jd_fingerprint, display_name, profile, stored_at, prompt_fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_company_name(company_name), jd_fingerprint(job_description), company_name, profile, time.time(),
+                 prompt_fingerprint)
+            )
+            conn.commit()
+
+    def purge_expired(self) -> int:
+        """Deletes expired reports and returns how many were removed."""
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM profiles WHERE stored_at < ?", (time.time() - self.ttl,)).rowcount
+            conn.commit()
+            return removed
+
+    def stats(self) -> Dict:
+        """Returns the hit / miss counters as a dictionary."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,111 @@
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+from .ats_scorer import CATEGORY_RE
+from .knowledge_index import SECTION_SEPARATOR_RE
+from .prompt_assembly import PARAGRAPH_SPLIT_RE, count_tokens
+
+# --- Configuration ---
+DEFAULT_TOP_K = 6  # Report chunks handed to each task
+DEFAULT_CHUNK_TOKENS = 300  # Target size of a report chunk
+
+TERM_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')  # Keeps 'c++', 'c#' and 'node.js' whole
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _terms(text: str) -> List[str]:
+    return [term.rstrip('.') for term in TERM_RE.findall(text.lower())]
+
+
+def knowledgebase_context(knowledgebase_text: str, category: str) -> str:
+    """Returns the knowledgebase's scoring rules followed by the keyword tables of one category."""
+    preamble, block = [], []
+    current = None
+    for line in knowledgebase_text.splitlines():
+        match = CATEGORY_RE.match(line)
+        if match:
+            current = match.group(1)
+        if current is None:
+            preamble.append(line)
+        elif current == category:
+            block.append(line)
+    return '\n'.join(preamble + [''] + block).strip()
+
+
+def chunk_report(text: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[str]:
+    """Packs a report's paragraphs into chunks of about chunk_tokens; longer paragraphs are split by line."""
+    pieces = []
+    for paragraph in PARAGRAPH_SPLIT_RE.split(text):
+        if not paragraph.strip():
+            continue
+        if count_tokens(paragraph) > chunk_tokens:
+            pieces.extend(line for line in paragraph.splitlines() if line.strip())
+        else:
+            pieces.append(paragraph.strip('\n'))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+class ContextRetriever:
+    """Selects the stage-1 report chunks most relevant to a task with BM25.
+
+    The reports are split into chunks of a few hundred tokens. A selection
+    takes the best-matching chunk of every report that matches the query at
+    all, fills up to k chunks by score and returns them in document order.
+    """
+
+    def __init__(self, reports: List[Tuple[str, str]], chunk_tokens: int = DEFAULT_CHUNK_TOKENS):
+        self.chunks = []  # (report label, chunk text)
+        for label, text in reports:
+            for section in SECTION_SEPARATOR_RE.split(text):
+                self.chunks.extend((label, chunk) for chunk in chunk_report(section, chunk_tokens))
+        self.total_tokens = sum(count_tokens(chunk) for _, chunk in self.chunks)
+        self._term_counts = [Counter(_terms(chunk)) for _, chunk in self.chunks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        self._idf = {term: math.log(1 + (len(self.chunks) - frequency + 0.5) / (frequency + 0.5))
+                     for term, frequency in document_frequency.items()}
+
+    def _score(self, index: int, query_terms: set) -> float:
+        counts, length = self._term_counts[index], self._lengths[index]
+        score = 0.0
+        for term in query_terms:
+            frequency = counts.get(term)
+            if frequency:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self._average_length or 1))
+                score += self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return score
+
+    def select(self, query: str, k: int = DEFAULT_TOP_K) -> List[Tuple[str, str]]:
+        """Returns up to k (report label, chunk) pairs relevant to query, in document order."""
+        query_terms = set(_terms(query))
+        scores = [self._score(index, query_terms) for index in range(len(self.chunks))]
+        ranked = [index for index in sorted(range(len(self.chunks)), key=lambda index: -scores[index]) if scores[index] > 0]
+        chosen = []
+        for label in dict.fromkeys(label for label, _ in self.chunks):
+            best = next((index for index in ranked if self.chunks[index][0] == label), None)
+            if best is not None and len(chosen) < k:
+                chosen.append(best)
+        chosen.extend(index for index in ranked if index not in chosen)
+        return [self.chunks[index] for index in sorted(chosen[:k])]
+
+
+def render_context(knowledge: str, category: str, chunks: List[Tuple[str, str]]) -> str:
+    """Renders the category knowledge and the selected report chunks as one context block."""
+    parts = [f"--- Knowledgebase: {category} ---\n{knowledge}"]
+    for label, chunk in chunks:
+        parts.append(f"--- {label} (excerpt) ---\n{chunk}")
+    return '\n\n'.join(parts)
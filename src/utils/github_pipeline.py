@@ -0,0 +1,204 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from .tracing import tracer
+from .github_scraper_new import get_user_repositories, get_repo_data, DEFAULT_MAX_WORKERS
+from .github_refiner_llm import (records_to_repositories, analyze_repository_with_llm, analyze_repository_batch,
+                                 pack_repositories, format_repository_section, OUTPUT_HEADER, DEFAULT_MAX_CONCURRENCY)
+
+# Fetched repositories allowed to wait for analysis before fetchers block
+DEFAULT_QUEUE_SIZE = 16
+# Repositories in flight (fetching, queued, analyzing or waiting for an earlier one to be written)
+DEFAULT_REORDER_WINDOW = 64
+
+_DONE = object()
+
+
+class _OrderedWriter:
+    """Writes pipeline results to the output files in listing order as soon as they are contiguous.
+
+    Every index taken off the pending buffer releases one slot of window, the
+    semaphore the producer acquires before submitting a repository, which
+    bounds how many results can pile up behind a slow one.
+    """
+
+    def __init__(self, refined_file, records_file=None, window=None):
+        self.refined_file = refined_file
+        self.records_file = records_file
+        self.window = window
+        self.written = 0
+        self.failed_writes = 0
+        self._pending = {}
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    def deliver(self, index, repo):
+        with self._lock:
+            self._pending[index] = repo
+            while self._next_index in self._pending:
+                repo = self._pending.pop(self._next_index)
+                self._next_index += 1
+                try:
+                    self._write(repo)
+                except Exception as e:
+                    # A bad repository must not stall the ones queued behind it
+                    print(f"Error writing repository {repo.get('name') if repo else None}: {e}")
+                    self.failed_writes += 1
+                finally:
+                    if self.window is not None:
+                        self.window.release()
+
+    def _write(self, repo):
+        if repo is None:  # Repository could not be fetched or parsed
+            return
+        if self.records_file:
+            record = {key: value for key, value in repo.items() if key not in ('readme', 'llm_analysis', 'llm_latency', 'llm_error')}
+            self.records_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        section = format_repository_section(repo)
+        if section is not None:
+            self.refined_file.write('\n' + section)
+        self.written += 1
+
+
+@tracer.traced('github_pipeline')
+def run_github_pipeline(username: str, refined_output_file: str, records_output_file: Optional[str] = None,
+                        fetch_workers: int = DEFAULT_MAX_WORKERS, analysis_workers: int = DEFAULT_MAX_CONCURRENCY,
+                        queue_size: int = DEFAULT_QUEUE_SIZE, reorder_window: int = DEFAULT_REORDER_WINDOW,
+                        pack_token_budget: Optional[int] = None) -> Dict:
+    """Scrape and analyze a GitHub user's repositories as one streaming pipeline.
+
+    Repository URLs are listed lazily, fetched on a pool of fetch_workers and
+    handed to analysis_workers through a bounded queue, so the LLM analysis of
+    the first repository starts while later ones are still being listed and
+    fetched. The refined output (same content as format_output) and,
+    optionally, the JSONL records are written incrementally in listing order.
+    At most reorder_window repositories are in flight at once, so a slow early
+    fetch holds back the listing instead of buffering every later result.
+
+    With pack_token_budget set, an analysis worker packs the repositories
+    already waiting in the queue into one request of at most that many README
+    tokens (see analyze_repository_batch) instead of one request each.
+
+    Args:
+        username (str): The GitHub username.
+        refined_output_file (str): Path for the refined analysis text file.
+        records_output_file (str, optional): Path for the JSONL repository records.
+        fetch_workers (int): Repository pages fetched at the same time.
+        analysis_workers (int): LLM analyses running at the same time.
+        queue_size (int): Fetched repositories buffered ahead of analysis.
+        reorder_window (int): Repositories in flight at once, including the ones
+            waiting to be written behind an earlier one.
+        pack_token_budget (int, optional): README tokens packed into one analysis request.
+
+    Returns:
+        dict: 'repositories' (number fetched and analyzed), 'failed_analyses'
+              and 'seconds' (end-to-end wall time).
+
+    Raises:
+        Exception: Whatever listing the repositories raised, once the
+            repositories listed before the error have been written.
+    """
+    start = time.perf_counter()
+    work_queue = queue.Queue(maxsize=queue_size)
+    window = threading.BoundedSemaphore(reorder_window)
+    failed_analyses = []
+    producer_errors = []
+
+    def fetch(index, repo_url):
+        # Every listed index must reach the writer, otherwise later results would wait forever
+        try:
+            repo_data = get_repo_data(repo_url)
+        except Exception as e:
+            print(f"Error fetching data for {repo_url}: {e}")
+            repo_data = None
+        work_queue.put((index, repo_data))
+
+    def list_and_fetch():
+        try:
+            with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+                for index, repo_url in enumerate(get_user_repositories(username)):
+                    window.acquire()
+                    executor.submit(fetch, index, repo_url)
+        except Exception as e:
+            producer_errors.append(e)
+        finally:
+            for _ in range(analysis_workers):
+                work_queue.put(_DONE)
+
+    def analyze_items(items):
+        repos = {}
+        for index, repo_data in items:
+            try:
+                if repo_data:
+                    repos[index] = records_to_repositories([repo_data])[0]
+            except Exception as e:
+                print(f"Error analyzing repository {repo_data.get('name')}: {e}")
+                failed_analyses.append(repo_data.get('name'))
+        try:
+            if len(repos) > 1:
+                analyze_repository_batch(list(repos.values()))
+            elif repos:
+                analyze_repository_with_llm(next(iter(repos.values())))
+        except Exception as e:
+            for repo in repos.values():
+                print(f"Error analyzing repository {repo.get('name')}: {e}")
+                repo['llm_error'] = str(e)
+        failed_analyses.extend(repo['name'] for repo in repos.values() if 'llm_error' in repo)
+        # Always delivered, so the writer never waits on these indexes and the queue keeps draining
+        for index, _ in items:
+            writer.deliver(index, repos.get(index))
+
+    def fits(items):
+        repos = records_to_repositories(repo_data for _, repo_data in items if repo_data)
+        return len(pack_repositories(repos, pack_token_budget)) <= 1
+
+    def analyze():
+        carry = None
+        while True:
+            item = work_queue.get() if carry is None else carry
+            carry = None
+            if item is _DONE:
+                return
+            items = [item]
+            if pack_token_budget:
+                # Pack the repositories already waiting in the queue into the same request
+                while True:
+                    try:
+                        item = work_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE or not fits(items + [item]):
+                        carry = item
+                        break
+                    items.append(item)
+            analyze_items(items)
+
+    records_file = open(records_output_file, 'w', encoding='utf-8') if records_output_file else None
+    try:
+        with open(refined_output_file, 'w', encoding='utf-8') as refined_file:
+            refined_file.write(OUTPUT_HEADER)
+            writer = _OrderedWriter(refined_file, records_file, window)
+
+            producer = threading.Thread(target=list_and_fetch, name='github-fetch')
+            producer.start()
+            with ThreadPoolExecutor(max_workers=analysis_workers) as executor:
+                for _ in range(analysis_workers):
+                    executor.submit(analyze)
+            producer.join()
+    finally:
+        if records_file:
+            records_file.close()
+    if producer_errors:
+        raise producer_errors[0]
+
+    summary = {
+        'repositories': writer.written,
+        'failed_analyses': len(failed_analyses) + writer.failed_writes,
+        'seconds': time.perf_counter() - start,
+    }
+    print(f"GitHub pipeline: {summary['repositories']} repositories fetched and analyzed in {summary['seconds']:.1f}s "
+          f"({summary['failed_analyses']} analyses failed)")
+    return summary
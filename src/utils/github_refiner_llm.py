@@ -1,8 +1,14 @@
+import json
 import re
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Optional
 from openai import OpenAI  # Changed from groq
 import os
 from dotenv import load_dotenv
+from .llm_cache import LLMCache
+from .repo_records import read_repo_records
+from .tracing import tracer
 
 load_dotenv()
 if not os.getenv("OPENAI_API_KEY"):
@@ -13,12 +19,38 @@ client = OpenAI(
     api_key=os.getenv('OPENAI_API_KEY')
 )
 
+# Persistent cache of repository analyses; set to None to always call OpenAI
+llm_cache = LLMCache()
+
+# Maximum number of repository analyses sent to OpenAI at the same time
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Estimated README tokens packed into one request by pack_repositories
+DEFAULT_PACK_TOKEN_BUDGET = 6000
+
+PACKED_PROMPT_PREAMBLE = """Analyze each of the following GitHub repositories and provide key insights.
+
+For every repository provide a concise analysis covering:
+1. Main purpose and key features
+2. Technical stack and technologies used
+3. Project significance and potential applications
+4. Code quality indicators (based on README structure and documentation)
+
+Format each analysis in markdown. Respond with a JSON object of the form
+{"analyses": [{"id": <repository number>, "analysis": "<markdown analysis>"}]}
+containing exactly one entry for every repository below."""
+
 def read_github_data(file_path: str) -> str:
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     return content
 
 def parse_repositories(content: str) -> List[Dict]:
+    """Parse the legacy save_to_text export back into repositories.
+
+    Prefer records_to_repositories with records from read_repo_records or the
+    scraper, which needs no parsing of free text.
+    """
     repositories = []
     repo_sections = content.split('==========\n\n')
     
@@ -29,23 +61,39 @@ def parse_repositories(content: str) -> List[Dict]:
         repo_data = {}
         lines = section.strip().split('\n')
         
-        for line in lines:
+        for index, line in enumerate(lines):
             if line.startswith('Repository: '):
                 repo_data['name'] = line.replace('Repository: ', '').strip()
             elif line.startswith('URL: '):
                 repo_data['url'] = line.replace('URL: ', '').strip()
             elif line.startswith('README Content:'):
-                readme_start = lines.index(line)
-                readme_content = '\n'.join(lines[readme_start + 1:])
+                # Everything after this line is README text, which may itself contain "Repository: " lines
+                readme_content = '\n'.join(lines[index + 1:])
                 repo_data['readme'] = readme_content.strip()
+                break
         
         if repo_data:
             repositories.append(repo_data)
     
     return repositories
 
-def analyze_repository_with_llm(repo_data: Dict) -> Dict:
-    """Use OpenAI's gpt-4o-mini to analyze repository content and generate insights."""  # Updated docstring
+def records_to_repositories(records: Iterable[Dict]) -> List[Dict]:
+    """Convert scraper records (get_repo_data dictionaries) into repositories ready for analysis."""
+    return [{**record, 'readme': record.get('readme_content', 'No Readme')} for record in records]
+
+def _record_usage(completion) -> None:
+    """Adds the token usage of a completion to the current trace span."""
+    usage = getattr(completion, 'usage', None)
+    if usage is not None:
+        tracer.annotate(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+@tracer.traced('github.llm_analysis', 'llm')
+def analyze_repository_with_llm(repo_data: Dict, use_cache: bool = True) -> Dict:
+    """Use OpenAI's gpt-4o-mini to analyze repository content and generate insights.
+
+    Responses are served from llm_cache when the same prompt was analyzed with
+    the same model parameters before; pass use_cache=False to always call OpenAI.
+    """
     prompt = f"""Analyze this GitHub repository and provide key insights:
 
 Repository Name: {repo_data['name']}
@@ -62,48 +110,211 @@ Provide a concise analysis covering:
 
 Format the response in markdown."""
 
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",  # Changed model
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=1000
-    )
+    request = {
+        'model': "gpt-4o-mini",  # Changed model
+        'messages': [{"role": "user", "content": prompt}],
+        'temperature': 0.3,
+        'max_tokens': 1000
+    }
 
-    repo_data['llm_analysis'] = completion.choices[0].message.content
+    cache = llm_cache if use_cache else None
+    cache_key = LLMCache.key_for(request) if cache else None
+    analysis = cache.get(cache_key) if cache else None
+
+    if analysis is None:
+        completion = client.chat.completions.create(**request)
+        _record_usage(completion)
+        analysis = completion.choices[0].message.content
+        if cache and analysis:
+            cache.put(cache_key, analysis)
+
+    repo_data['llm_analysis'] = analysis
     return repo_data
 
-def format_output(repositories: List[Dict]) -> str:
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting, about four characters per token for English text."""
+    return len(text) // 4 + 1
+
+def _repository_block(repo_id: int, repo_data: Dict) -> str:
+    return f"""### Repository {repo_id}
+Repository Name: {repo_data['name']}
+Repository URL: {repo_data['url']}
+
+README Content:
+{repo_data['readme'][:2000]}"""
+
+def pack_repositories(repositories: List[Dict], token_budget: int = DEFAULT_PACK_TOKEN_BUDGET) -> List[List[Dict]]:
+    """Group repositories, in order, into batches whose README blocks fit the token budget.
+
+    A repository that is larger than the budget on its own gets a batch to itself.
+    """
+    batches = []
+    current = []
+    used = 0
+    for repo in repositories:
+        cost = estimate_tokens(_repository_block(len(current) + 1, repo))
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(repo)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _split_packed_response(content: str, count: int) -> Dict[int, str]:
+    """Map repository ids (1-based) to their analyses; returns an empty dict if the response is malformed."""
+    try:
+        entries = json.loads(content).get('analyses')
+    except (ValueError, AttributeError):
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    analyses = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        repo_id = entry.get('id')
+        analysis = entry.get('analysis')
+        if isinstance(repo_id, int) and 1 <= repo_id <= count and isinstance(analysis, str) and analysis.strip():
+            analyses[repo_id] = analysis.strip()
+    return analyses
+
+@tracer.traced('github.llm_batch', 'llm')
+def analyze_repository_batch(batch: List[Dict], use_cache: bool = True) -> List[Dict]:
+    """Analyze several repositories with one packed request sharing a single instruction preamble.
+
+    The model answers with a JSON object holding one analysis per repository,
+    which is split back into each repository's 'llm_analysis'. Repositories the
+    response does not cover (or all of them, if it is not valid JSON) are
+    analyzed with single-repository calls instead.
+    """
+    if len(batch) == 1:
+        return [analyze_repository_with_llm(batch[0], use_cache)]
+
+    blocks = '\n\n'.join(_repository_block(repo_id, repo) for repo_id, repo in enumerate(batch, start=1))
+    request = {
+        'model': "gpt-4o-mini",
+        'messages': [{"role": "user", "content": f"{PACKED_PROMPT_PREAMBLE}\n\n{blocks}"}],
+        'temperature': 0.3,
+        'max_tokens': min(1000 * len(batch), 16000),
+        'response_format': {"type": "json_object"}
+    }
+
+    cache = llm_cache if use_cache else None
+    cache_key = LLMCache.key_for(request) if cache else None
+    content = cache.get(cache_key) if cache else None
+    from_cache = content is not None
+
+    if content is None:
+        completion = client.chat.completions.create(**request)
+        _record_usage(completion)
+        content = completion.choices[0].message.content or ''
+
+    analyses = _split_packed_response(content, len(batch))
+    if cache and not from_cache and len(analyses) == len(batch):
+        cache.put(cache_key, content)
+
+    for repo_id, repo in enumerate(batch, start=1):
+        if repo_id in analyses:
+            repo['llm_analysis'] = analyses[repo_id]
+            continue
+        print(f"Packed analysis missing for repository {repo.get('name')}, falling back to a single call.")
+        try:
+            analyze_repository_with_llm(repo, use_cache)
+        except Exception as e:
+            print(f"Error analyzing repository {repo.get('name')}: {e}")
+            repo['llm_error'] = str(e)
+    return batch
+
+def _analyze_batch_timed(batch: List[Dict]) -> List[Dict]:
+    """Runs analyze_repository_batch, recording its latency and isolating failures."""
+    start = time.perf_counter()
+    try:
+        analyze_repository_batch(batch)
+    except Exception as e:
+        for repo in batch:
+            print(f"Error analyzing repository {repo.get('name')}: {e}")
+            repo['llm_error'] = str(e)
+    latency = time.perf_counter() - start
+    for repo in batch:
+        repo['llm_latency'] = latency
+    return batch
+
+def analyze_repositories(repositories: List[Dict], max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                         pack_token_budget: Optional[int] = None) -> List[Dict]:
+    """Analyze several repositories concurrently with the LLM.
+
+    By default every repository is one analyze_repository_with_llm call. With
+    pack_token_budget set, repositories are packed into shared requests of at
+    most that many README tokens (see analyze_repository_batch).
+
+    Results keep the input order. A failed call leaves the repository without
+    'llm_analysis' and stores the error under 'llm_error'; every repository
+    gets the latency in seconds of the call that analyzed it under 'llm_latency'.
+    """
+    if not repositories:
+        return []
+
+    if pack_token_budget:
+        batches = pack_repositories(repositories, pack_token_budget)
+    else:
+        batches = [[repo] for repo in repositories]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = [repo for batch in executor.map(_analyze_batch_timed, batches) for repo in batch]
+
+    latencies = [batch[0]['llm_latency'] for batch in batches]
+    failed = sum(1 for repo in results if 'llm_error' in repo)
+    print(f"Analyzed {len(results)} repositories in {len(batches)} requests, {time.perf_counter() - start:.1f}s "
+          f"(per call: avg {sum(latencies) / len(latencies):.1f}s, max {max(latencies):.1f}s, {failed} failed)")
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.stats()}")
+    return results
+
+OUTPUT_HEADER = '# Enhanced GitHub Repository Analysis\n'
+
+def format_repository_section(repo: Dict) -> Optional[str]:
+    """Format one analyzed repository for format_output, or None if it has no README."""
+    if not repo.get('readme') or repo['readme'] == 'No Readme':
+        return None
+
     output = []
-    output.append('# Enhanced GitHub Repository Analysis\n')
+    output.append(f"## {repo['name']}")
+    output.append(f"Repository URL: {repo['url']}\n")
+    
+    # Add LLM analysis
+    if repo.get('llm_analysis'):
+        output.append(repo['llm_analysis'])
+    
+    output.append('\n---\n')
+    return '\n'.join(output)
+
+def format_output(repositories: List[Dict]) -> str:
+    output = [OUTPUT_HEADER]
     
     for repo in repositories:
-        if not repo.get('readme') or repo['readme'] == 'No Readme':
-            continue
-            
-        output.append(f"## {repo['name']}")
-        output.append(f"Repository URL: {repo['url']}\n")
-        
-        # Add LLM analysis
-        if repo.get('llm_analysis'):
-            output.append(repo['llm_analysis'])
-        
-        output.append('\n---\n')
+        section = format_repository_section(repo)
+        if section is not None:
+            output.append(section)
     
     return '\n'.join(output)
 
 def main():
-    input_file = 'd:/vs code/ml/crewAi/github/output_github.txt'
+    input_file = 'd:/vs code/ml/crewAi/github/output_github.jsonl'
     output_file = 'd:/vs code/ml/crewAi/github/refined_output_github_llm.txt'
     
-    # Read and parse the input file
-    content = read_github_data(input_file)
-    repositories = parse_repositories(content)
+    # Read the scraped records, falling back to parsing a legacy text export
+    if input_file.endswith('.jsonl'):
+        repositories = records_to_repositories(read_repo_records(input_file))
+    else:
+        repositories = parse_repositories(read_github_data(input_file))
     
-    # Analyze each repository using LLM
-    enhanced_repositories = []
-    for repo in repositories:
-        enhanced_repo = analyze_repository_with_llm(repo)
-        enhanced_repositories.append(enhanced_repo)
+    # Analyze the repositories concurrently using LLM
+    enhanced_repositories = analyze_repositories(repositories)
     
     # Format and write the output
     formatted_output = format_output(enhanced_repositories)
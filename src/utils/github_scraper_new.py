@@ -1,7 +1,56 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+try:
+    from .http_cache import HTTPCache
+    from .repo_page_parser import parse_repo_page
+    from .rate_limiter import RequestScheduler
+    from .repo_records import write_repo_records
+    from .tracing import tracer
+except ImportError:  # Run as a script from src/utils
+    from http_cache import HTTPCache
+    from repo_page_parser import parse_repo_page
+    from rate_limiter import RequestScheduler
+    from repo_records import write_repo_records
+    from tracing import tracer
+
+# Maximum number of repository pages fetched at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Shared keep-alive connection pool, sized so every worker can hold a connection
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=DEFAULT_MAX_WORKERS))
+session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=DEFAULT_MAX_WORKERS))
+
+# Token-bucket scheduler shared by every GitHub request, handles 429/403 throttling
+scheduler = RequestScheduler(session)
+
+# On-disk conditional-request cache; set to None to always hit the network
+http_cache = HTTPCache()
+
+def fetch_page(url):
+    """
+    Fetches a page through the HTTP cache and the shared request scheduler.
+
+    Args:
+        url: The URL to fetch.
 
+    Returns:
+        The requests.Response for the page.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails or returns an error status.
+    """
+    if http_cache is None:
+        response = scheduler.get(url)
+    else:
+        response = http_cache.get(url, scheduler.get)
+    response.raise_for_status()
+    return response
+
+@tracer.traced('github.fetch', 'http')
 def get_repo_data(repo_url):
     """
     Fetches and extracts data from a given GitHub repository URL.
@@ -13,63 +62,8 @@ def get_repo_data(repo_url):
         A dictionary containing the repository's data, or None if an error occurs.
     """
     try:
-        response = requests.get(repo_url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract repository name
-        repo_name = soup.find('a', {'data-pjax': '#repo-content-pjax-container'}).text.strip()
-
-
-        # Extract number of commits
-        commits_element = soup.find('li', string=lambda text: text and "commits" in text)
-        num_commits = 0
-        if commits_element:
-            commits_text = commits_element.text.strip()
-            commits_match = re.search(r'([\d,]+)\s+commits?', commits_text)
-            if commits_match:
-              num_commits = int(commits_match.group(1).replace(',', ''))
-        
-
-        # Extract number of branches
-        branches_element = soup.find('a', href=re.compile(r'/branches$'))
-        if branches_element:
-          branches_text = branches_element.text.strip()
-          num_branches = int(re.search(r'([\d,]+)', branches_text).group(1).replace(',', '')) if re.search(r'([\d,]+)', branches_text) else 0
-        else:
-          num_branches = 0
-
-        # Extract number of releases
-        releases_element = soup.find('a', href=re.compile(r'/releases$'))
-        if releases_element:
-          releases_text = releases_element.text.strip()
-          num_releases = int(re.search(r'([\d,]+)', releases_text).group(1).replace(',', '')) if re.search(r'([\d,]+)', releases_text) else 0
-        else:
-          num_releases = 0
-        
-        # Extract number of contributors
-        contributors_element = soup.find('a', href=re.compile(r'/contributors$'))
-        if contributors_element:
-          contributors_text = contributors_element.text.strip()
-          num_contributors = int(re.search(r'([\d,]+)', contributors_text).group(1).replace(',', '')) if re.search(r'([\d,]+)', contributors_text) else 0
-        else:
-          num_contributors = 0
-
-        # Extract Readme content
-        readme_div = soup.find('article', class_='markdown-body entry-content container-lg')
-        readme_content = readme_div.text.strip() if readme_div else "No Readme"
-
-        repo_data = {
-            'name': repo_name,
-            'url': repo_url,
-            'commits': num_commits,
-            'branches': num_branches,
-            'releases': num_releases,
-            'contributors': num_contributors,
-            'readme_content': readme_content,
-        }
-        return repo_data
+        response = fetch_page(repo_url)
+        return parse_repo_page(response.text, repo_url)
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data for {repo_url}: {e}")
@@ -79,24 +73,54 @@ def get_repo_data(repo_url):
         return None
 
 
+def get_repos_data(repo_urls, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Fetches data for several repositories concurrently over the shared session.
+
+    Args:
+        repo_urls: An iterable of GitHub repository URLs. Generators such as
+            get_user_repositories are consumed lazily, so fetching starts as
+            soon as the first URL is yielded.
+        max_workers: Maximum number of requests in flight at once.
+
+    Returns:
+        A list of repository data dictionaries in the same order as repo_urls.
+        Repositories that could not be fetched or parsed are skipped.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(get_repo_data, repo_urls)
+        return [repo_data for repo_data in results if repo_data]
+
+
 def get_user_repositories(username):
     """
-    Fetches a list of repository URLs for a given GitHub username.
+    Yields the repository URLs for a given GitHub username.
+
+    Follows the pagination of the repositories tab lazily, so URLs from the
+    first page are available before later pages are requested.
+
+    Args:
+        username: The GitHub username.
+
+    Yields:
+        Repository URLs, page by page.
     """
     url = f"https://github.com/{username}?tab=repositories"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
+    while url:
+        try:
+            response = fetch_page(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching repositories for {username}: {e}")
+            return
         soup = BeautifulSoup(response.text, 'html.parser')
-        repo_elements = soup.find_all('a', itemprop='name codeRepository')
-        repo_urls = [f"https://github.com{element['href']}" for element in repo_elements]
-        return repo_urls
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching repositories for {username}: {e}")
-        return []
+        for element in soup.find_all('a', itemprop='name codeRepository'):
+            yield f"https://github.com{element['href']}"
+
+        next_link = soup.find('a', class_='next_page') or soup.find('a', rel='next')
+        url = urljoin(url, next_link['href']) if next_link and next_link.get('href') else None
 
 def save_to_text(data, output_file):
-    """Saves the scraped data to a text file."""
+    """Saves the scraped data to a human-readable text file (legacy export, see write_repo_records)."""
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("GitHub Repositories Data\n\n")
 
@@ -116,15 +140,13 @@ def main():
     username = "sr2echa"  # Replace with the desired GitHub username
     repositories = get_user_repositories(username)
 
-    all_repo_data = []
-    for repo_url in repositories:
-        repo_data = get_repo_data(repo_url)
-        if repo_data:
-            all_repo_data.append(repo_data)
+    all_repo_data = get_repos_data(repositories)
 
-    # Save the extracted data to a text file
+    # Save the extracted data as JSONL records, plus the legacy text export
+    write_repo_records(all_repo_data, "output_github.jsonl")
     save_to_text(all_repo_data, "output_github.txt")
-    print(f"Data saved to output_github.txt")
+    print("Data saved to output_github.jsonl and output_github.txt")
+    print(f"Request scheduler: {scheduler.stats()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+try:
+    from .tracing import tracer
+except ImportError:  # Imported by github_scraper_new run as a script from src/utils
+    from tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'http')
+DEFAULT_TTL = 24 * 60 * 60  # Seconds an entry is served without revalidation
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # Total body size kept on disk before LRU eviction
+
+
+class HTTPCache:
+    """On-disk cache for GET responses, keyed by URL.
+
+    Entries younger than ``ttl`` seconds are served straight from disk. Older
+    entries are revalidated with a conditional request built from the stored
+    ETag / Last-Modified headers, and a 304 answer is served from disk.
+    When the stored bodies exceed ``max_bytes`` the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Opened lazily so that importing the scraper does not touch the disk
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite'), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, encoding TEXT, "
+                "body BLOB, size INTEGER, stored_at REAL, last_access REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url, send):
+        """Returns the response for url, going to the network only when needed.
+
+        Args:
+            url (str): The URL to fetch.
+            send (callable): Called as ``send(url, headers=...)`` to perform the
+                actual request, e.g. ``requests.Session.get``.
+
+        Returns:
+            requests.Response: The live response, or one rebuilt from disk.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified, encoding, body, stored_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        now = time.time()
+
+        if row and now - row[4] < self.ttl:
+            self._touch(url, now, refresh=False)
+            self._count('hits')
+            tracer.annotate(cache_hits=1)
+            return self._build_response(url, row)
+
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+
+        response = send(url, headers=headers)
+
+        if response.status_code == 304 and row:
+            self._touch(url, now, refresh=True)
+            self._count('revalidated')
+            tracer.annotate(cache_hits=1)
+            return self._build_response(url, row)
+
+        self._count('misses')
+        if response.status_code == 200:
+            self._store(url, response, now)
+        return response
+
+    def stats(self):
+        """Returns the hit / revalidation / miss counters as a dictionary."""
+        with self._lock:
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def _count(self, counter):
+        # The cache is shared by the scraper's fetch pool, so counters are updated under the lock
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _touch(self, url, now, refresh):
+        with self._lock:
+            conn = self._connect()
+            if refresh:
+                conn.execute("UPDATE entries SET stored_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            else:
+                conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, url))
+            conn.commit()
+
+    def _store(self, url, response, now):
+        body = response.content
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 response.encoding, body, len(body), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in conn.execute("SELECT url, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _build_response(url, row):
+        etag, last_modified, encoding, body, _ = row
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = url
+        response._content = body
+        response.encoding = encoding
+        response.headers = CaseInsensitiveDict()
+        if etag:
+            response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = last_modified
+        return response
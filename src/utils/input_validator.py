@@ -3,8 +3,9 @@ import os
 import re
 from typing import Dict, Optional, Union
 from .pdf_to_text import convert_pdf_to_text
-from .github_scraper_new import get_user_repositories, get_repo_data, save_to_text
-from .github_refiner_llm import read_github_data, parse_repositories, analyze_repository_with_llm, format_output
+from .github_scraper_new import save_to_text
+from .github_pipeline import run_github_pipeline
+from .repo_records import read_repo_records
 
 
 class InputValidator:
@@ -22,6 +23,7 @@ class InputValidator:
         self.cv_file_path = None
         self.cv_text_path = None
         self.github_output_file = None
+        self.github_records_file = None
         self.refined_output_file = None
 
     def validate_github_profile(self, profile: str) -> bool:
@@ -101,41 +103,19 @@ class InputValidator:
                     self.inputs["github_profile"] = f"github.com/{username}"
                     print(f"\nFetching GitHub repositories for {username}...")
                     
-                    # Process GitHub data
-                    repositories = get_user_repositories(username)
-                    if not repositories:
-                        print("No repositories found or error occurred while fetching repositories.")
-                        continue
-
-                    # Get repository data and save to file
-                    all_repo_data = []
-                    for repo_url in repositories:
-                        repo_data = get_repo_data(repo_url)
-                        if repo_data:
-                            all_repo_data.append(repo_data)
+                    # Fetch and analyze GitHub data as one pipeline: LLM analysis starts
+                    # while later repositories are still being listed and fetched
+                    self.github_records_file = os.path.join(self.script_dir, "output_github.jsonl")
+                    self.refined_output_file = os.path.join(self.script_dir, "refined_output_github_llm.txt")
+                    summary = run_github_pipeline(username, self.refined_output_file, self.github_records_file)
 
-                    if not all_repo_data:
-                        print("Failed to fetch repository data.")
+                    if not summary['repositories']:
+                        print("No repositories found or error occurred while fetching repository data.")
                         continue
 
                     self.github_output_file = os.path.join(self.script_dir, "output_github.txt")
-                    save_to_text(all_repo_data, self.github_output_file)
-
-                    # Refine GitHub data using LLM
-                    print("\nAnalyzing GitHub repositories using LLM...")
-                    content = read_github_data(self.github_output_file)
-                    parsed_repos = parse_repositories(content)
-
-                    enhanced_repositories = []
-                    for repo in parsed_repos:
-                        enhanced_repo = analyze_repository_with_llm(repo)
-                        enhanced_repositories.append(enhanced_repo)
-
-                    self.refined_output_file = os.path.join(self.script_dir, "refined_output_github_llm.txt")
-                    formatted_output = format_output(enhanced_repositories)
-                    with open(self.refined_output_file, 'w', encoding='utf-8') as file:
-                        file.write(formatted_output)
-                    print(f"GitHub analysis complete! Results saved to {self.github_output_file} and {self.refined_output_file}")
+                    save_to_text(read_repo_records(self.github_records_file), self.github_output_file)
+                    print(f"GitHub analysis complete! Results saved to {self.github_records_file}, {self.github_output_file} and {self.refined_output_file}")
             else:
                 print("Please provide a valid GitHub username or profile URL.")
         
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from crewai.knowledge.source.text_file_knowledge_source import TextFileKnowledgeSource
+from .tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_INDEX_DIR = os.path.join(PROJECT_ROOT, 'cache', 'knowledge')
+
+# Written between the input files of a merged knowledge file (see next_agent.merge_text_files)
+SECTION_SEPARATOR_RE = re.compile(r'\n={40}\n')
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class KnowledgeIndex:
+    """Persistent record of the chunks each source file has in each knowledge collection.
+
+    crewai stores knowledge chunks in ChromaDB under the SHA-256 of their
+    text, so the chunk IDs of a file are known without embedding anything.
+    The index remembers, per collection and source file, the file's content
+    hash and its chunk IDs; that is enough to skip unchanged files and to
+    delete the chunks a changed file no longer has.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self.embedded = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Opened lazily so that importing a module that owns an index does not touch the disk
+        if self._conn is None:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.index_dir, 'index.sqlite'), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "collection TEXT, source TEXT, digest TEXT, indexed_at REAL, PRIMARY KEY (collection, source))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "collection TEXT, source TEXT, chunk_id TEXT, PRIMARY KEY (collection, source, chunk_id))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, collection: str, source: str) -> Optional[Tuple[str, List[str]]]:
+        """Returns the content hash and chunk IDs last indexed for a source file, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT digest FROM sources WHERE collection = ? AND source = ?", (collection, source)
+            ).fetchone()
+            if not row:
+                return None
+            chunk_ids = [chunk_id for (chunk_id,) in conn.execute(
+                "SELECT chunk_id FROM chunks WHERE collection = ? AND source = ?", (collection, source))]
+            return row[0], chunk_ids
+
+    def shared(self, collection: str, source: str, chunk_ids: Set[str]) -> Set[str]:
+        """Returns the chunk IDs among chunk_ids that other source files of the collection also have."""
+        if not chunk_ids:
+            return set()
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT chunk_id FROM chunks WHERE collection = ? AND source != ? "
+                f"AND chunk_id IN ({', '.join('?' * len(chunk_ids))})",
+                (collection, source, *chunk_ids)
+            )
+            return {chunk_id for (chunk_id,) in rows}
+
+    def put(self, collection: str, source: str, digest: str, chunk_ids: List[str]) -> None:
+        """Records the content hash and chunk IDs of an indexed source file."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (collection, source, digest, time.time()))
+            conn.execute("DELETE FROM chunks WHERE collection = ? AND source = ?", (collection, source))
+            conn.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?, ?)",
+                             [(collection, source, chunk_id) for chunk_id in chunk_ids])
+            conn.commit()
+
+    def collections(self, source: str) -> List[Tuple[str, List[str]]]:
+        """Returns (collection, chunk IDs) for every collection a source file is indexed in."""
+        with self._lock:
+            conn = self._connect()
+            names = [name for (name,) in conn.execute("SELECT collection FROM sources WHERE source = ?", (source,))]
+            return [(name, [chunk_id for (chunk_id,) in conn.execute(
+                "SELECT chunk_id FROM chunks WHERE collection = ? AND source = ?", (name, source))]) for name in names]
+
+    def remove(self, collection: str, source: str) -> None:
+        """Forgets a source file of a collection."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM sources WHERE collection = ? AND source = ?", (collection, source))
+            conn.execute("DELETE FROM chunks WHERE collection = ? AND source = ?", (collection, source))
+            conn.commit()
+
+    def count(self, embedded: int = 0, reused: int = 0) -> None:
+        """Adds to the embedded / reused chunk counters."""
+        with self._lock:
+            self.embedded += embedded
+            self.reused += reused
+
+    def stats(self) -> Dict:
+        """Returns the embedded / reused chunk counters as a dictionary."""
+        with self._lock:
+            return {'embedded': self.embedded, 'reused': self.reused}
+
+
+# Process-wide index used by IndexedTextFileKnowledgeSource
+knowledge_index = KnowledgeIndex()
+
+# Serializes IndexedTextFileKnowledgeSource.add across threads (a module global:
+# pydantic would copy a lock declared on the model into every instance)
+_add_lock = threading.Lock()
+
+
+def _chroma_collection(storage, collection_name: Optional[str] = None):
+    """Returns a ChromaDB collection of a crewai KnowledgeStorage's client, or None for other backends.
+
+    The collection is the storage's own unless collection_name (as recorded
+    in the index) names another one on the same client.
+
+    KnowledgeStorage has no public way to look chunks up or delete them by ID,
+    so this reaches for its RAG client (a private attribute, verified against
+    the crewai version pinned in requirements.txt) and asks that client for
+    the collection through its public get_or_create_collection. If that fails,
+    e.g. after a crewai upgrade, indexing falls back to the content hashes
+    alone: unchanged files are still skipped, but stale chunks stay behind.
+    """
+    try:
+        client = storage._get_client()
+        if collection_name is None:
+            collection_name = storage.collection_name or 'knowledge'
+        # crewai's naming: 'knowledge_<agent collection>', or plain 'knowledge' without one
+        name = f"knowledge_{collection_name}" if collection_name != 'knowledge' else "knowledge"
+        collection = client.get_or_create_collection(collection_name=name)
+    except Exception as e:
+        print(f"Warning: Knowledge collection not reachable ({e}); stale knowledge chunks will not be deleted")
+        return None
+    # Other backends return collections without ChromaDB's lookup and delete by ID
+    return collection if hasattr(collection, 'get') and hasattr(collection, 'delete') else None
+
+
+class IndexedTextFileKnowledgeSource(TextFileKnowledgeSource):
+    """TextFileKnowledgeSource that only embeds the chunks its collection does not hold yet.
+
+    crewai adds an agent's knowledge sources again on every kickoff, which
+    re-embeds every chunk of every file. This source skips files whose
+    content hash is unchanged since they were indexed (as long as their
+    chunks are still in the collection), embeds only the new chunks of
+    changed files and deletes the chunks those files no longer have.
+
+    Merged knowledge files are chunked per input file, so a change to one
+    analysis re-embeds only that analysis's chunks. Sources are indexed one
+    at a time, so agents on concurrent threads never embed the same chunks
+    twice or race on a collection.
+    """
+
+    def _chunk_text(self, text: str) -> List[str]:
+        chunks = []
+        for section in SECTION_SEPARATOR_RE.split(text):
+            if section.strip():
+                chunks.extend(super()._chunk_text(section))
+        return chunks
+
+    def add(self) -> None:
+        with _add_lock:
+            self._add_missing()
+
+    def _add_missing(self) -> None:
+        collection = _chroma_collection(self.storage)
+        collection_name = getattr(self.storage, 'collection_name', None) or 'knowledge'
+        updates = []
+        self.chunks = []
+        for path, text in self.content.items():
+            source = os.path.abspath(str(path))
+            digest = content_digest(text)
+            indexed = knowledge_index.get(collection_name, source)
+            if indexed and indexed[0] == digest and (collection is None or self._present(collection, indexed[1]) == set(indexed[1])):
+                knowledge_index.count(reused=len(indexed[1]))
+                tracer.annotate(cache_hits=1)
+                continue
+
+            chunks = {content_digest(chunk): chunk for chunk in self._chunk_text(text)}
+            present = self._present(collection, list(chunks)) if collection is not None else set(indexed[1] if indexed else [])
+            self.chunks.extend(chunk for chunk_id, chunk in chunks.items() if chunk_id not in present)
+            knowledge_index.count(reused=len(present & set(chunks)))
+            stale = set(indexed[1]) - set(chunks) if indexed else set()
+            stale -= knowledge_index.shared(collection_name, source, stale)
+            updates.append((source, digest, list(chunks), stale))
+
+        if self.chunks:
+            self._save_documents()
+            knowledge_index.count(embedded=len(self.chunks))
+        for source, digest, chunk_ids, stale in updates:
+            if stale and collection is not None:
+                collection.delete(ids=list(stale))
+            knowledge_index.put(collection_name, source, digest, chunk_ids)
+
+    @staticmethod
+    def _present(collection, chunk_ids: List[str]) -> Set[str]:
+        """Returns the chunk IDs the collection holds (a lookup by ID; nothing is embedded)."""
+        if not chunk_ids:
+            return set()
+        return set(collection.get(ids=chunk_ids, include=[])['ids'])
+
+
+def discard_knowledge_file(path: str, sources: List[IndexedTextFileKnowledgeSource]) -> None:
+    """Deletes a knowledge file's chunks from every collection it was indexed in, and its index rows.
+
+    For files that are not used again, such as the merged file of one batch
+    pair, so the collections do not grow with every run and later runs do not
+    retrieve them. Chunks other files also have are kept. sources are the
+    knowledge sources the file was added through; their storage gives access
+    to the collections (if none was ever added, nothing was embedded).
+    """
+    storage = next((source.storage for source in sources if source.storage is not None), None)
+    source = os.path.abspath(str(path))
+    with _add_lock:
+        for collection_name, chunk_ids in knowledge_index.collections(source):
+            stale = set(chunk_ids) - knowledge_index.shared(collection_name, source, set(chunk_ids))
+            if stale:
+                collection = _chroma_collection(storage, collection_name) if storage is not None else None
+                if collection is None:
+                    continue  # Keep the rows, they are the only record of the chunks left behind
+                collection.delete(ids=list(stale))
+            knowledge_index.remove(collection_name, source)
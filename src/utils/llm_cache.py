@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from .tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'llm')
+DEFAULT_TTL = 30 * 24 * 60 * 60  # Seconds a cached response stays valid
+DEFAULT_MAX_ENTRIES = 5000  # Entries kept before least recently used ones are evicted
+
+
+class LLMCache:
+    """Persistent cache of LLM responses, keyed by a hash of the request.
+
+    The key covers everything that determines the response: the messages
+    (i.e. the full prompt), the model and the sampling parameters. Entries
+    older than ``ttl`` seconds are treated as misses, and once more than
+    ``max_entries`` are stored the least recently used ones are evicted.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Opened lazily so that importing a module that owns a cache does not touch the disk
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'responses.sqlite'), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT, stored_at REAL, last_access REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key_for(request: Dict) -> str:
+        """Returns the content hash for a request (model, parameters and messages)."""
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] < self.ttl:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                tracer.annotate(cache_hits=1)
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        """Stores a response, evicting the least recently used entries beyond max_entries."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, now, now))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def stats(self) -> Dict:
+        """Returns the hit / miss counters as a dictionary."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
@@ -0,0 +1,122 @@
+import re
+import threading
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('o200k_base')  # Tokenizer of the gpt-4o / gpt-4.1 family
+except Exception:  # Not installed, or the encoding could not be loaded (e.g. offline)
+    _ENCODING = None
+
+# Where the upstream context blocks go in a task description; appended at the end if absent
+CONTEXT_MARKER = '[[UPSTREAM_CONTEXT]]'
+DEFAULT_TASK_TOKEN_BUDGET = 16000  # Prompt tokens allowed per task description
+MIN_DEDUPLICATED_CHARS = 80  # Shorter paragraphs (headings, '---', list labels) are structure and always kept
+
+PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+
+
+def count_tokens(text: str) -> int:
+    """Counts prompt tokens with tiktoken when installed, otherwise about four characters per token."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _normalize(paragraph: str) -> str:
+    return ' '.join(paragraph.lower().split())
+
+
+class PromptAssembler:
+    """Builds task descriptions from a template and the outputs of upstream tasks.
+
+    Upstream outputs are passed as labelled blocks in priority order. Paragraphs
+    of at least MIN_DEDUPLICATED_CHARS already present in the template or in an
+    earlier block are dropped, and if the description still exceeds the token
+    budget the lowest-priority blocks are cut from their end, paragraph by
+    paragraph, until it fits. Both steps
+    are deterministic, so the same inputs always give the same prompt (and the
+    same stage cache and LLM cache keys).
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TASK_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.reports = {}
+        self._lock = threading.Lock()
+
+    def assemble(self, name: str, template: str, blocks: List[Tuple[str, str]]) -> str:
+        """Returns the description for task name and records its token report.
+
+        Args:
+            name (str): Task name the report is stored under.
+            template (str): Task description, optionally containing CONTEXT_MARKER.
+            blocks (list): (label, text) pairs of upstream outputs, most important first.
+        """
+        seen = {_normalize(paragraph) for paragraph in PARAGRAPH_SPLIT_RE.split(template)}
+        kept_blocks = []
+        deduplicated = 0
+        for label, text in blocks:
+            kept = []
+            for paragraph in PARAGRAPH_SPLIT_RE.split(text.strip()):
+                key = _normalize(paragraph)
+                if not key:
+                    continue
+                if len(key) < MIN_DEDUPLICATED_CHARS:
+                    kept.append(paragraph)
+                elif key in seen:
+                    deduplicated += count_tokens(paragraph)
+                else:
+                    seen.add(key)
+                    kept.append(paragraph)
+            kept_blocks.append([label, kept, 0])
+
+        # What the prompt would cost with every upstream output inlined as-is
+        naive_tokens = count_tokens(self._render(template, [[label, [text.strip()], 0] for label, text in blocks]))
+
+        description = self._render(template, kept_blocks)
+        overflow = count_tokens(description) - self.token_budget
+        for block in reversed(kept_blocks):
+            while overflow > 0 and block[1]:
+                removed = count_tokens(block[1].pop())
+                block[2] += removed
+                overflow -= removed
+        trimmed = sum(block[2] for block in kept_blocks)
+        if trimmed:
+            description = self._render(template, kept_blocks)
+            # Part counts do not add up exactly (trim notes, joins), so finish paragraph by paragraph
+            while count_tokens(description) > self.token_budget and any(block[1] for block in kept_blocks):
+                block = next(block for block in reversed(kept_blocks) if block[1])
+                removed = count_tokens(block[1].pop())
+                block[2] += removed
+                trimmed += removed
+                description = self._render(template, kept_blocks)
+
+        tokens = count_tokens(description)
+        with self._lock:
+            self.reports[name] = {
+                'tokens': tokens,
+                'saved': max(naive_tokens - tokens, 0),
+                'deduplicated': deduplicated,
+                'trimmed': trimmed,
+                'over_budget': tokens > self.token_budget,
+            }
+        return description
+
+    @staticmethod
+    def _render(template: str, kept_blocks: List) -> str:
+        sections = []
+        for label, paragraphs, trimmed in kept_blocks:
+            body = '\n\n'.join(paragraphs)
+            if trimmed:
+                body += f"\n\n[... {trimmed} tokens trimmed to fit the prompt budget]"
+            sections.append(f"{label}:\n{body.strip()}\n---")
+        context = '\n'.join(sections)
+        if CONTEXT_MARKER in template:
+            return template.replace(CONTEXT_MARKER, context)
+        return f"{template.rstrip()}\n---\n{context}" if context else template
+
+    def summary(self) -> Dict:
+        """Returns the token totals over every assembled task."""
+        with self._lock:
+            reports = list(self.reports.values())
+        return {field: sum(report[field] for report in reports) for field in ('tokens', 'saved', 'deduplicated', 'trimmed')}
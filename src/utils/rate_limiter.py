@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+try:
+    from .tracing import tracer
+except ImportError:  # Imported by github_scraper_new run as a script from src/utils
+    from tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+DEFAULT_RATE = 5.0  # Requests per second allowed through the token bucket
+DEFAULT_BURST = 10  # Tokens the bucket can hold
+DEFAULT_MIN_RATE = 0.2  # Floor the rate is cut down to after repeated throttling
+DEFAULT_PER_HOST_CONCURRENCY = 4  # Requests in flight to a single host
+DEFAULT_MAX_RETRIES = 4  # Retries of a throttled request before giving up
+DEFAULT_BASE_BACKOFF = 2.0  # Seconds, doubled on each retry when no header says otherwise
+DEFAULT_MAX_BACKOFF = 120.0  # Upper bound for a single wait
+
+# Phrases in the body of a 403 that mark a secondary rate limit (GitHub sends these without rate-limit headers)
+SECONDARY_LIMIT_MARKERS = ('secondary rate limit', 'abuse detection')
+
+
+class RequestScheduler:
+    """Shared token-bucket scheduler for requests to rate-limited hosts.
+
+    Every request takes a token from the bucket and a slot from its host's
+    concurrency cap. A 429, or a 403 carrying rate-limit headers or a
+    secondary-rate-limit message, pauses the whole scheduler for the time
+    given by ``Retry-After`` or ``X-RateLimit-Reset`` (exponential backoff
+    otherwise), halves the rate and retries. No tokens accrue during the
+    pause. Successful requests grow the rate back towards its maximum.
+    """
+
+    def __init__(self, session, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=DEFAULT_MIN_RATE,
+                 per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 base_backoff=DEFAULT_BASE_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        self.session = session
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._host_slots = {}
+
+        self.metrics = {
+            'requests': 0,
+            'throttled': 0,
+            'retries': 0,
+            'wait_seconds': 0.0,
+            'host_wait_seconds': 0.0,
+            'backoff_seconds': 0.0,
+        }
+
+    def get(self, url, **kwargs):
+        """Performs a GET through the scheduler, retrying throttled responses.
+
+        Args:
+            url (str): The URL to fetch.
+            **kwargs: Passed through to ``session.get`` (e.g. ``headers``).
+
+        Returns:
+            requests.Response: The final response. If the retries run out it
+            is the last throttled response, for the caller to handle.
+        """
+        slot = self._host_slot(urlparse(url).netloc)
+        for attempt in range(self.max_retries + 1):
+            self._acquire_token()
+
+            start = time.monotonic()
+            slot.acquire()
+            self._add_metric('host_wait_seconds', time.monotonic() - start)
+            try:
+                response = self.session.get(url, **kwargs)
+            finally:
+                slot.release()
+            self._add_metric('requests', 1)
+
+            delay = self._throttle_delay(response, attempt)
+            if delay is None:
+                self._on_success()
+                return response
+
+            self._on_throttled(delay)
+            if attempt < self.max_retries:
+                self._add_metric('retries', 1)
+                tracer.annotate(retries=1)
+                print(f"Rate limited on {url} (HTTP {response.status_code}), retrying in {delay:.1f}s")
+        return response
+
+    def stats(self):
+        """Returns a copy of the metrics, including the current rate.
+
+        ``wait_seconds`` is the time callers spent blocked on the bucket or a
+        throttling pause, ``host_wait_seconds`` the time spent waiting for a
+        per-host slot and ``backoff_seconds`` the total pause imposed by
+        throttled responses.
+        """
+        with self._lock:
+            stats = dict(self.metrics)
+            stats['rate'] = self.rate
+        return stats
+
+    def _host_slot(self, host):
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host_concurrency)
+            return self._host_slots[host]
+
+    def _add_metric(self, key, value):
+        with self._lock:
+            self.metrics[key] += value
+
+    def _acquire_token(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + max(now - self._last_refill, 0.0) * self.rate)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.metrics['wait_seconds'] += waited
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def _throttle_delay(self, response, attempt):
+        """Returns the seconds to wait before retrying, or None if the response is not throttled."""
+        headers = response.headers
+        remaining = headers.get('X-RateLimit-Remaining')
+        throttled = response.status_code == 429 or (
+            response.status_code == 403 and (remaining == '0' or 'Retry-After' in headers
+                                              or self._is_secondary_limit(response))
+        )
+        if not throttled:
+            return None
+
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.max_backoff)
+
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining == '0' and reset and reset.isdigit():
+            return min(max(int(reset) - time.time(), 0.0), self.max_backoff)
+
+        # Secondary limits come without headers; back off exponentially with jitter
+        return min(self.base_backoff * (2 ** attempt) * (1 + random.random() / 2), self.max_backoff)
+
+    @staticmethod
+    def _is_secondary_limit(response):
+        try:
+            body = response.text.lower()
+        except Exception:
+            return False
+        return any(marker in body for marker in SECONDARY_LIMIT_MARKERS)
+
+    def _on_throttled(self, delay):
+        with self._lock:
+            self.metrics['throttled'] += 1
+            self.metrics['backoff_seconds'] += delay
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 1.0)
+            # No tokens accrue while paused: the bucket starts refilling when the pause ends
+            self._last_refill = self._paused_until
+
+    def _on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
@@ -0,0 +1,58 @@
+import importlib.util
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Use lxml when it is installed, it tokenizes large pages considerably faster
+PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Only the tags get_repo_data reads are kept in the tree; page chrome, svgs,
+# scripts and layout divs are skipped while parsing
+REPO_PAGE_STRAINER = SoupStrainer(['a', 'li', 'article'])
+
+README_CLASS = 'markdown-body entry-content container-lg'
+
+COMMITS_RE = re.compile(r'([\d,]+)\s+commits?')
+NUMBER_RE = re.compile(r'([\d,]+)')
+BRANCHES_HREF_RE = re.compile(r'/branches$')
+RELEASES_HREF_RE = re.compile(r'/releases$')
+CONTRIBUTORS_HREF_RE = re.compile(r'/contributors$')
+
+
+def _count(element, pattern=NUMBER_RE):
+    """Returns the first number matched in an element's text, or 0."""
+    if not element:
+        return 0
+    match = pattern.search(element.text)
+    return int(match.group(1).replace(',', '')) if match else 0
+
+
+def parse_repo_page(html, repo_url):
+    """
+    Extracts repository data from the HTML of a GitHub repository page.
+
+    Args:
+        html: The page HTML.
+        repo_url: The URL the page was fetched from.
+
+    Returns:
+        A dictionary with the same keys as get_repo_data.
+
+    Raises:
+        AttributeError: If the repository name cannot be found on the page.
+    """
+    soup = BeautifulSoup(html, PARSER, parse_only=REPO_PAGE_STRAINER)
+
+    repo_name = soup.find('a', {'data-pjax': '#repo-content-pjax-container'}).text.strip()
+
+    commits_element = soup.find('li', string=lambda text: text and "commits" in text)
+    readme_div = soup.find('article', class_=README_CLASS)
+
+    return {
+        'name': repo_name,
+        'url': repo_url,
+        'commits': _count(commits_element, COMMITS_RE),
+        'branches': _count(soup.find('a', href=BRANCHES_HREF_RE)),
+        'releases': _count(soup.find('a', href=RELEASES_HREF_RE)),
+        'contributors': _count(soup.find('a', href=CONTRIBUTORS_HREF_RE)),
+        'readme_content': readme_div.text.strip() if readme_div else "No Readme",
+    }
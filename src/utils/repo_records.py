@@ -0,0 +1,32 @@
+import json
+from typing import Dict, Iterable, Iterator
+
+# One JSON object per line with the keys produced by get_repo_data:
+# name, url, commits, branches, releases, contributors, readme_content
+
+
+def write_repo_records(records: Iterable[Dict], output_file: str) -> int:
+    """Write repository records to a JSONL file as they arrive.
+
+    Args:
+        records: Repository data dictionaries (e.g. from get_repos_data).
+        output_file: Path of the .jsonl file to create.
+
+    Returns:
+        int: Number of records written.
+    """
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def read_repo_records(input_file: str) -> Iterator[Dict]:
+    """Lazily yield repository records from a JSONL file, skipping blank lines."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
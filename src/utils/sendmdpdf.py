@@ -3,9 +3,9 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+import io
 import markdown
 import os
-from pathlib import Path
 from bs4 import BeautifulSoup
 
 
@@ -75,26 +75,52 @@ class MarkdownToReportlab:
                     self._process_html_element(child, parent_tag=tag)
 
 
-def convert_markdown_to_pdf():
-    markdown_file = 'resume.md'
-    output_file = os.path.join('..', '..', 'output', str(Path(markdown_file).with_suffix('.pdf')))
+# Markdown extensions used to turn resume Markdown into HTML
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code', 'codehilite', 'toc', 'nl2br']
+DEFAULT_MARKDOWN_FILE = 'resume.md'
+DEFAULT_PDF_FILE = os.path.join('..', '..', 'output', 'resume.pdf')  # Relative to the utils directory
 
-    if not os.path.exists(markdown_file):
-        raise FileNotFoundError(f"Markdown file not found: {markdown_file}")
 
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        markdown_content = f.read()
+def markdown_to_pdf_bytes(markdown_content):
+    """Renders Markdown text as an A4 PDF and returns the PDF bytes.
 
-    html_content = markdown.markdown(markdown_content, extensions=['tables', 'fenced_code', 'codehilite', 'toc', 'nl2br'])
+    Every call uses its own converter and buffer, so concurrent renders do
+    not share any state or files.
+    """
+    html_content = markdown.markdown(markdown_content, extensions=MARKDOWN_EXTENSIONS)
     soup = BeautifulSoup(html_content, 'html.parser')
 
-    doc = SimpleDocTemplate(output_file, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
 
     converter = MarkdownToReportlab()
     converter._process_html_element(soup)
 
     doc.build(converter.story)
+    return buffer.getvalue()
+
+
+def markdown_to_pdf(markdown_content, output_file):
+    """Renders Markdown text as a PDF written to output_file (directories are created) and returns output_file."""
+    pdf_bytes = markdown_to_pdf_bytes(markdown_content)
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_file, 'wb') as f:
+        f.write(pdf_bytes)
+    return output_file
+
+
+def convert_markdown_to_pdf(markdown_file=DEFAULT_MARKDOWN_FILE, output_file=DEFAULT_PDF_FILE):
+    if not os.path.exists(markdown_file):
+        raise FileNotFoundError(f"Markdown file not found: {markdown_file}")
+
+    with open(markdown_file, 'r', encoding='utf-8') as f:
+        markdown_content = f.read()
+
+    markdown_to_pdf(markdown_content, output_file)
     print(f"Successfully converted to PDF: {output_file}")
+    return output_file
 
 
 if __name__ == '__main__':
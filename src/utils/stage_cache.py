@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from .tracing import tracer
+
+# --- Configuration (can be overridden by constructor arguments) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The directory above src/
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'stages')
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # Seconds an artifact is kept after it was stored
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # Total artifact size kept before LRU eviction
+
+
+class StageCache:
+    """Content-addressed store for pipeline stage artifacts.
+
+    Every artifact is stored under a hash of the exact inputs that produced it
+    (prompt text, upstream artifact keys, model ID, input file contents...), so
+    a change to any of them - including an edited prompt - yields a new key and
+    a cache miss. The ``artifacts`` table doubles as the manifest: it records,
+    for every key, the stage that produced it, when, and any details passed to
+    put (see manifest). Artifacts older than ``max_age`` seconds are misses and
+    are purged on the next put, and once the stored artifacts exceed
+    ``max_bytes`` the least recently used ones are evicted.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_age: float = DEFAULT_MAX_AGE,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Opened lazily so that importing a module that owns a cache does not touch the disk
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'artifacts.sqlite'), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "key TEXT PRIMARY KEY, stage TEXT, content TEXT, details TEXT, size INTEGER, "
+                "created_at REAL, last_access REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key_for(stage: str, **inputs) -> str:
+        """Returns the content hash identifying a stage run with the given inputs."""
+        canonical = json.dumps({'stage': stage, 'inputs': inputs}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """Returns the SHA-256 of a file's bytes, for use as a stage input."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the artifact stored under key, or None on a miss or expired artifact."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT content, created_at FROM artifacts WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] < self.max_age:
+                conn.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                tracer.annotate(cache_hits=1)
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, stage: str, content: str, **details) -> None:
+        """Stores an artifact under key and records it in the manifest.
+
+        Args:
+            key (str): Key from key_for.
+            stage (str): Name of the stage that produced the artifact.
+            content (str): The artifact text.
+            **details: Extra JSON-serialisable fields recorded in the manifest (e.g. model).
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, content, json.dumps(details, default=str), len(content), now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM artifacts WHERE created_at < ?", (now - self.max_age,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM artifacts ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def manifest(self) -> List[Dict]:
+        """Returns the stage, creation time, size and details of every stored artifact, newest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, stage, details, size, created_at FROM artifacts ORDER BY created_at DESC"
+            ).fetchall()
+        return [{'key': key, 'stage': stage, 'size': size, 'created_at': created_at, **json.loads(details)}
+                for key, stage, details, size, created_at in rows]
+
+    def stats(self) -> Dict:
+        """Returns the hit / miss counters as a dictionary."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
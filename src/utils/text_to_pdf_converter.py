@@ -1,11 +1,12 @@
 import os
-import subprocess
-import sys
+try:
+    from .sendmdpdf import markdown_to_pdf
+except ImportError:  # Run as a script from src/utils
+    from sendmdpdf import markdown_to_pdf
 
 # --- Configuration (can be overridden by function arguments) ---
 DEFAULT_INPUT_TEXT_FILE = 'agent_resume3.txt'  # Default if no path provided
-DEFAULT_MARKDOWN_OUTPUT_FILE = 'resume.md' # Intermediate Markdown file
-DEFAULT_PDF_SCRIPT = 'sendmdpdf.py' # Script for Markdown to PDF
+DEFAULT_PDF_OUTPUT_FILE = os.path.join('output', 'resume.pdf') # Relative to the current directory
 
 # --- Text to Markdown Conversion (Basic Example) ---
 def format_text_to_markdown(text):
@@ -48,14 +49,16 @@ def format_text_to_markdown(text):
 
 # --- Main PDF Conversion Function --- 
 def convert_text_to_pdf(input_text_file=DEFAULT_INPUT_TEXT_FILE, 
-                        markdown_output_file=DEFAULT_MARKDOWN_OUTPUT_FILE, 
-                        pdf_script=DEFAULT_PDF_SCRIPT):
-    """Converts a text file to PDF via Markdown and an external script.
+                        output_pdf_file=DEFAULT_PDF_OUTPUT_FILE, 
+                        markdown_output_file=None):
+    """Converts a text file to PDF via Markdown, rendered in-process.
 
     Args:
         input_text_file (str): Path to the input text file (e.g., final resume).
-        markdown_output_file (str): Path for the intermediate Markdown file.
-        pdf_script (str): Path to the Python script that converts Markdown to PDF.
+        output_pdf_file (str): Path of the PDF to write; relative paths are
+            relative to the current directory.
+        markdown_output_file (str, optional): Also save the intermediate
+            Markdown here (relative paths are relative to the utils directory).
 
     Returns:
         str: Path to the generated PDF file, or None if conversion fails.
@@ -63,9 +66,6 @@ def convert_text_to_pdf(input_text_file=DEFAULT_INPUT_TEXT_FILE,
     current_dir = os.path.dirname(os.path.abspath(__file__))
     # Ensure paths are absolute or relative to the script's directory
     input_text_file_abs = os.path.join(current_dir, '..', '..', input_text_file) if not os.path.isabs(input_text_file) else input_text_file
-    markdown_output_file_abs = os.path.join(current_dir, markdown_output_file) if not os.path.isabs(markdown_output_file) else markdown_output_file
-    pdf_script_abs = os.path.join(current_dir, pdf_script) if not os.path.isabs(pdf_script) else pdf_script
-    pdf_output_file = os.path.join('output', os.path.splitext(os.path.basename(markdown_output_file))[0] + '.pdf')
 
     # 1. Read the input text
     try:
@@ -85,60 +85,23 @@ def convert_text_to_pdf(input_text_file=DEFAULT_INPUT_TEXT_FILE,
     # markdown_output = plain_text # Use this if input is already Markdown
     print("Formatted text to Markdown.")
 
-    # 3. Write Markdown to the intermediate file
-    try:
-        with open(markdown_output_file_abs, 'w', encoding='utf-8') as f:
-            f.write(markdown_output)
-        print(f"Successfully wrote Markdown to '{markdown_output_file_abs}'.")
-    except Exception as e:
-        print(f"Error writing Markdown file '{markdown_output_file_abs}': {e}")
-        return None
+    # 3. Optionally keep the Markdown for inspection
+    if markdown_output_file:
+        markdown_output_file_abs = os.path.join(current_dir, markdown_output_file) if not os.path.isabs(markdown_output_file) else markdown_output_file
+        try:
+            with open(markdown_output_file_abs, 'w', encoding='utf-8') as f:
+                f.write(markdown_output)
+            print(f"Successfully wrote Markdown to '{markdown_output_file_abs}'.")
+        except Exception as e:
+            print(f"Warning: Could not write Markdown file '{markdown_output_file_abs}': {e}")
 
-    # 4. Run the PDF conversion script
-    print(f"\nRunning the PDF conversion script: {pdf_script_abs}...")
+    # 4. Render the PDF in this process
     try:
-        # Ensure the script exists
-        if not os.path.exists(pdf_script_abs):
-             print(f"Error: PDF script '{pdf_script_abs}' not found.")
-             return None
-             
-        # Run the script in the directory where it resides to handle relative paths within it
-        script_dir = os.path.dirname(pdf_script_abs)
-        python_executable = sys.executable
-        result = subprocess.run([python_executable, os.path.basename(pdf_script_abs)],
-                                 capture_output=True, text=True, check=True,
-                                 encoding='utf-8', cwd=script_dir)
-                                
-        print("--- PDF Script Output ---")
-        print(result.stdout)
-        if result.stderr:
-            print("--- PDF Script Errors ---")
-            print(result.stderr)
-        print("-------------------------")
-        print(f"Successfully executed {os.path.basename(pdf_script_abs)}.")
-        
-        # Check if the expected PDF was created
-        if os.path.exists(pdf_output_file):
-            print(f"PDF generated: {pdf_output_file}")
-            return pdf_output_file
-        else:
-            print(f"Error: PDF file '{pdf_output_file}' was not found after script execution.")
-            print(f"Check the output/errors of '{os.path.basename(pdf_script_abs)}' above.")
-            return None
-            
-    except FileNotFoundError:
-        print(f"Error: 'python' command not found. Make sure Python is installed and in your PATH.")
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing {os.path.basename(pdf_script_abs)}:")
-        print("--- Error Output --- (stdout)")
-        print(e.stdout)
-        print("--- Error Output --- (stderr)")
-        print(e.stderr)
-        print("--------------------")
-        return None
+        markdown_to_pdf(markdown_output, output_pdf_file)
+        print(f"PDF generated: {output_pdf_file}")
+        return output_pdf_file
     except Exception as e:
-        print(f"An unexpected error occurred while running the PDF script: {e}")
+        print(f"Error rendering PDF '{output_pdf_file}': {e}")
         return None
 
 # --- Main Execution (for testing) ---
@@ -153,26 +116,10 @@ if __name__ == '__main__':
         except Exception as e:
             print(f"Failed to create dummy file: {e}")
 
-    # Ensure the PDF script exists (provide a basic dummy if needed for testing)
-    if not os.path.exists(DEFAULT_PDF_SCRIPT):
-        print(f"Creating dummy PDF script: {DEFAULT_PDF_SCRIPT}")
-        try:
-            with open(DEFAULT_PDF_SCRIPT, 'w', encoding='utf-8') as f:
-                f.write("import sys, os\nprint(f'Dummy PDF script running.')\n")
-                f.write("md_file = 'resume.md'\npdf_file = 'resume.pdf'\n")
-                f.write("if os.path.exists(md_file):\n")
-                f.write("    try:\n")
-                f.write("        with open(pdf_file, 'w') as pf: pf.write('Dummy PDF content')\n")
-                f.write("        print(f'Created dummy PDF: {pdf_file}')\n")
-                f.write("    except Exception as e: print(f'Dummy script error: {e}'); sys.exit(1)\n")
-                f.write("else: print(f'Markdown file {md_file} not found.'); sys.exit(1)\n")
-        except Exception as e:
-            print(f"Failed to create dummy PDF script: {e}")
-
-    # Run the conversion
-    pdf_path = convert_text_to_pdf()
+    # Run the conversion (relative input paths are resolved against the project root)
+    pdf_path = convert_text_to_pdf(input_text_file=os.path.abspath(DEFAULT_INPUT_TEXT_FILE))
 
     if pdf_path:
         print(f"\n✅ Test successful. PDF generated at: {pdf_path}")
     else:
-        print("\n❌ Test failed.")
\ No newline at end of file
+        print("\n❌ Test failed.")
@@ -0,0 +1,272 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional
+
+# Numeric span attributes that are summed up in the summary table
+COUNTERS = ('prompt_tokens', 'completion_tokens', 'cache_hits', 'retries', 'errors')
+DEFAULT_MAX_SPANS = 50000  # Spans kept in memory; the oldest are dropped first in long-running processes
+
+
+class Span:
+    """One timed operation: a pipeline stage, a crew kickoff, a task, an LLM call or an HTTP fetch."""
+
+    def __init__(self, span_id: int, name: str, category: str, parent: Optional[int], start: float, thread: str):
+        self.id = span_id
+        self.name = name
+        self.category = category
+        self.parent = parent
+        self.start = start
+        self.end = None
+        self.thread = thread
+        self.attrs = {}
+
+    def add(self, **counters):
+        """Adds to numeric attributes (e.g. retries=1)."""
+        for key, value in counters.items():
+            self.attrs[key] = self.attrs.get(key, 0) + (value or 0)
+
+    def add_token_usage(self, usage):
+        """Adds prompt and completion tokens from a usage object or dictionary (e.g. CrewOutput.token_usage)."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda key, default: getattr(usage, key, default)
+        self.add(prompt_tokens=get('prompt_tokens', 0), completion_tokens=get('completion_tokens', 0))
+
+    def set(self, **attrs):
+        """Sets attributes, replacing earlier values."""
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id, 'name': self.name, 'category': self.category, 'parent': self.parent,
+            'start': self.start, 'end': self.end, 'duration': self.duration, 'thread': self.thread,
+            'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """Collects spans for a process and exports them as JSON or Chrome trace events.
+
+    Spans opened with span() nest per thread, so annotate() called deep inside
+    a fetch or an LLM call (retries, cache hits, tokens) lands on the innermost
+    span of the calling thread. Operations timed elsewhere (crewai tasks, LLM
+    call events) are added afterwards with record(). Only the last max_spans
+    spans are kept, so a long-running process does not grow without bound.
+    """
+
+    def __init__(self, max_spans: int = DEFAULT_MAX_SPANS):
+        self.max_spans = max_spans
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.flush_hooks = []  # Called before exporting, to drain asynchronous event handlers
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _new_span(self, name, category, start, parent=None, thread=None) -> Span:
+        with self._lock:
+            span = Span(self._next_id, name, category, parent, start, thread or threading.current_thread().name)
+            self._next_id += 1
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, category: str = 'stage', **attrs):
+        """Times the enclosed block as a span nested under the thread's current span."""
+        stack = self._stack()
+        span = self._new_span(name, category, time.time(), parent=stack[-1].id if stack else None)
+        span.set(**attrs)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, (SystemExit, KeyboardInterrupt)):
+                span.add(errors=1)
+                span.set(error=str(e))
+            raise
+        finally:
+            stack.pop()
+            span.end = time.time()
+
+    def traced(self, name: str, category: str = 'stage'):
+        """Decorator running every call of a function inside a span."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, category: str, start: float, end: float, thread: Optional[str] = None, **attrs) -> Span:
+        """Adds a span that was timed elsewhere, nested under the thread's current span."""
+        stack = self._stack()
+        span = self._new_span(name, category, start, parent=stack[-1].id if stack else None, thread=thread)
+        span.end = end
+        span.set(**attrs)
+        return span
+
+    def record_task(self, name: str, task, **attrs) -> Optional[Span]:
+        """Adds a span for a crewai task from its start and end times, if it ran."""
+        start, end = getattr(task, 'start_time', None), getattr(task, 'end_time', None)
+        if not start or not end:
+            return None
+        return self.record(name, 'task', start.timestamp(), end.timestamp(), **attrs)
+
+    def current(self) -> Optional[Span]:
+        """Returns the innermost open span of the calling thread, or None."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def annotate(self, **counters):
+        """Adds counters to the innermost open span of the calling thread; a no-op outside any span."""
+        span = self.current()
+        if span is not None:
+            span.add(**counters)
+
+    def clear(self):
+        with self._lock:
+            self.spans = deque(maxlen=self.max_spans)
+
+    def _flush(self):
+        for hook in self.flush_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Warning: Could not flush trace events: {e}")
+
+    def export(self, output_file: str, fmt: str = 'json') -> str:
+        """Writes the spans to output_file.
+
+        Args:
+            output_file (str): Destination path.
+            fmt (str): 'json' for a list of span dictionaries, 'chrome' for the
+                Chrome trace event format (chrome://tracing, Perfetto).
+
+        Returns:
+            str: output_file.
+        """
+        self._flush()
+        with self._lock:
+            spans = [span for span in self.spans if span.end is not None]
+        if fmt == 'chrome':
+            threads = {}
+            events = []
+            for span in spans:
+                tid = threads.setdefault(span.thread, len(threads) + 1)
+                events.append({
+                    'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                    'ts': int(span.start * 1e6), 'dur': int((span.end - span.start) * 1e6), 'args': span.attrs,
+                })
+            events.extend({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': thread}}
+                          for thread, tid in threads.items())
+            payload = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        elif fmt == 'json':
+            payload = [span.to_dict() for span in spans]
+        else:
+            raise ValueError(f"Unknown trace format '{fmt}', use 'json' or 'chrome'")
+
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=None if fmt == 'chrome' else 2, default=str)
+        return output_file
+
+    def summary(self) -> List[Dict]:
+        """Aggregates finished spans by category and name, in order of first appearance."""
+        self._flush()
+        rows = {}
+        with self._lock:
+            spans = [span for span in self.spans if span.end is not None]
+        for span in spans:
+            row = rows.setdefault((span.category, span.name), {
+                'category': span.category, 'name': span.name, 'count': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                **{counter: 0 for counter in COUNTERS},
+            })
+            row['count'] += 1
+            row['seconds'] += span.duration
+            row['max_seconds'] = max(row['max_seconds'], span.duration)
+            for counter in COUNTERS:
+                row[counter] += span.attrs.get(counter, 0) or 0
+        return list(rows.values())
+
+    def print_summary(self):
+        """Prints the summary as a table."""
+        rows = self.summary()
+        if not rows:
+            return
+        header = f"{'category':<8} {'span':<34} {'count':>5} {'total s':>9} {'max s':>8} {'prompt tok':>10} {'compl tok':>9} {'cache':>5} {'retry':>5} {'err':>4}"
+        print("\n⏱️ Trace summary:")
+        print(header)
+        print('-' * len(header))
+        for row in rows:
+            print(f"{row['category']:<8} {row['name'][:34]:<34} {row['count']:>5} {row['seconds']:>9.1f} "
+                  f"{row['max_seconds']:>8.1f} {row['prompt_tokens']:>10,} {row['completion_tokens']:>9,} "
+                  f"{row['cache_hits']:>5} {row['retries']:>5} {row['errors']:>4}")
+
+
+def trace_crewai_llm_calls(target: Tracer) -> bool:
+    """Records every LLM call crewai makes as an 'llm' span with its token usage.
+
+    crewai reports LLM calls through its event bus, whose handlers may run on
+    a worker pool, so calls are paired by call ID and laid out on one track
+    per agent role. Returns False if this crewai version has no LLM call events.
+    """
+    if getattr(target, '_crewai_hooked', False):
+        return True
+    try:
+        from crewai.events import crewai_event_bus, LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent
+    except ImportError:
+        return False
+
+    started = {}
+
+    def _time(event):
+        timestamp = getattr(event, 'timestamp', None)
+        return timestamp.timestamp() if timestamp else time.time()
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def on_llm_call_started(source, event):
+        started[event.call_id] = _time(event)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def on_llm_call_completed(source, event):
+        end = _time(event)
+        usage = event.usage or {}
+        role = getattr(event, 'agent_role', None) or 'crewai'
+        span = target._new_span('llm_call', 'llm', started.pop(event.call_id, end), thread=f"llm: {role}")
+        span.end = end
+        span.set(model=event.model, agent=role,
+                 prompt_tokens=usage.get('prompt_tokens', 0) or 0,
+                 completion_tokens=usage.get('completion_tokens', 0) or 0)
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def on_llm_call_failed(source, event):
+        end = _time(event)
+        role = getattr(event, 'agent_role', None) or 'crewai'
+        span = target._new_span('llm_call', 'llm', started.pop(event.call_id, end), thread=f"llm: {role}")
+        span.end = end
+        span.set(model=event.model, agent=role, errors=1, error=event.error)
+
+    if hasattr(crewai_event_bus, 'flush'):
+        target.flush_hooks.append(crewai_event_bus.flush)
+    target._crewai_hooked = True
+    return True
+
+
+# Process-wide tracer used by all pipeline stages
+tracer = Tracer()